@@ -26,6 +26,24 @@ a = Analysis(
         'src.image_finder',
         'src.image_processing',
         'src.windowcapture',
+        'src.frame_source',
+        'src.frame_buffer',
+        'src.change_detector',
+        'src.ocr_engine',
+        'src.ocr_strategy',
+        'src.ocr_pool',
+        'src.line_segmentation',
+        'src.glyph_matcher',
+        'src.line_dictionary',
+        'src.line_assembler',
+        'src.value_reader',
+        'src.ocr_server',
+        'src.stat_lexer',
+        'src.line_parse',
+        'src.roll',
+        'src.roll_rules',
+        'src.line_catalog',
+        'src.data_paths',
         'src.auto_detect_crop',
         'cv2',
         'numpy',
@@ -3,8 +3,7 @@ Automatic detection of Potential region from screenshots
 """
 import cv2 as cv
 import numpy as np
-import src.tesseract_config as tesseract_config  # Configure Tesseract path before importing pytesseract
-import pytesseract
+from src.ocr_engine import get_ocr_engine
 import os
 from src.crop_config import OFFSET_X, OFFSET_ABOVE, STAT_WIDTH, STAT_HEIGHT, BRIGHT_OFFSET_X, BRIGHT_OFFSET_ABOVE, BRIGHT_STAT_WIDTH, BRIGHT_STAT_HEIGHT
 
@@ -285,7 +284,7 @@ def detect_potential_region(image, debug=False, cube_type="Glowing"):
                 for psm_config, psm_desc in ocr_configs:
                     try:
                         # Get OCR data with bounding boxes
-                        ocr_data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT, config=psm_config)
+                        ocr_data = get_ocr_engine().image_to_data(img, config=psm_config)
                         
                         # Search for "Reset" button text
                         for i, text in enumerate(ocr_data['text']):
@@ -338,7 +337,7 @@ def detect_potential_region(image, debug=False, cube_type="Glowing"):
                     print(f"[AUTO-DETECT] No 'Reset' text found in OCR results")
                     # Debug: show what OCR actually found
                     try:
-                        ocr_data = pytesseract.image_to_data(gray, output_type=pytesseract.Output.DICT, config='--psm 6')
+                        ocr_data = get_ocr_engine().image_to_data(gray, config='--psm 6')
                         all_texts = [t for t in ocr_data.get('text', []) if len(t.strip()) > 0]
                         print(f"[AUTO-DETECT] OCR found these texts: {all_texts[:20]}")
                     except:
@@ -469,7 +468,7 @@ def detect_potential_region(image, debug=False, cube_type="Glowing"):
         for img, img_name in images_to_try:
             for psm_config, psm_desc in ocr_configs:
                 try:
-                    ocr_data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT, config=psm_config)
+                    ocr_data = get_ocr_engine().image_to_data(img, config=psm_config)
                     
                     for i, text in enumerate(ocr_data['text']):
                         text_lower = text.lower().strip()
@@ -529,7 +528,7 @@ def detect_potential_region(image, debug=False, cube_type="Glowing"):
         print("[AUTO-DETECT] All detection methods failed, using fallback region")
         # Show what OCR actually found for debugging
         try:
-            ocr_data = pytesseract.image_to_data(gray, output_type=pytesseract.Output.DICT, config='--psm 6')
+            ocr_data = get_ocr_engine().image_to_data(gray, config='--psm 6')
             all_texts = [t for t in ocr_data.get('text', []) if len(t.strip()) > 0]
             if all_texts:
                 print(f"[AUTO-DETECT] OCR found these texts: {all_texts[:20]}")
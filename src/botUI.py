@@ -1,6 +1,7 @@
 from tkinter import *
 from tkinter import ttk
 from tkinter import filedialog
+import sys
 import threading
 import win32gui
 import hashlib
@@ -150,6 +151,19 @@ class BotGUI:
         self.create_widgets()
         self.setup_hotkeys()
         
+        # Start (or connect to) the OCR server in the background - loading Tesseract never blocks the
+        # Tk thread, and the first roll already gets a warm engine
+        threading.Thread(target=self.warm_ocr, daemon=True).start()
+        
+    def warm_ocr(self):
+        try:
+            from src.ocr_engine import set_ocr_backend
+            from src.ocr_server import PRIORITY_GUI
+            set_ocr_backend(default_config.get("ocr_backend", "auto"), server=default_config.get("ocr_server", True),
+                            priority=PRIORITY_GUI)
+        except Exception as e:
+            print(f"Could not start the OCR engine: {e}")
+        
     def setup_hotkeys(self):
         """Setup hotkey listeners"""
         try:
@@ -827,6 +841,15 @@ class BotGUI:
         print("Stop button clicked - bot will stop immediately")
 
 if __name__ == "__main__":
+    # Needed for the parallel OCR worker processes in frozen (PyInstaller) builds
+    import multiprocessing
+    multiprocessing.freeze_support()
+    from src.ocr_server import SERVER_ARG
+    if len(sys.argv) > 1 and sys.argv[1] == SERVER_ARG:
+        # Frozen builds start the shared OCR server by running this executable again
+        from src.ocr_server import main
+        main(sys.argv[2:])
+        sys.exit(0)
     root = Tk()
     app = BotGUI(root)
     root.mainloop()
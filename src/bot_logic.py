@@ -1,11 +1,16 @@
-from src.translate_ocr_results import process_lines, get_stat_from_line, get_all_stats_from_line, extract_stat_value, get_potlines, matches_line_pattern
-from src.macro_controls import time_to_start , click, press_reset_spacebar
+from src.translate_ocr_results import process_lines, get_stat_from_line, get_all_stats_from_line, extract_stat_value, get_potlines, get_current_potlines, matches_line_pattern
+from src.translate_ocr_results import single_lines_dict, double_lines_dict
+from src.line_parse import parse_line
+from src.roll import Roll, StatKind
+from src.roll_rules import compile_roll_rules, canonical_line_type, ThresholdRule, CHECKABLE_STATS
+from src.macro_controls import time_to_start , click, press_reset_spacebar, ResetInputDriver
 import keyboard
 import time
 import threading
-#single_lines_dict = {"BD":['Boss Damage: +30%', 'Boss Damage: +35%', 'Boss Damage: +40%', 'Boss Damage: +45%', 'Boss Damage: +50%'],"IA":['Item Acquisition Rate: +12%','Item Acquisition Rate: +10%','tem Acquisition Rate: +12%','tem Acquisition Rate: +10%'],"CD":['Critical Damage: +6%', 'Critical Damage: +3%'],"ATT":['ATT: +9%','ATT: +6%'],"MATT":['Magic ATT: +6%','Magic ATT: +9%']}
-single_lines_dict = {"BD":['Boss Damage: +35%', 'Boss Damage: +40%', 'Boss Damage: +45%', 'Boss Damage: +50%'],"IA":['Item Acquisition Rate: +12%','Item Acquisition Rate: +10%','tem Acquisition Rate: +12%','tem Acquisition Rate: +10%'],"CD":['Critical Damage: +6%', 'Critical Damage: +3%'],"ATT":['ATT: +3%','ATT: +4%','ATT: +6%','ATT: +7%','ATT: +9%','ATT: +10%', 'Attack Power: +3%', 'Attack Power: +4%', 'Attack Power: +6%', 'Attack Power: +7%', 'Attack Power: +9%', 'Attack Power: +10%', 'Attack Power +3%', 'Attack Power +4%', 'Attack Power +6%', 'Attack Power +7%', 'Attack Power +9%', 'Attack Power +10%'],"MATT":['Magic ATT: +6%','Magic ATT: +9%']}
-double_lines_dict = {"IED":['Attacks ignore 30% Monster', 'Attacks ignore 35% Monster', 'Attacks ignore 40% Monster', 'Attacks ignore 45% Monster', 'Attacks ignore 50% Monster'],'Drop':['Increases Item Drop Rate by a'],'MnD':['Increases tem and Meso Drop']}
+
+# Stats in the order of the totals string
+TOTALS_ORDER = (StatKind.STR, StatKind.DEX, StatKind.INT, StatKind.LUK, StatKind.ATT, StatKind.MATT,
+                StatKind.BD, StatKind.CD, StatKind.IED, StatKind.ALL)
 
 # Default configuration - will be overridden by GUI
 default_config = {
@@ -14,6 +19,41 @@ default_config = {
                            # Example: (0.35, 0.45, 0.3, 0.25) = center region
                            # Set to None to use full window
     "cube_type": "Glowing",  # "Glowing" or "Bright"
+    "capture_method": "auto",  # "auto" (mss -> PrintWindow -> BitBlt), "mss", "printwindow" or "bitblt"
+    "ocr_backend": "auto",  # "auto" (persistent tesserocr if installed, else piped tesseract.exe), "tesserocr", "pipe" or "pytesseract"
+    "ocr_server": True,  # Run OCR in the shared OCR server process (engine loaded once for the GUI, bot and tools)
+    "parallel_ocr": {
+        "enabled": False,  # Race the OCR cascade fallbacks on a pool of worker processes
+        "workers": 0,  # Worker processes (0 = CPU count - 1)
+        "top_k": 4  # Fallback candidates sent to the pool at once
+    },
+    "ocr_cascade_budget": 2.0,  # Seconds the OCR cascade may keep trying configs on an unreadable roll before giving up
+    "ocr_confidence": {
+        "min_line_confidence": 60,  # Tesseract confidence (0-100) a line needs; lower lines get the fallback passes
+        "low_confidence_action": "reject"  # Rolls still below it are "unknown": "reject" (reroll, kept out of the
+                                           # cubes-used-up check) or "stop" (stop so the roll can be checked by hand)
+    },
+    "line_segmentation": True,  # OCR each potential line on its own and retry only the lines that fail
+    "line_dictionary": True,  # Remember cleanly read line images on disk and reuse their text instead of OCR
+    "glyph_matcher": {
+        "enabled": True,  # Read lines with the glyph atlas learned from earlier Tesseract reads, Tesseract only as fallback
+        "min_confidence": 0.6  # Lowest per-character confidence (0-1) accepted without Tesseract
+    },
+    "value_recheck": True,  # Re-read only the "+NN%" of a line whose value can't exist for its stat (digits-only OCR)
+    "line_catalog": True,  # Snap the spelling of each read line to the nearest known potential line (the value stays as read)
+    "background_capture": False,  # Grab the ROI continuously on a producer thread instead of once per roll
+    "change_detection": {
+        "enabled": True,  # Wait for the potential panel to change and settle instead of sleeping a fixed time
+        "timeout": 1.5,  # Max seconds to wait after a reset (falls through to the next roll on timeout)
+        "stable_frames": 2,  # Consecutive unchanged frames required after the change
+        "threshold": 2.0,  # Mean absolute difference (gray levels) that counts as a change
+        "poll_interval": 0.01  # Seconds between two frames while waiting
+    },
+    "reset_input": {
+        "closed_loop": True,  # Send one reset + confirm and wait for the panel change (needs change_detection)
+        "max_retries": 3,  # Re-presses per roll when the input is known to be missed (confirm prompt still open)
+        "backoff": 0.05  # Seconds before the first re-press (doubles every retry)
+    },
     "STRcheck": False,
     "DEXcheck": False,
     "INTcheck": False,
@@ -28,12 +68,26 @@ default_config = {
         "stat_types": [],  # List of stat types: ["BD", "ATT", "MATT", "IED", "CD", "IA", "MESO", "SC"]
         "required_count": 2  # Number of matching lines required (1, 2, or 3)
     },
+    "roll_targets_file": None,  # Extra targets in JSON (see roll_rules.py); None = roll_targets.json next to the app
     "ocr_callback": None  # Callback function to update OCR results in GUI
 }
 
 # Global config - will be set by GUI
 config = default_config.copy()
 
+
+def merge_config(base, overrides):
+    """
+    Config with `overrides` on top of `base`. Nested sections (change_detection, reset_input, ...)
+    are merged key by key, so a config that sets only some keys (the GUI's) keeps the defaults of the rest.
+    """
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            value = merge_config(merged[key], value)
+        merged[key] = value
+    return merged
+
 # Global stop event for immediate bot stopping
 bot_stop_event = threading.Event()
 
@@ -43,7 +97,12 @@ class potential:
     line2=None
     line3=None
     stop_bot = False
-    last_three_rolls = []  # Track last 3 roll results to detect when cubes are used up
+    last_three_rolls = []  # Track last 5 Rolls to detect when cubes are used up
+    roll = None  # Roll of the current lines (stat vector, flags, confidence, timings - see roll.py)
+    roll_rules = None  # Targets of the session compiled into one predicate (see roll_rules.py)
+    last_read = None  # Structured OCR result of the current roll (per-line text/confidence/source, see image_finder)
+    roll_unknown = False  # True if some line of the current roll stayed below the OCR confidence threshold
+    reset_driver = None  # ResetInputDriver of the running session (per-roll retry counts and input->change latency)
     
     def _send_ocr_result(self, text):
         """Send OCR result to GUI callback if available"""
@@ -61,11 +120,21 @@ class potential:
         test_image_path = config.get("test_image_path", None)
         auto_detect_crop = config.get("auto_detect_crop", False)
         cube_type = config.get("cube_type", "Glowing")
-        lines = process_lines(window_name, debug=False, crop_region=crop_region, test_image_path=test_image_path, auto_detect_crop=auto_detect_crop, cube_type=cube_type)
+        capture_method = config.get("capture_method", "auto")
+        read_at = time.monotonic()
+        lines = process_lines(window_name, debug=False, crop_region=crop_region, test_image_path=test_image_path, auto_detect_crop=auto_detect_crop, cube_type=cube_type, capture_method=capture_method)
         # Be defensive: process_lines() should return a 3-tuple, but guard anyway.
         self.line1 = lines[0] if isinstance(lines, (list, tuple)) and len(lines) > 0 else "Trash"
         self.line2 = lines[1] if isinstance(lines, (list, tuple)) and len(lines) > 1 else "Trash"
         self.line3 = lines[2] if isinstance(lines, (list, tuple)) and len(lines) > 2 else "Trash"
+        
+        # Per-line confidences of the read (only measured on the line-by-line OCR path)
+        pot = get_current_potlines()
+        self.last_read = pot.last_read if pot is not None else None
+        self.roll_unknown = bool(self.last_read and self.last_read["low_confidence_lines"])
+        self.roll = Roll((self.line1, self.line2, self.line3), unknown=self.roll_unknown,
+                         confidence=self.last_read["confidence"] if self.last_read else None,
+                         ocr_time=time.monotonic() - read_at, read_at=read_at)
 
         # If OCR completely failed, stop immediately and surface the underlying error if available.
         if self.line1 == "Trash" and self.line2 == "Trash":
@@ -91,47 +160,19 @@ class potential:
             self.stop_bot = True
             bot_stop_event.set()
     
+    def get_roll(self):
+        """Roll of the current lines (rebuilt without OCR details if the lines were set directly)"""
+        lines = (self.line1, self.line2, self.line3)
+        if self.roll is None or self.roll.lines != lines:
+            self.roll = Roll(lines, unknown=self.roll_unknown)
+        return self.roll
+    
     def get_stat_values(self):
         """
         Extract stat values from all lines (up to 3) and return a dictionary.
         ALL stats are added to STR, DEX, INT, and LUK as per reference logic.
         """
-        stats = {"STR": 0, "DEX": 0, "INT": 0, "LUK": 0, "ALL": 0, "ATT": 0, "MATT": 0, "BD": 0, "CD": 0, "IED": 0}
-        
-        # Get stats from all lines
-        lines_to_process = [self.line1, self.line2]
-        if self.line3 and self.line3 != "Trash":
-            lines_to_process.append(self.line3)
-        
-        for line in lines_to_process:
-            if line and line != "Trash":
-                # Extract all stats from the line (handles comma-separated stats)
-                line_stats = get_all_stats_from_line(line)
-                for stat_type, stat_value in line_stats:
-                    if stat_type == "ALL":
-                        stats["ALL"] += stat_value
-                    elif stat_type == "ATT":
-                        stats["ATT"] += stat_value
-                    elif stat_type == "MATT":
-                        stats["MATT"] += stat_value
-                    elif stat_type == "BD":
-                        stats["BD"] += stat_value
-                    elif stat_type == "CD":
-                        stats["CD"] += stat_value
-                    elif stat_type == "IED":
-                        stats["IED"] += stat_value
-                    else:
-                        stats[stat_type] += stat_value
-        
-        # Apply ALL stats to all four main stats (as per reference logic)
-        all_value = stats["ALL"]
-        if all_value > 0:
-            stats["STR"] += all_value
-            stats["DEX"] += all_value
-            stats["INT"] += all_value
-            stats["LUK"] += all_value
-        
-        return stats
+        return self.get_roll().stats_dict()
     
     def _normalize_lines_for_comparison(self):
         """
@@ -173,7 +214,8 @@ class potential:
             
             return line
         
-        return (normalize(self.line1), normalize(self.line2), normalize(self.line3))
+        return tuple(parse_line(line).check("comparison", normalize) if line else "Trash"
+                     for line in (self.line1, self.line2, self.line3))
     
     def _is_garbage_ocr(self, line):
         """
@@ -240,85 +282,37 @@ class potential:
         
         return False
     
-    def _has_valid_stats_in_roll(self, stats, original_lines):
+    def _has_valid_stats_in_roll(self, roll):
         """
         Check if a roll has valid stats (not garbage OCR).
         Returns True if at least one valid stat is extracted.
         
-        A roll is considered valid if it extracts at least one stat (sum > 0).
         Garbage lines (like chance text, standalone Damage) don't extract stats, so they're automatically filtered.
-        
-        Args:
-            stats: Dictionary of stat values
-            original_lines: Tuple of (line1, line2, line3) original lines (not normalized) - kept for compatibility
         """
-        # Check if stats are extracted (at least one non-zero stat)
-        # If we have stats extracted, at least one line must be valid
-        # Garbage lines (like "6%chancetoignare20%damagewhenattacked") don't extract any stats
-        has_stats = sum(stats.values()) > 0
-        
-        return has_stats
+        return roll.has_stats
     
     def get_total_stats_string(self):
         """
         Format the total stats as a string for display.
         Returns a string like "STR: 9, DEX: 9, ATT: 6, MATT: 9, BD: 40, IED: 35" or empty string if no stats.
         """
-        stats = self.get_stat_values()
-        stat_parts = []
-        
-        # Add main stats (STR, DEX, INT, LUK, ATT, MATT) if they have values
-        for stat_type in ["STR", "DEX", "INT", "LUK", "ATT", "MATT"]:
-            if stats.get(stat_type, 0) > 0:
-                stat_parts.append(f"{stat_type}: {stats[stat_type]}")
-        
-        # Add BD (Boss Damage) if it exists
-        if stats.get("BD", 0) > 0:
-            stat_parts.append(f"BD: {stats['BD']}")
-        
-        # Add CD (Critical Damage) if it exists
-        if stats.get("CD", 0) > 0:
-            stat_parts.append(f"CD: {stats['CD']}")
-        
-        # Add IED (Ignore Defense) if it exists
-        if stats.get("IED", 0) > 0:
-            stat_parts.append(f"IED: {stats['IED']}")
-        
-        # Add ALL stat separately if it exists
-        if stats.get("ALL", 0) > 0:
-            stat_parts.append(f"ALL: {stats['ALL']}")
-        
-        if stat_parts:
-            return ", ".join(stat_parts)
-        return ""
+        stats = self.get_roll().stats
+        # Main stats (STR, DEX, INT, LUK, ATT, MATT), then BD, CD, IED, and the ALL stat separately
+        stat_parts = [f"{kind.name}: {stats[kind]}" for kind in TOTALS_ORDER if stats[kind] > 0]
+        return ", ".join(stat_parts)
     
     def get_highest_stat(self):
         """
         Calculate the highest stat value, considering only enabled stat checks.
         Returns the maximum stat value among checked stats.
         """
-        stats = self.get_stat_values()
-        statcalc = {}
-        
-        if config["STRcheck"]:
-            statcalc['STR'] = stats['STR']
-        if config["DEXcheck"]:
-            statcalc['DEX'] = stats['DEX']
-        if config["INTcheck"]:
-            statcalc['INT'] = stats['INT']
-        if config["LUKcheck"]:
-            statcalc['LUK'] = stats['LUK']
-        if config["ALLcheck"]:
-            statcalc['ALL'] = stats['ALL']
-        if config["ATTcheck"]:
-            statcalc['ATT'] = stats['ATT']
-        if config["MATTcheck"]:
-            statcalc['MATT'] = stats['MATT']
-        
-        if not statcalc:
+        stats = self.get_roll().stats
+        checked = [stats[kind] for kind in CHECKABLE_STATS if config[f"{kind.name}check"]]
+        
+        if not checked:
             return 0
         
-        return max(statcalc.values())
+        return max(checked)
     
     def check_roll_stat_threshold(self):
         """
@@ -331,7 +325,6 @@ class potential:
         highest_stat = self.get_highest_stat()
         if highest_stat >= config["statThreshold"]:
             self.stop_bot = True
-            stats = self.get_stat_values()
             # Format output with 3 lines and total stats
             lines_str = f"{self.line1}, {self.line2}"
             if self.line3 and self.line3 != "Trash":
@@ -365,7 +358,7 @@ class potential:
             return False
 
     def check_roll_2L_CD_6(self):
-        if self.line1 == single_lines_dict['CD'][0] and self.line2 == single_lines_dict['CD'][0]:
+        if self.line1 == 'Critical Damage: +6%' and self.line2 == 'Critical Damage: +6%':
             self.stop_bot = True
             lines_str = f"{self.line1}, {self.line2}"
             if self.line3 and self.line3 != "Trash":
@@ -390,10 +383,9 @@ class potential:
         # Check each line for ATT (handles comma-separated stats)
         for line in lines_to_check:
             if line and line != "Trash":
-                # Split by comma to handle multiple stats in one line
-                parts = [part.strip() for part in line.split(',')]
-                for part in parts:
-                    if self._has_attack_power(part):
+                # Comma parts handle multiple stats in one line
+                for part in parse_line(line).parts:
+                    if part.check("ATT", self._has_attack_power):
                         att_count += 1
                         if att_count >= 2:
                             # Found 2 ATT instances, stop bot
@@ -599,26 +591,22 @@ class potential:
         #  sec or s (OCR sometimes outputs "2s")
         return bool(re.search(r'sk[il][il][il]coo[il]d[oa]wns?-?([12])(sec|s)', norm))
     
+    def _stat_detectors(self):
+        """Line type -> check of a line's text, for the parsed-line checks and the roll rules"""
+        return {"BD": self._has_boss_damage, "ATT": self._has_attack_power, "MATT": self._has_magic_att,
+                "IED": self._has_ignore_defense, "CD": self._has_crit_damage, "IA": self._has_item_drop_rate,
+                "MESO": self._has_meso_obtained, "SC": self._has_skill_cooldowns}
+    
     def _line_matches_stat_type(self, line, stat_type):
         """Check if a line matches a given stat type"""
-        stat_type_upper = stat_type.upper()
-        if stat_type_upper == "BD" or stat_type_upper == "BOSS DAMAGE":
-            return self._has_boss_damage(line)
-        elif stat_type_upper == "ATT" or stat_type_upper == "ATTACK POWER":
-            return self._has_attack_power(line)
-        elif stat_type_upper == "MATT" or stat_type_upper == "MAGIC ATT":
-            return self._has_magic_att(line)
-        elif stat_type_upper == "IED" or stat_type_upper == "IGNORE DEFENSE":
-            return self._has_ignore_defense(line)
-        elif stat_type_upper == "CD" or stat_type_upper == "CRIT DAMAGE" or stat_type_upper == "CRITICAL DAMAGE":
-            return self._has_crit_damage(line)
-        elif stat_type_upper == "IA" or stat_type_upper == "ITEM DROP RATE" or stat_type_upper == "DROP RATE":
-            return self._has_item_drop_rate(line)
-        elif stat_type_upper == "MESO" or stat_type_upper == "MESO OBTAINED":
-            return self._has_meso_obtained(line)
-        elif stat_type_upper == "SC" or stat_type_upper == "SKILL COOLDOWNS":
-            return self._has_skill_cooldowns(line)
-        return False
+        return self._parsed_matches_stat_type(parse_line(line), stat_type)
+    
+    def _parsed_matches_stat_type(self, parsed, stat_type):
+        """Check if a parsed line (see line_parse) matches a given stat type - each check runs once per line"""
+        line_type = canonical_line_type(stat_type)
+        if line_type is None:
+            return False
+        return parsed.check(line_type, self._stat_detectors()[line_type])
     
     def check_roll_flexible(self, stat_types, required_count):
         """
@@ -645,15 +633,14 @@ class potential:
         # Handle comma-separated stats in a single line
         for line in lines_to_check:
             if line and line != "Trash":
-                # Split by comma to handle multiple stats in one line
-                parts = [part.strip() for part in line.split(',')]
-                for part in parts:
+                # Comma parts handle multiple stats in one line
+                for part in parse_line(line).parts:
                     for stat_type in stat_types:
-                        if self._line_matches_stat_type(part, stat_type):
+                        if self._parsed_matches_stat_type(part, stat_type):
                             matching_count += 1
-                            matched_lines.append((part, stat_type))
+                            matched_lines.append((part.text, stat_type))
                             # Debug: log what matched (can be removed later)
-                            print(f"[DEBUG] Stat matched {stat_type}: {repr(part)}")
+                            print(f"[DEBUG] Stat matched {stat_type}: {repr(part.text)}")
                             break  # Count each stat only once
                     if matching_count >= required_count:
                         break  # Stop if we have enough matches
@@ -675,6 +662,31 @@ class potential:
         
         return False
     
+    def compile_roll_rules(self):
+        """Compile the targets of the current config (GUI checks + roll_targets.json) into the session predicate"""
+        self.roll_rules = compile_roll_rules(config, self._stat_detectors())
+        return self.roll_rules
+    
+    def check_roll_rules(self):
+        """
+        Run the session predicate over the current roll (compiled on first use).
+        
+        Returns:
+            The matched rule (bot stops), or None
+        """
+        if self.roll_rules is None:
+            self.compile_roll_rules()
+        roll = self.get_roll()
+        rule = self.roll_rules(roll)
+        if rule is not None:
+            self.stop_bot = True
+            lines_str = f"{self.line1}, {self.line2}"
+            if self.line3 and self.line3 != "Trash":
+                lines_str += f", {self.line3}"
+            total_stats = self.get_total_stats_string()
+            self._send_ocr_result(f"{lines_str}    PASS ({rule.summary(roll, total_stats)})")
+        return rule
+    
     def check_roll_BD_ATT_IED(self):
         """
         Check if all 3 lines contain Boss Damage, Attack Power (or MATK), and Ignore Defense
@@ -691,11 +703,12 @@ class potential:
         # Check each line for the three stat types
         for line in lines_to_check:
             if line and line != "Trash":
-                if self._has_boss_damage(line):
+                parsed = parse_line(line)
+                if parsed.check("BD", self._has_boss_damage):
                     has_bd = True
-                if self._has_attack_power(line):
+                if parsed.check("ATT", self._has_attack_power):
                     has_att = True
-                if self._has_ignore_defense(line):
+                if parsed.check("IED", self._has_ignore_defense):
                     has_ied = True
         
         # All three must be present
@@ -760,30 +773,29 @@ class potential:
         from src.translate_ocr_results import clear_potlines_cache
         clear_potlines_cache()
         
+        # Pick the OCR backend before the first read (keeps the loaded engine if unchanged)
+        from src.ocr_engine import set_ocr_backend
+        try:
+            set_ocr_backend(config.get("ocr_backend", "auto"), server=config.get("ocr_server", True))
+        except Exception as e:
+            print(f"Could not start OCR backend '{config.get('ocr_backend')}': {e} - using pytesseract")
+            set_ocr_backend("pytesseract")
+        
         # Check if current potential already satisfies threshold before starting
         self._send_ocr_result("Checking initial potential...")
         # No delay needed - get_lines() will take a fresh screenshot
         self.get_lines()  # Take a fresh screenshot and get current lines
         
-        # Check if threshold is already met
-        if config["stopAtStatThreshold"]:
-            if self.check_roll_stat_threshold():
-                self._send_ocr_result("Initial potential already meets threshold! Stopping bot.")
-                return
-        
-        # Check all other conditions
-        checks_passed = False
+        # Threshold, flexible check and roll_targets.json compiled once for the whole session
+        self.compile_roll_rules()
         
-        # Flexible roll check
-        if config.get("flexible_roll_check", {}).get("enabled", False):
-            flex_config = config["flexible_roll_check"]
-            stat_types = flex_config.get("stat_types", [])
-            required_count = flex_config.get("required_count", 2)
-            if self.check_roll_flexible(stat_types, required_count):
-                checks_passed = True
-        
-        if checks_passed or self.stop_bot:
-            print("Initial potential already satisfies conditions! Stopping bot.")
+        # Check if the current potential already meets a target
+        rule = self.check_roll_rules()
+        if rule is not None:
+            if isinstance(rule, ThresholdRule):
+                self._send_ocr_result("Initial potential already meets threshold! Stopping bot.")
+            else:
+                print("Initial potential already satisfies conditions! Stopping bot.")
             return
         
         print("Initial potential does not meet requirements. Starting bot loop...")
@@ -794,6 +806,66 @@ class potential:
         window_name = config.get("window_name", "Maplestory")
         auto_detect_crop = config.get("auto_detect_crop", False)
         
+        # Optional parallel OCR: start (or reuse) the warm worker pool before the first roll
+        parallel_config = config.get("parallel_ocr", {})
+        pot = get_current_potlines()
+        if pot is not None:
+            if parallel_config.get("enabled", False):
+                try:
+                    pot.enable_parallel_ocr(workers=parallel_config.get("workers") or None,
+                                            top_k=parallel_config.get("top_k", 4),
+                                            backend=config.get("ocr_backend", "auto"))
+                except Exception as e:
+                    print(f"Could not start parallel OCR: {e}")
+                    pot.disable_parallel_ocr()
+            else:
+                pot.disable_parallel_ocr()
+            pot.line_segmentation = config.get("line_segmentation", True)
+            pot.cascade_budget = config.get("ocr_cascade_budget", 2.0)
+            pot.min_line_confidence = config.get("ocr_confidence", {}).get("min_line_confidence", 60)
+            pot.use_line_dictionary = config.get("line_dictionary", True)
+            glyph_config = config.get("glyph_matcher", {})
+            pot.glyph_matching = glyph_config.get("enabled", True)
+            pot.glyph_min_confidence = glyph_config.get("min_confidence", 0.6)
+            pot.value_recheck = config.get("value_recheck", True)
+            pot.snap_to_catalog = config.get("line_catalog", True)
+        
+        change_config = config.get("change_detection", {})
+        change_driven = change_config.get("enabled", True)
+        reset_config = config.get("reset_input", {})
+        reset_driver = None
+        if change_driven and reset_config.get("closed_loop", True):
+            def verify_reset(timeout, stop_event):
+                pot = get_current_potlines()
+                if pot is None:
+                    return None
+                return pot.wait_for_panel_change(
+                    timeout=timeout,
+                    stable_frames=change_config.get("stable_frames", 2),
+                    threshold=change_config.get("threshold", 2.0),
+                    poll_interval=change_config.get("poll_interval", 0.01),
+                    stop_event=stop_event,
+                )
+            reset_driver = ResetInputDriver(
+                verify=verify_reset,
+                max_retries=reset_config.get("max_retries", 3),
+                change_timeout=change_config.get("timeout", 1.5),
+                backoff=reset_config.get("backoff", 0.05),
+            )
+        self.reset_driver = reset_driver
+        
+        # Optional producer thread: the crop region is known after the initial check above,
+        # so from here on every roll reads the newest buffered ROI frame
+        capture = None
+        if config.get("background_capture", False):
+            try:
+                capture = get_current_potlines()
+                if not capture.start_background_capture():
+                    capture = None
+            except Exception as e:
+                print(f"Could not start background capture: {e}")
+                capture = None
+        
         while self.stop_bot == False and keyboard.is_pressed('q') == False and not bot_stop_event.is_set():
             # Check stop event before each action
             if bot_stop_event.is_set():
@@ -804,62 +876,34 @@ class potential:
             # This ensures we don't skip a good potential by resetting too early
             self.get_lines()
             
-            # Check if cubes are used up (same stats 3 times in a row)
+            # Check if cubes are used up (same stats 5 times in a row)
             # Compare based on extracted stats, not raw text, to handle OCR variations
-            current_stats = self.get_stat_values()
-            # Store original lines for garbage detection, and normalized lines for comparison
-            original_lines = (self.line1, self.line2, self.line3)
-            normalized_lines = self._normalize_lines_for_comparison()
-            current_roll = (original_lines, normalized_lines, current_stats)
+            current_roll = self.get_roll()
             
-            self.last_three_rolls.append(current_roll)
+            # Unknown (low-confidence) rolls don't count towards "same stats 5 times in a row"
+            if not current_roll.unknown:
+                self.last_three_rolls.append(current_roll)
             if len(self.last_three_rolls) > 5:
                 self.last_three_rolls.pop(0)  # Keep only last 5
             
             # If we have 5 rolls and they're all the same, cubes are used up
-            # Compare based on extracted stats, not raw text, to handle OCR variations
+            # Equal stat vectors mean all five rolls have valid stats (not garbage OCR) if the first one has
             if len(self.last_three_rolls) == 5:
-                roll1_orig, roll1_norm, roll1_stats = self.last_three_rolls[0]
-                roll2_orig, roll2_norm, roll2_stats = self.last_three_rolls[1]
-                roll3_orig, roll3_norm, roll3_stats = self.last_three_rolls[2]
-                roll4_orig, roll4_norm, roll4_stats = self.last_three_rolls[3]
-                roll5_orig, roll5_norm, roll5_stats = self.last_three_rolls[4]
-                
-                # Check if all five rolls have valid stats (not garbage OCR)
-                roll1_valid = self._has_valid_stats_in_roll(roll1_stats, roll1_orig)
-                roll2_valid = self._has_valid_stats_in_roll(roll2_stats, roll2_orig)
-                roll3_valid = self._has_valid_stats_in_roll(roll3_stats, roll3_orig)
-                roll4_valid = self._has_valid_stats_in_roll(roll4_stats, roll4_orig)
-                roll5_valid = self._has_valid_stats_in_roll(roll5_stats, roll5_orig)
-                
-                all_rolls_valid = roll1_valid and roll2_valid and roll3_valid and roll4_valid and roll5_valid
-                
-                # Only check for same stats if all three rolls have valid stats (not garbage)
-                if all_rolls_valid:
-                    # Check if stats are the same (primary check - most reliable)
-                    stats_match = (roll1_stats == roll2_stats == roll3_stats == roll4_stats == roll5_stats)
-                    
-                    if stats_match:
-                        # Same valid stats 5 times in a row - cubes are used up
-                        self.stop_bot = True
-                        lines_str = f"{self.line1}, {self.line2}"
-                        if self.line3 and self.line3 != "Trash":
-                            lines_str += f", {self.line3}"
-                        result_text = f"{lines_str}    STOP (Cubes used up - same stats 5 times in a row)"
-                        self._send_ocr_result(result_text)
-                        print("Cubes used up - same stats detected 5 times in a row. Stopping bot.")
-                        return
+                first_roll = self.last_three_rolls[0]
+                if self._has_valid_stats_in_roll(first_roll) and \
+                        all(roll.same_stats(first_roll) for roll in self.last_three_rolls[1:]):
+                    # Same valid stats 5 times in a row - cubes are used up
+                    self.stop_bot = True
+                    lines_str = f"{self.line1}, {self.line2}"
+                    if self.line3 and self.line3 != "Trash":
+                        lines_str += f", {self.line3}"
+                    result_text = f"{lines_str}    STOP (Cubes used up - same stats 5 times in a row)"
+                    self._send_ocr_result(result_text)
+                    print("Cubes used up - same stats detected 5 times in a row. Stopping bot.")
+                    return
             
-            # Stat threshold checking (if enabled)
-            if config["stopAtStatThreshold"]:
-                self.check_roll_stat_threshold()
-            
-            # Flexible roll check
-            if config.get("flexible_roll_check", {}).get("enabled", False):
-                flex_config = config["flexible_roll_check"]
-                stat_types = flex_config.get("stat_types", [])
-                required_count = flex_config.get("required_count", 2)
-                self.check_roll_flexible(stat_types, required_count)
+            # Stat threshold, flexible roll check and JSON targets - one pass of the compiled predicate
+            self.check_roll_rules()
             
             # Check if we should stop (potential passed)
             if self.stop_bot:
@@ -871,7 +915,16 @@ class potential:
             if self.line3 and self.line3 != "Trash":
                 lines_str += f", {self.line3}"
             total_stats = self.get_total_stats_string()
-            result_text = f"{lines_str}    REJECT (Stats: {total_stats})"
+            if self.roll_unknown:
+                # The rules couldn't be trusted on this roll - some line was read with low confidence
+                low_lines = ", ".join(str(i + 1) for i in self.last_read["low_confidence_lines"])
+                if config.get("ocr_confidence", {}).get("low_confidence_action", "reject") == "stop":
+                    self.stop_bot = True
+                    self._send_ocr_result(f"{lines_str}    STOP (Unknown - low OCR confidence on line {low_lines}, check the roll)")
+                    return
+                result_text = f"{lines_str}    UNKNOWN (low OCR confidence on line {low_lines}, Stats: {total_stats})"
+            else:
+                result_text = f"{lines_str}    REJECT (Stats: {total_stats})"
             self._send_ocr_result(result_text)
             
             # Check stop event before resetting
@@ -880,13 +933,45 @@ class potential:
                 break
             
             # NOW reset to get a new potential for the next iteration
-            press_reset_spacebar()
+            if reset_driver is not None:
+                if capture is not None:
+                    # Next roll must read a frame captured after the reset input
+                    # (moved forward to the settled frame once the change is confirmed)
+                    capture.require_frame_after(time.monotonic())
+                # Closed loop: minimum key sequence, verified by the panel change (retries only when it didn't change).
+                # The driver also does the waiting, so go straight to the next roll.
+                reset_stats = reset_driver.reset(stop_event=bot_stop_event)
+                if reset_stats["retries"] or not reset_stats["changed"]:
+                    print(f"Reset needed {reset_stats['retries']} retries (changed={reset_stats['changed']}, "
+                          f"{reset_stats['presses']} presses, {reset_stats['elapsed']:.2f}s)")
+                continue
+            
+            # (with change detection the panel redraw is awaited below instead of sleeping)
+            press_reset_spacebar(settle_delay=0 if change_driven else 0.5)
+            if capture is not None:
+                # Next roll must read a frame captured after the reset input
+                capture.require_frame_after(time.monotonic())
             
             # Check immediately after reset
             if bot_stop_event.is_set():
                 self._send_ocr_result("Bot stopped by user")
                 break
             
+            if change_driven:
+                # Return as soon as the panel shows the new potential and has stopped animating
+                pot = get_current_potlines()
+                change = None if pot is None else pot.wait_for_panel_change(
+                    timeout=change_config.get("timeout", 1.5),
+                    stable_frames=change_config.get("stable_frames", 2),
+                    threshold=change_config.get("threshold", 2.0),
+                    poll_interval=change_config.get("poll_interval", 0.01),
+                    stop_event=bot_stop_event,
+                )
+                if change is not None:
+                    if not change["stable"]:
+                        print(f"Panel did not settle within {change['elapsed']:.2f}s (changed={change['changed']})")
+                    continue
+            
             # Wait for potential window to update after reset
             # Use shorter sleep intervals for more responsive stopping
             for _ in range(5):  # Break 0.5 seconds into 5 checks of 0.1 seconds
@@ -908,10 +993,8 @@ class potential:
 def run_bot(bot_config=None):
     """Run the bot with the given configuration"""
     global config
-    if bot_config:
-        config = bot_config.copy()
-    else:
-        config = default_config.copy()
+    # The GUI only sends the settings it has controls for - everything else keeps its default
+    config = merge_config(default_config, bot_config or {})
     
     # Reset stop event when starting
     bot_stop_event.clear()
@@ -0,0 +1,132 @@
+"""
+Wait-for-change primitive for the potential panel.
+
+After a reset input the panel animates and then shows the new potential. Instead of sleeping a
+fixed time, the roll loop watches the ROI: every frame is reduced to a small grayscale signature
+and compared with mean absolute difference (MAD). The wait returns once the panel has moved away
+from the previous roll (the redraw) AND has then stayed the same for N consecutive frames, so OCR
+never reads a frame that is mid-animation - or when the timeout expires. The settled panel may
+match the previous roll again: a reroll can draw the same potential, and that must not cost the
+whole timeout.
+"""
+import time
+import cv2 as cv
+
+# Signature size (width, height). Small enough to compare in microseconds, large enough
+# that a changed digit still moves the MAD well above capture noise.
+SIGNATURE_SIZE = (64, 24)
+
+# Default settings - overridden by config["change_detection"] in bot_logic
+DEFAULT_TIMEOUT = 1.5  # Seconds to wait for the panel to change and settle
+DEFAULT_STABLE_FRAMES = 2  # Consecutive unchanged frames required after the change
+DEFAULT_THRESHOLD = 2.0  # MAD (gray levels, 0-255) above which two signatures count as different
+DEFAULT_POLL_INTERVAL = 0.01  # Seconds between two grabs
+
+
+def roi_signature(image, size=SIGNATURE_SIZE):
+    """
+    Reduce an ROI to a small grayscale signature for change detection.
+
+    Args:
+        image: BGR or grayscale ROI
+        size: (width, height) of the signature
+
+    Returns:
+        uint8 array of shape (height, width)
+    """
+    if image.ndim == 3:
+        image = cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+    # INTER_AREA averages the pixels under each signature cell, which also smooths capture noise
+    return cv.resize(image, size, interpolation=cv.INTER_AREA)
+
+
+def frame_difference(a, b):
+    """Mean absolute difference between two signatures (inf if they can't be compared)"""
+    if a is None or b is None or a.shape != b.shape:
+        return float('inf')
+    return float(cv.absdiff(a, b).mean())
+
+
+def wait_for_change(grab, reference, timeout=DEFAULT_TIMEOUT, stable_frames=DEFAULT_STABLE_FRAMES,
+                    threshold=DEFAULT_THRESHOLD, poll_interval=DEFAULT_POLL_INTERVAL, stop_event=None):
+    """
+    Poll frames until the panel has changed from `reference` and then stayed the same (settling
+    back on the reference counts too - a reroll that drew the same potential).
+
+    Args:
+        grab: Callable returning (image, timestamp) for the next frame, or (None, None) if no frame
+              is available yet
+        reference: Signature of the panel before the input (see roi_signature())
+        timeout: Maximum seconds to wait
+        stable_frames: Number of consecutive frames that must match the previous one after the change
+        threshold: MAD above which two signatures are considered different
+        poll_interval: Seconds to sleep between grabs (0 = grab as fast as possible)
+        stop_event: Optional threading.Event that aborts the wait
+
+    Returns:
+        Dict with:
+            'changed': True if the panel changed from the reference (the redraw was seen)
+            'stable': True if it then settled for stable_frames frames
+            'same': True if it settled showing the reference again (same potential as before)
+            'elapsed': Seconds spent waiting
+            'frames': Number of frames inspected
+            'change_latency': Seconds from the start of the wait until the first changed frame (or None)
+            'image': The last frame grabbed (the settled frame when 'stable' is True)
+            'timestamp': Timestamp of that frame
+            'stable_since': Timestamp of the first frame of the final stable run (or None)
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    result = {
+        "changed": False,
+        "stable": False,
+        "same": False,
+        "elapsed": 0.0,
+        "frames": 0,
+        "change_latency": None,
+        "image": None,
+        "timestamp": None,
+        "stable_since": None,
+    }
+    previous = None
+    unchanged_run = 0
+
+    while True:
+        if stop_event is not None and stop_event.is_set():
+            break
+        image, timestamp = grab()
+        if image is not None:
+            result["frames"] += 1
+            result["image"] = image
+            result["timestamp"] = timestamp
+            signature = roi_signature(image)
+            differs = frame_difference(signature, reference) > threshold
+
+            if differs and not result["changed"]:
+                result["changed"] = True
+                result["change_latency"] = time.monotonic() - start
+            if result["changed"]:
+                # Count how long the redrawn panel has stayed put - new potential or the same one again
+                if previous is not None and frame_difference(signature, previous) <= threshold:
+                    unchanged_run += 1
+                else:
+                    unchanged_run = 0
+                    result["stable_since"] = timestamp
+                if unchanged_run >= stable_frames:
+                    result["stable"] = True
+                    result["same"] = not differs
+                    break
+            previous = signature
+
+        if time.monotonic() >= deadline:
+            break
+        if poll_interval > 0:
+            if stop_event is not None:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+
+    if not result["stable"]:
+        result["stable_since"] = None
+    result["elapsed"] = time.monotonic() - start
+    return result
@@ -29,4 +29,11 @@ STAT_HEIGHT = 107
 BRIGHT_OFFSET_X = 107
 BRIGHT_OFFSET_ABOVE = 232
 BRIGHT_STAT_WIDTH = 212
-BRIGHT_STAT_HEIGHT = 108
\ No newline at end of file
+BRIGHT_STAT_HEIGHT = 108
+# Fixed line layout inside the crop region (fallback when line segmentation can't find the rows)
+# Top of each of the 3 potential lines and the line height, in pixels of a STAT_HEIGHT-tall crop.
+# Scaled to the actual crop height at runtime.
+LINE_OFFSETS_Y = (0, 36, 72)
+LINE_HEIGHT = 35
+BRIGHT_LINE_OFFSETS_Y = (0, 36, 72)
+BRIGHT_LINE_HEIGHT = 36
@@ -0,0 +1,38 @@
+"""
+Where the bot keeps the data it learns while running: the OCR strategy profile, the glyph atlas
+and the line dictionary.
+
+They all live in one data folder next to the executable (frozen builds) or in the project root
+(dev runs). Files older versions wrote straight into that base folder are moved in on first use.
+"""
+import os
+import sys
+
+DATA_DIRNAME = "data"
+
+
+def get_base_dir():
+    """Folder of the executable (frozen builds) or the project root (dev runs)"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_data_dir():
+    """The runtime data folder (created if missing)"""
+    path = os.path.join(get_base_dir(), DATA_DIRNAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_data_path(filename):
+    """Path of a runtime data file, moving a copy left in the base folder by an older version"""
+    path = os.path.join(get_data_dir(), filename)
+    legacy_path = os.path.join(get_base_dir(), filename)
+    if not os.path.exists(path) and os.path.isfile(legacy_path):
+        try:
+            os.replace(legacy_path, path)
+        except OSError as e:
+            print(f"Could not move {legacy_path} to {path}: {e}")
+            return legacy_path
+    return path
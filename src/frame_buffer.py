@@ -0,0 +1,210 @@
+"""
+Background capture: a producer thread that keeps grabbing the ROI into a ring buffer.
+
+The ring buffer holds a fixed number of preallocated numpy arrays. Every stored frame is tagged
+with a sequence number, a time.monotonic() timestamp and a content hash. The roll loop asks for
+"the newest frame captured after time T" instead of doing a blocking capture, and gets back a
+read-only view into the buffer (no copy). While a reader holds a frame, its slot is pinned and
+the producer writes around it.
+"""
+import threading
+import time
+import zlib
+import numpy as np
+
+DEFAULT_FRAME_INTERVAL = 1 / 60  # Seconds between two background grabs (the game renders at most 60 fps)
+
+
+class FrameRef:
+    """
+    A pinned, read-only view of one buffered frame.
+
+    Use as a context manager (or call release()) so the producer can reuse the slot afterwards.
+    """
+    __slots__ = ('buffer', 'slot', 'image', 'seq', 'timestamp', 'content_hash', '_released')
+
+    def __init__(self, buffer, slot, image, seq, timestamp, content_hash):
+        self.buffer = buffer
+        self.slot = slot
+        self.image = image
+        self.seq = seq
+        self.timestamp = timestamp
+        self.content_hash = content_hash
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.buffer._unpin(self.slot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class FrameRingBuffer:
+    """Fixed-size ring of preallocated frames written by one producer, read by any number of consumers"""
+
+    def __init__(self, capacity, shape, dtype=np.uint8):
+        """
+        Args:
+            capacity: Number of slots (at least 3: one being written, one newest, one pinned by a reader)
+            shape: Frame shape, e.g. (107, 284) for a grayscale Glowing-cube ROI
+            dtype: Frame dtype
+        """
+        if capacity < 3:
+            raise Exception(f"Frame ring buffer needs at least 3 slots, got {capacity}")
+        self.capacity = capacity
+        self.frames = [np.empty(shape, dtype=dtype) for _ in range(capacity)]
+        self.seqs = [0] * capacity  # 0 = empty or being written
+        self.timestamps = [0.0] * capacity
+        self.hashes = [0] * capacity
+        self.pins = [0] * capacity
+        self._cond = threading.Condition()
+        self._next_seq = 1
+        self._write_slot = 0
+        self._newest_slot = -1
+        self.frames_written = 0
+        self.frames_skipped = 0  # Writes dropped because every slot was pinned
+
+    def _pick_write_slot(self):
+        """Next slot that is neither pinned nor the newest published frame (call with the lock held)"""
+        for offset in range(self.capacity):
+            slot = (self._write_slot + offset) % self.capacity
+            if self.pins[slot] == 0 and slot != self._newest_slot:
+                self._write_slot = (slot + 1) % self.capacity
+                return slot
+        return None
+
+    def write(self, image, timestamp=None):
+        """
+        Copy image into the next free slot and publish it.
+
+        Returns:
+            The frame's sequence number, or None if every slot was pinned by readers.
+        """
+        with self._cond:
+            slot = self._pick_write_slot()
+            if slot is None:
+                self.frames_skipped += 1
+                return None
+            # Unpublish the slot while it is being overwritten so readers can't pin it
+            self.seqs[slot] = 0
+
+        target = self.frames[slot]
+        if target.shape != image.shape or target.dtype != image.dtype:
+            # ROI size changed (window resized) - reallocate just this slot
+            target = np.empty(image.shape, dtype=image.dtype)
+            self.frames[slot] = target
+        np.copyto(target, image)
+        content_hash = zlib.crc32(target)
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        with self._cond:
+            seq = self._next_seq
+            self._next_seq += 1
+            self.seqs[slot] = seq
+            self.timestamps[slot] = timestamp
+            self.hashes[slot] = content_hash
+            self._newest_slot = slot
+            self.frames_written += 1
+            self._cond.notify_all()
+        return seq
+
+    def _pin(self, slot):
+        self.pins[slot] += 1
+        view = self.frames[slot].view()
+        view.flags.writeable = False
+        return FrameRef(self, slot, view, self.seqs[slot], self.timestamps[slot], self.hashes[slot])
+
+    def _unpin(self, slot):
+        with self._cond:
+            self.pins[slot] -= 1
+
+    def newest(self):
+        """Pin and return the newest frame, or None if nothing was captured yet"""
+        with self._cond:
+            if self._newest_slot < 0 or self.seqs[self._newest_slot] == 0:
+                return None
+            return self._pin(self._newest_slot)
+
+    def newest_after(self, timestamp, timeout=None):
+        """
+        Wait for a frame captured strictly after `timestamp` and return it pinned.
+
+        Args:
+            timestamp: time.monotonic() value the frame must be newer than
+            timeout: Maximum seconds to wait (None = wait forever)
+
+        Returns:
+            FrameRef, or None if no such frame arrived before the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                slot = self._newest_slot
+                if slot >= 0 and self.seqs[slot] != 0 and self.timestamps[slot] > timestamp:
+                    return self._pin(slot)
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+
+
+class CaptureThread(threading.Thread):
+    """Producer thread: grabs a region from a FrameSource into a FrameRingBuffer until stopped"""
+
+    def __init__(self, source, region, buffer, grayscale=True, interval=DEFAULT_FRAME_INTERVAL):
+        """
+        Args:
+            source: FrameSource to grab from (owned by this thread while it runs)
+            region: (x, y, width, height) to grab, in frame coordinates
+            buffer: FrameRingBuffer to write into
+            grayscale: Grab grayscale frames
+            interval: Minimum seconds between two grabs (0 = as fast as the source allows, busy-looping a core)
+        """
+        super().__init__(daemon=True, name="CaptureThread")
+        self.source = source
+        self.region = region
+        self.buffer = buffer
+        self.grayscale = grayscale
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.errors = 0
+        self.last_error = None
+
+    def run(self):
+        # Capture handles are thread-bound (mss): open this thread's own instead of using the creator's
+        grab = self.source.open_thread_grabber()
+        try:
+            while not self.stop_event.is_set():
+                started = time.monotonic()
+                try:
+                    image = grab(region=self.region, grayscale=self.grayscale)
+                    # Stamp with the time the grab started: a grab that began before a reset input
+                    # may still show the old panel, so it must not pass newest_after(reset time)
+                    self.buffer.write(image, timestamp=started)
+                except Exception as e:
+                    self.errors += 1
+                    self.last_error = e
+                    # Back off a little so a closed window doesn't spin the CPU
+                    self.stop_event.wait(0.05)
+                    continue
+                if self.interval > 0:
+                    remaining = self.interval - (time.monotonic() - started)
+                    if remaining > 0:
+                        self.stop_event.wait(remaining)
+        finally:
+            self.source.close_thread_grabber()
+
+    def stop(self, timeout=1.0):
+        self.stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
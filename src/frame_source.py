@@ -0,0 +1,263 @@
+"""
+Frame sources - where potlines reads its pixels from.
+
+Every source exposes the same small interface (grab / close / width / height), so the OCR and
+decision pipeline doesn't care whether frames come from the live game window or from a recorded
+session on disk:
+
+- WindowFrameSource: live window capture through WindowCapture ('auto', 'mss', 'printwindow' or 'bitblt')
+- ImageFrameSource: a single screenshot, decoded once
+- DirectoryFrameSource: a folder of screenshots played back in name order
+- VideoFrameSource: a video file played back frame by frame
+
+The replay sources work on any OS, which makes it possible to benchmark the whole pipeline on Linux.
+"""
+import os
+import cv2 as cv
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.wmv', '.webm')
+
+
+class FrameSourceExhausted(Exception):
+    """Raised by replay sources when there are no frames left (and looping is off)"""
+    pass
+
+
+def crop_region_of(image, region):
+    """
+    Return the (x, y, width, height) region of image, clamped to the image bounds.
+    Returns the image itself when region is None.
+    """
+    if region is None:
+        return image
+    h, w = image.shape[:2]
+    x, y, region_w, region_h = [int(v) for v in region]
+    x = max(0, min(x, w - 1))
+    y = max(0, min(y, h - 1))
+    region_w = max(1, min(region_w, w - x))
+    region_h = max(1, min(region_h, h - y))
+    return image[y:y+region_h, x:x+region_w]
+
+
+def to_output(image, region=None, grayscale=False):
+    """Crop and (optionally) convert a decoded BGR frame the same way WindowCapture does"""
+    image = crop_region_of(image, region)
+    if grayscale and image.ndim == 3:
+        return cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+    return image
+
+
+class FrameSource:
+    """
+    Base class for frame sources.
+
+    grab(region, grayscale) returns the next frame (BGR, or grayscale if requested), optionally
+    restricted to an (x, y, width, height) region in frame coordinates. width/height describe the
+    full frame so callers can convert percentage crop regions into pixels.
+    """
+    name = "frame source"
+    width = 0
+    height = 0
+    wincap = None  # Only set for live window sources
+
+    def grab(self, region=None, grayscale=False):
+        raise NotImplementedError
+
+    def close(self):
+        """Release any handles held by the source"""
+        pass
+
+    def open_thread_grabber(self):
+        """
+        Return a grab function for the calling thread. Sources with thread-bound handles (mss)
+        open the calling thread's own here; call close_thread_grabber() from the same thread when done.
+        """
+        return self.grab
+
+    def close_thread_grabber(self):
+        """Release the handles open_thread_grabber() opened for the calling thread"""
+        pass
+
+    def describe(self):
+        return f"{self.name} ({self.width}x{self.height})"
+
+
+class WindowFrameSource(FrameSource):
+    """Live capture of a game window"""
+
+    def __init__(self, window_name, method='auto', backend=None):
+        """
+        Args:
+            window_name: Exact window title
+            method: 'auto' (mss -> PrintWindow -> BitBlt), 'mss', 'printwindow' or 'bitblt'
+            backend: Optional window backend (see windowcapture.FakeWindowBackend)
+        """
+        from src.windowcapture import WindowCapture
+        self.wincap = WindowCapture(window_name, backend=backend, capture_method=method)
+        self.method = method
+        self.name = f"window '{window_name}' [{method}]"
+
+    @property
+    def width(self):
+        return self.wincap.w
+
+    @property
+    def height(self):
+        return self.wincap.h
+
+    def grab(self, region=None, grayscale=False):
+        return self.wincap.get_screenshot(region=region, grayscale=grayscale)
+
+    def close_thread_grabber(self):
+        self.wincap.close_thread_handles()
+
+
+class ImageFrameSource(FrameSource):
+    """A single screenshot, decoded once and served from memory on every grab"""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = f"image '{os.path.basename(path)}'"
+        self.image = cv.imread(path)
+        if self.image is None:
+            raise Exception(f"Failed to load test image: {path}")
+        self.height, self.width = self.image.shape[:2]
+        self._gray = None
+
+    def grab(self, region=None, grayscale=False):
+        if grayscale:
+            # Convert the full frame once, then serve crops of it
+            if self._gray is None:
+                self._gray = cv.cvtColor(self.image, cv.COLOR_BGR2GRAY)
+            return crop_region_of(self._gray, region)
+        return crop_region_of(self.image, region)
+
+
+class DirectoryFrameSource(FrameSource):
+    """
+    A folder of screenshots played back in (sorted) file name order, one file per grab.
+
+    With preload=True every image is decoded up front so playback measures the pipeline only;
+    otherwise each image is decoded lazily when it is reached.
+    """
+
+    def __init__(self, path, preload=False, loop=True):
+        self.path = path
+        self.loop = loop
+        self.name = f"directory '{os.path.basename(os.path.normpath(path))}'"
+        self.files = sorted(
+            os.path.join(path, f) for f in os.listdir(path)
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.files:
+            raise Exception(f"No images found in replay directory: {path}")
+        self.frames = None
+        if preload:
+            self.frames = [self._decode(f) for f in self.files]
+        self.index = 0
+        self.current_file = None
+        # Size of the first frame - replays are expected to come from one client resolution
+        first = self.frames[0] if self.frames else self._decode(self.files[0])
+        self.height, self.width = first.shape[:2]
+
+    @staticmethod
+    def _decode(path):
+        image = cv.imread(path)
+        if image is None:
+            raise Exception(f"Failed to load replay image: {path}")
+        return image
+
+    def __len__(self):
+        return len(self.files)
+
+    def grab(self, region=None, grayscale=False):
+        if self.index >= len(self.files):
+            if not self.loop:
+                raise FrameSourceExhausted(f"Replay directory finished after {len(self.files)} frames: {self.path}")
+            self.index = 0
+        self.current_file = self.files[self.index]
+        image = self.frames[self.index] if self.frames is not None else self._decode(self.current_file)
+        self.index += 1
+        return to_output(image, region, grayscale)
+
+
+class VideoFrameSource(FrameSource):
+    """
+    A recorded video played back one frame per grab.
+
+    With preload=True all frames are decoded into memory first; otherwise frames are decoded
+    lazily from the open cv.VideoCapture as they are requested.
+    """
+
+    def __init__(self, path, preload=False, loop=True):
+        self.path = path
+        self.loop = loop
+        self.name = f"video '{os.path.basename(path)}'"
+        self.capture = cv.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise Exception(f"Failed to open replay video: {path}")
+        self.width = int(self.capture.get(cv.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.capture.get(cv.CAP_PROP_FRAME_HEIGHT))
+        self.frames = None
+        self.index = 0
+        if preload:
+            self.frames = []
+            while True:
+                ok, frame = self.capture.read()
+                if not ok:
+                    break
+                self.frames.append(frame)
+            self.capture.release()
+            self.capture = None
+            if not self.frames:
+                raise Exception(f"Replay video has no frames: {path}")
+
+    def grab(self, region=None, grayscale=False):
+        if self.frames is not None:
+            if self.index >= len(self.frames):
+                if not self.loop:
+                    raise FrameSourceExhausted(f"Replay video finished after {len(self.frames)} frames: {self.path}")
+                self.index = 0
+            frame = self.frames[self.index]
+        else:
+            ok, frame = self.capture.read()
+            if not ok:
+                if not self.loop or self.index == 0:
+                    raise FrameSourceExhausted(f"Replay video finished after {self.index} frames: {self.path}")
+                # Rewind and start over
+                self.capture.set(cv.CAP_PROP_POS_FRAMES, 0)
+                self.index = 0
+                ok, frame = self.capture.read()
+                if not ok:
+                    raise FrameSourceExhausted(f"Replay video could not be rewound: {self.path}")
+        self.index += 1
+        return to_output(frame, region, grayscale)
+
+    def close(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+
+def open_frame_source(window_name=None, test_image_path=None, capture_method='auto', preload=False, loop=True):
+    """
+    Pick the frame source for a potlines instance.
+
+    Args:
+        window_name: Window to capture when no test path is given
+        test_image_path: Image file, directory of images or video file to replay instead of the window
+        capture_method: Live capture backend ('auto', 'mss', 'printwindow', 'bitblt')
+        preload: Decode all replay frames up front (directory/video sources)
+        loop: Restart replays from the beginning when they run out
+
+    Returns:
+        A FrameSource instance
+    """
+    if test_image_path:
+        if os.path.isdir(test_image_path):
+            return DirectoryFrameSource(test_image_path, preload=preload, loop=loop)
+        if test_image_path.lower().endswith(VIDEO_EXTENSIONS):
+            return VideoFrameSource(test_image_path, preload=preload, loop=loop)
+        return ImageFrameSource(test_image_path)
+    return WindowFrameSource(window_name, method=capture_method)
@@ -0,0 +1,225 @@
+"""
+Glyph-template recognizer for the potential panel font.
+
+The potential lines are always drawn in the same bitmap font, so once a few rolls have been read
+by Tesseract every character shape is known. The matcher cuts a line strip into glyphs by column
+projection (the font leaves at least one empty column between characters), turns every glyph into
+a small normalized bitmap plus its size/position relative to the line, and compares all glyphs of
+the strip against all atlas templates in one NumPy operation.
+
+The atlas is built from confirmed Tesseract reads: when a line strip read by Tesseract parses as a
+potential line and has as many glyphs as the text has characters, every glyph is stored under its
+character. Each character gets a confidence from the ratio between its best match and the best
+match of any other character, so a glyph that was never learned (or looks like two characters)
+comes back with low confidence and the caller falls back to Tesseract - which then teaches it.
+"""
+import atexit
+import os
+import threading
+import cv2 as cv
+import numpy as np
+from src.line_segmentation import text_mask
+from src.data_paths import get_data_path
+
+ATLAS_FILENAME = "glyph_atlas.npz"
+GLYPH_SIZE = (10, 14)  # (width, height) every glyph bitmap is resized to
+SHAPE_FEATURES = 3  # Glyph width, height and top offset relative to the line height
+SHAPE_WEIGHT = 1.0  # Weight of the shape difference (sum over the features) against the mean pixel difference
+SPACE_GAP = 0.3  # An empty gap wider than this fraction of the line height...
+SPACE_GAP_FACTOR = 2.0  # ...and this many times the line's median letter gap is a space
+MAX_DISTANCE = 0.2  # Glyphs further than this from every template are unknown
+MIN_CONFIDENCE = 0.6  # Default per-character confidence the caller requires to skip Tesseract
+MAX_TEMPLATES_PER_CHAR = 6  # Variants kept per character (anti-aliasing differs slightly per position)
+DUPLICATE_DISTANCE = 0.03  # New glyphs this close to a template of the same character are not stored
+
+
+def get_atlas_path():
+    """Atlas file in the runtime data folder (see data_paths.py)"""
+    return get_data_path(ATLAS_FILENAME)
+
+
+def segment_glyphs(gray, line_extent=None):
+    """
+    Cut a grayscale line strip into glyphs by column projection.
+
+    Args:
+        gray: Grayscale strip containing a single text row
+        line_extent: Optional (top, bottom) of the whole text row in the strip, for a strip that
+            holds only part of a line (the glyph shapes are measured relative to the row, not the ink)
+
+    Returns:
+        Tuple (features, spaces): features is a float32 array (glyphs x feature length);
+        spaces[i] is True if there is a space before glyph i
+    """
+    mask = text_mask(gray)
+    rows = np.flatnonzero(mask.any(axis=1))
+    if len(rows) == 0:
+        return np.zeros((0, GLYPH_SIZE[0] * GLYPH_SIZE[1] + SHAPE_FEATURES), np.float32), []
+    top, bottom = rows[0], rows[-1] + 1
+    if line_extent is not None:
+        top, bottom = min(top, line_extent[0]), max(bottom, line_extent[1])
+    line_height = float(bottom - top)
+
+    ink = mask.any(axis=0)
+    # Start/end columns of every run of ink columns
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], ink.view(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+
+    # Vertical extent of every glyph at once: ink per (row, glyph) from a column-wise OR over each run
+    band = mask[top:bottom].astype(np.float32)
+    glyph_ink = np.maximum.reduceat(band, starts, axis=1) > 0
+    y0s = glyph_ink.argmax(axis=0)
+    y1s = len(band) - glyph_ink[::-1].argmax(axis=0)
+
+    features = np.empty((len(starts), GLYPH_SIZE[0] * GLYPH_SIZE[1] + SHAPE_FEATURES), np.float32)
+    for i, (x0, x1, y0, y1) in enumerate(zip(starts, ends, y0s, y1s)):
+        features[i, :-SHAPE_FEATURES] = cv.resize(band[y0:y1, x0:x1], GLYPH_SIZE, interpolation=cv.INTER_AREA).ravel()
+    features[:, -SHAPE_FEATURES:] = np.stack([ends - starts, y1s - y0s, y0s], axis=1) / line_height
+    # A space is a gap that is wide for the line height and clearly wider than the usual letter gap
+    gaps = starts[1:] - ends[:-1]
+    space_gap = max(SPACE_GAP * line_height, SPACE_GAP_FACTOR * np.median(gaps)) if len(gaps) else 0
+    spaces = [False] + (gaps > space_gap).tolist()
+    return features, spaces
+
+
+class GlyphMatcher:
+    """Atlas of glyph templates learned from confirmed reads, with a vectorized nearest-template matcher"""
+
+    def __init__(self, path=None):
+        self.path = path or get_atlas_path()
+        self.templates = np.zeros((0, GLYPH_SIZE[0] * GLYPH_SIZE[1] + SHAPE_FEATURES), np.float32)
+        self.labels = np.zeros(0, dtype='<U1')
+        self.stats = {"reads": 0, "learned_lines": 0, "templates_added": 0}
+        self._lock = threading.Lock()
+        self._unsaved = False
+        self.load()
+
+    def load(self):
+        try:
+            with np.load(self.path) as data:
+                templates, labels = data["templates"], data["labels"]
+            if templates.ndim == 2 and templates.shape[1] == self.templates.shape[1] and len(labels) == len(templates):
+                self.templates = templates.astype(np.float32)
+                self.labels = labels.astype('<U1')
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[OCR] Could not load glyph atlas {self.path}: {e}")
+
+    def save(self):
+        with self._lock:
+            if not self._unsaved:
+                return
+            templates, labels = self.templates.copy(), self.labels.copy()
+            self._unsaved = False
+        try:
+            # Write to a temp file first so a crash mid-write can't corrupt the atlas
+            tmp_path = self.path + ".tmp.npz"
+            np.savez_compressed(tmp_path, templates=templates, labels=labels)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[OCR] Could not save glyph atlas {self.path}: {e}")
+
+    @property
+    def characters(self):
+        return set(self.labels.tolist())
+
+    def _distances(self, features, templates):
+        """Distance of every glyph to every template (glyphs x templates): mean squared pixel difference + shape difference"""
+        pixels = GLYPH_SIZE[0] * GLYPH_SIZE[1]
+        a, b = features[:, :pixels], templates[:, :pixels]
+        # Mean squared pixel difference, expanded as |a|^2 + |b|^2 - 2ab so it is one matrix product
+        pixel_distance = ((a * a).sum(axis=1)[:, None] + (b * b).sum(axis=1)[None, :] - 2.0 * (a @ b.T)) / pixels
+        shape_distance = np.abs(features[:, None, pixels:] - templates[None, :, pixels:]).sum(axis=2)
+        return np.maximum(pixel_distance, 0.0) + SHAPE_WEIGHT * shape_distance
+
+    def recognize(self, gray, line_extent=None):
+        """
+        Read one line strip.
+
+        Args:
+            gray: Grayscale strip containing a single text row
+            line_extent: Optional (top, bottom) of the text row, see segment_glyphs()
+
+        Returns:
+            Tuple (text, confidences) with one confidence (0-1) per non-space character;
+            ("", []) if the strip has no glyphs or the atlas is empty
+        """
+        features, spaces = segment_glyphs(gray, line_extent)
+        with self._lock:
+            templates, labels = self.templates, self.labels
+        self.stats["reads"] += 1
+        if len(features) == 0 or len(templates) == 0:
+            return "", []
+
+        distances = self._distances(features, templates)
+        best = distances.argmin(axis=1)
+        best_distance = distances[np.arange(len(best)), best]
+        best_labels = labels[best]
+        # Ratio test: the nearest template of any *other* character must be clearly further away
+        # (capped, so a character without a learned look-alike still needs a close match)
+        codes = labels.view(np.int32)  # Compare characters as code points, much faster than strings
+        other = np.where(codes[None, :] == codes[best][:, None], np.inf, distances).min(axis=1)
+        other = np.clip(other, 1e-6, 2 * MAX_DISTANCE)
+        confidences = np.where(best_distance > MAX_DISTANCE, 0.0, 1.0 - best_distance / other)
+        confidences = np.clip(confidences, 0.0, 1.0)
+
+        text = ''.join((' ' if space else '') + char for space, char in zip(spaces, best_labels.tolist()))
+        return text, confidences.tolist()
+
+    def learn(self, gray, text):
+        """
+        Add the glyphs of a confirmed read to the atlas.
+
+        Args:
+            gray: Grayscale strip containing a single text row
+            text: Confirmed text of the strip (spaces are ignored)
+
+        Returns:
+            True if the glyphs lined up with the text and were learned
+        """
+        chars = [c for c in text if not c.isspace()]
+        features, _ = segment_glyphs(gray)
+        if not chars or len(features) != len(chars):
+            # Touching or split glyphs - can't tell which glyph is which character
+            return False
+
+        with self._lock:
+            templates, labels = self.templates, self.labels
+            added_templates, added_labels = [], []
+            distances = self._distances(features, templates) if len(templates) else None
+            for i, char in enumerate(chars):
+                if char in added_labels:
+                    continue  # One new variant per character per line is plenty
+                same = labels == char
+                if same.sum() >= MAX_TEMPLATES_PER_CHAR:
+                    continue
+                if distances is not None and same.any() and distances[i, same].min() < DUPLICATE_DISTANCE:
+                    continue
+                added_templates.append(features[i])
+                added_labels.append(char)
+            if added_templates:
+                self.templates = np.vstack([templates, np.array(added_templates, np.float32)])
+                self.labels = np.concatenate([labels, np.array(added_labels, dtype='<U1')])
+                self._unsaved = True
+        self.stats["learned_lines"] += 1
+        self.stats["templates_added"] += len(added_templates)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self.templates = self.templates[:0]
+            self.labels = self.labels[:0]
+            self._unsaved = True
+
+
+_matcher = None
+
+
+def get_glyph_matcher():
+    """Shared glyph matcher, loaded on first use and saved at exit"""
+    global _matcher
+    if _matcher is None:
+        _matcher = GlyphMatcher()
+        atexit.register(_matcher.save)
+    return _matcher
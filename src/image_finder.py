@@ -4,10 +4,20 @@ import numpy as np
 import os
 import sys
 import time
-from src.windowcapture import WindowCapture
+from src.frame_source import open_frame_source
+from src.frame_buffer import FrameRingBuffer, CaptureThread, DEFAULT_FRAME_INTERVAL
+from src.change_detector import roi_signature, wait_for_change
+import src.change_detector as change_detector
 from src.image_processing import image_process
-import src.tesseract_config as tesseract_config  # Configure Tesseract path before importing pytesseract
-import pytesseract
+from src.line_segmentation import segment_lines, strip_image, assign_words_to_slots
+from src.line_assembler import assemble_lines, assemble_line_words, words_to_text
+from src.glyph_matcher import get_glyph_matcher, MIN_CONFIDENCE as GLYPH_MIN_CONFIDENCE
+from src.line_dictionary import get_line_dictionary, slot_hash
+from src.value_reader import (value_box_from_words, value_box_from_pixels, value_crop, prepare_for_ocr,
+                              value_candidates, replace_value, VALUE_OCR_CONFIG)
+from src.ocr_engine import get_ocr_engine, get_ocr_cache, data_to_words
+from src.ocr_pool import get_ocr_pool, DEFAULT_TOP_K
+from src.ocr_strategy import get_strategy_profile, candidate_id
 from PIL import Image
 from src.auto_detect_crop import detect_potential_region
 
@@ -23,16 +33,73 @@ if not getattr(sys, "frozen", False):
 # Default window name - can be overridden when creating potlines instance
 DEFAULT_WINDOW_NAME = "Maplestory"
 
+# Background capture: number of ring buffer slots and how long a roll waits for a fresh frame
+BACKGROUND_BUFFER_SIZE = 8
+BACKGROUND_FRAME_TIMEOUT = 1.0
+
+# OCR cascade configs (default order - reordered per setup when adaptive_ocr is on, see ocr_strategy.py)
+OCR_WHITELIST = '-c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz+%: '
+RAW_OCR_CONFIGS = [
+    (f'--psm 6 {OCR_WHITELIST}', 'raw with whitelist'),
+    ('--psm 6', 'raw standard'),
+    (f'--psm 7 {OCR_WHITELIST}', 'raw single line'),
+]
+# PSM 6 works best for this use case (uniform block of text); whitelist configs prioritize number recognition
+PROCESSED_OCR_CONFIGS = [
+    (f'--psm 6 {OCR_WHITELIST}', 'uniform block with whitelist'),
+    ('--psm 6', 'uniform block'),
+    ('--psm 11', 'sparse text'),  # Fallback if PSM 6 fails
+    (f'--psm 7 {OCR_WHITELIST}', 'single line with whitelist'),
+]
+# Primary Tesseract call of line segmentation mode: one image_to_data over the whole crop (words + confidences).
+# No whitelist here: the whitelist drops the space character, and Tesseract then reports 0 confidence for every word
+PRIMARY_DATA_CONFIG = '--psm 6'
+MIN_LINE_CONFIDENCE = 60  # Lines below this Tesseract confidence (0-100) go to the per-line fallback passes
+# Per-line fallback passes (line segmentation mode): a line below the confidence threshold is retried with the next pass
+# (the whitelist pass comes last for the same reason - its reads parse, but always count as low confidence)
+SEGMENT_PASSES = [
+    ('raw', '--psm 7'),
+    ('original', '--psm 7'),
+    ('adaptive', '--psm 7'),
+    ('raw', f'--psm 7 {OCR_WHITELIST}'),
+]
+
 class potlines:
     image = None
-    wincap = None
+    wincap = None  # WindowCapture of the live source (None when replaying from disk)
+    source = None  # FrameSource every frame is read from (see frame_source.py)
     crop_region = None  # (x, y, width, height) as percentages or pixels
     reset_button_pos = None  # (x, y, width, height) of Reset button in window coordinates
     test_image_path = None  # Path to test image file (for debugging)
     auto_detect_crop = False  # If True, automatically detect crop region
     last_screenshot = None  # Store last screenshot for saving when bot stops
+    frame_counter = 0  # Number of frames captured by this instance (used as frame id)
+    last_frame = None  # Metadata of the frame the last OCR result was read from
+    last_attempts = None  # Every (method, config) tried by the last get_ocr_result(), with text and time
+    adaptive_ocr = True  # Order the OCR cascade by learned success rate/latency (see ocr_strategy.py)
+    ocr_pool = None  # OcrWorkerPool when parallel OCR is enabled (see enable_parallel_ocr())
+    parallel_top_k = DEFAULT_TOP_K  # Candidates raced on the pool at once
+    line_segmentation = True  # Read the crop line by line first (see line_segmentation.py)
+    last_line_slots = None  # The 3 slot-ordered lines of the last read, when it came from line segmentation
+    last_segment_attempts = None  # Per-line reads of the last segmented pass
+    last_segment_passes = None  # (source, seconds) of every recognition pass of the last segmented read
+    glyph_matching = True  # Read line strips with the learned glyph atlas first (see glyph_matcher.py)
+    glyph_min_confidence = GLYPH_MIN_CONFIDENCE  # Lowest per-character confidence accepted without Tesseract
+    use_line_dictionary = True  # Look line images up in the persistent line dictionary before any OCR
+    min_line_confidence = MIN_LINE_CONFIDENCE  # Confidence (0-100) a line needs to skip the fallback passes
+    value_recheck = True  # Re-read only the value column of lines whose value is illegal for the stat (see value_reader.py)
+    snap_to_catalog = True  # Snap the read lines to their nearest known potential line (see line_catalog.py)
+    last_read = None  # Structured result of the last roll (see _build_read())
+    expected_lines = 3  # A cascade read is only accepted once the parser finds this many potential lines in it
+    cascade_budget = 2.0  # Seconds the cascade may keep escalating (its first candidate always runs) before it settles for the best partial read
+    last_trace = None  # Candidates tried for the last roll, with their timings (see _build_trace())
+    capture_thread = None  # Optional background CaptureThread (see start_background_capture())
+    frame_buffer = None  # FrameRingBuffer filled by capture_thread
+    min_frame_timestamp = 0.0  # Buffered reads only accept frames captured after this time.monotonic() value
+    last_roi_signature = None  # Downscaled signature of the last ROI read (reference for wait_for_panel_change())
+    last_change_wait = None  # Result dict of the last wait_for_panel_change() call
     
-    def __init__(self, window_name=None, crop_region=None, test_image_path=None, auto_detect_crop=False, cube_type="Glowing"):
+    def __init__(self, window_name=None, crop_region=None, test_image_path=None, auto_detect_crop=False, cube_type="Glowing", frame_source=None, capture_method='auto'):
         """
         Initialize potlines with optional window name and crop region.
         If window_name is not provided, uses DEFAULT_WINDOW_NAME.
@@ -42,30 +109,47 @@ class potlines:
             crop_region: Tuple of (x, y, width, height) as percentages (0.0-1.0) or pixels
                         If percentages, will be relative to window size
                         Example: (0.3, 0.4, 0.4, 0.3) = 30% from left, 40% from top, 40% width, 30% height
-            test_image_path: Path to a test image file (for debugging). If provided, uses this instead of window capture.
+            test_image_path: Path to a test image file, a directory of screenshots or a video file (for debugging
+                             and benchmarking). If provided, frames are replayed from it instead of window capture.
             cube_type: "Glowing" or "Bright" - determines which offsets to use for crop region calculation
+            frame_source: Optional FrameSource to read frames from (overrides window_name/test_image_path)
+            capture_method: Live capture backend - 'auto', 'mss', 'printwindow' or 'bitblt'
         """
         self.crop_region = crop_region
         self.test_image_path = test_image_path
         self.auto_detect_crop = auto_detect_crop
         self.cube_type = cube_type
+        self.capture_method = capture_method
         # Clear any cached data
         self.image = None
         self.last_screenshot = None
+        self.frame_counter = 0
+        self.last_frame = None
+        self.last_attempts = []
+        self.capture_thread = None
+        self.frame_buffer = None
+        self.min_frame_timestamp = 0.0
+        self._pinned_frame = None
+        self.last_roi_signature = None
+        self.last_change_wait = None
+        self._settled_roi = None  # Settled frame from wait_for_panel_change(), consumed by the next capture_roi()
         
+        if frame_source is not None:
+            self.source = frame_source
+            print(f"[TEST MODE] Using frame source: {frame_source.describe()}")
         # If test image is provided, skip window capture
-        if test_image_path:
+        elif test_image_path:
             if not os.path.exists(test_image_path):
                 raise Exception(f"Test image file not found: {test_image_path}")
-            self.wincap = None
-            print(f"[TEST MODE] Using test image: {test_image_path}")
+            self.source = open_frame_source(test_image_path=test_image_path)
+            print(f"[TEST MODE] Using {self.source.describe()}: {test_image_path}")
         else:
             if window_name is None:
                 window_name = DEFAULT_WINDOW_NAME
             
             # Initialize window capture with error handling
             try:
-                self.wincap = WindowCapture(window_name)
+                self.source = open_frame_source(window_name=window_name, capture_method=capture_method)
             except Exception as e:
                 error_msg = (
                     f"\n{'='*60}\n"
@@ -74,16 +158,19 @@ class potlines:
                     f"{'='*60}\n"
                 )
                 raise Exception(error_msg) from e
+        self.wincap = self.source.wincap
         
         # Don't take screenshot in __init__ - we take fresh screenshots in get_ocr_result()
         # This prevents caching issues
     
-    def crop_image(self, image, debug=False):
-        """Crop image to specified region"""
+    def get_crop_rect(self, w, h):
+        """
+        Convert crop_region into a pixel rectangle (x, y, width, height) for an image/window of size w x h.
+        Returns None if no crop region is set.
+        """
         if self.crop_region is None:
-            return image
+            return None
         
-        h, w = image.shape[:2]
         x, y, crop_w, crop_h = self.crop_region
         
         # If values are <= 1.0, treat as percentages
@@ -104,6 +191,15 @@ class potlines:
         y_px = max(0, min(y_px, h - 1))
         crop_w_px = max(1, min(crop_w_px, w - x_px))
         crop_h_px = max(1, min(crop_h_px, h - y_px))
+        return (x_px, y_px, crop_w_px, crop_h_px)
+    
+    def crop_image(self, image, debug=False):
+        """Crop image to specified region"""
+        if self.crop_region is None:
+            return image
+        
+        h, w = image.shape[:2]
+        x_px, y_px, crop_w_px, crop_h_px = self.get_crop_rect(w, h)
         
         if debug:
             print(f"[DEBUG] Cropping image: region=({x_px}, {y_px}, {crop_w_px}, {crop_h_px}) from ({w}, {h})")
@@ -111,50 +207,247 @@ class potlines:
         cropped = image[y_px:y_px+crop_h_px, x_px:x_px+crop_w_px]
         return cropped
 
-    def screenshot(self, debug=False, processing_method='adaptive'):
-        try:
-            # Clear cached image before taking new screenshot
-            self.image = None
-            
-            # Use test image if provided, otherwise capture from window
-            if self.test_image_path:
-                screenshot = cv.imread(self.test_image_path)
-                if screenshot is None:
-                    raise Exception(f"Failed to load test image: {self.test_image_path}")
+    def capture_roi(self, debug=False):
+        """
+        Capture a single frame and crop it to the region of interest.
+        
+        This is the only place a roll grabs pixels from the window (or test image),
+        so every preprocessing variant tried by get_ocr_result() reads the same frame.
+        
+        Once the crop region is known, live captures grab only the ROI (in grayscale) instead of
+        the whole window.
+        
+        Returns:
+            Tuple (roi, frame_info) where roi is the cropped BGR (or grayscale) image and frame_info is a
+            dict with 'frame_id' (per-instance counter) and 'timestamp' (time.monotonic()).
+        """
+        if self.capture_thread is not None and self.capture_thread.is_alive():
+            return self._read_buffered_roi(debug=debug)
+        
+        # Get FRESH screenshot (from window or test image)
+        # This ensures we always get the latest state, not a cached image
+        self.last_screenshot = None
+        if self.crop_region is not None and self._settled_roi is not None:
+            # wait_for_panel_change() already grabbed the settled panel - OCR that frame
+            # instead of capturing again
+            roi, frame_info = self._settled_roi
+            self._settled_roi = None
+            if debug:
+                print(f"[DEBUG] Using settled frame {frame_info['frame_id']} from change detection")
+            self.last_roi_signature = roi_signature(roi)
+            self.last_screenshot = roi.copy()
+            return roi, frame_info
+        if self.crop_region is not None:
+            # Crop region is known (auto-detected or manual): grab ONLY the ROI, already in grayscale.
+            # This skips capturing and color-converting the whole window just to throw most of it away.
+            region = self.get_crop_rect(self.source.width, self.source.height)
+            roi = self.source.grab(region=region, grayscale=True)
+            if debug:
+                print(f"[DEBUG] Captured ROI {region} only from {self.source.describe()}, shape: {roi.shape if roi is not None else 'None'}")
+            self.frame_counter += 1
+            frame_info = {"frame_id": self.frame_counter, "timestamp": time.monotonic()}
+            if roi is not None:
+                self.last_screenshot = roi.copy()
+                self.last_roi_signature = roi_signature(roi)
+            return roi, frame_info
+        
+        # No delay needed - screenshot is fast and window should be updated after click
+        if debug:
+            print(f"[DEBUG] Taking fresh screenshot from {self.source.describe()}")
+            if self.wincap:
+                print(f"[DEBUG] Window handle: {self.wincap.hwnd}")
+        raw_screenshot = self.source.grab()
+        if debug:
+            print(f"[DEBUG] Screenshot captured successfully, shape: {raw_screenshot.shape if raw_screenshot is not None else 'None'}")
+            # Only save debug images in debug mode and only on first call (not every retry)
+            if not hasattr(self, '_debug_image_saved'):
+                try:
+                    cv.imwrite('debug_current_capture.png', raw_screenshot)
+                    print(f"[DEBUG] Saved current screenshot to: debug_current_capture.png")
+                    self._debug_image_saved = True
+                except Exception as e:
+                    print(f"[DEBUG] Could not save debug screenshot: {e}")
+        
+        self.frame_counter += 1
+        frame_info = {"frame_id": self.frame_counter, "timestamp": time.monotonic()}
+        
+        # Store screenshot for potential saving when bot stops (don't save during iterations)
+        if raw_screenshot is not None:
+            self.last_screenshot = raw_screenshot.copy()
+        
+        # Auto-detect crop region if enabled and not already set
+        # (cached after first detection to avoid re-detecting on every call)
+        if self.auto_detect_crop and self.crop_region is None:
+            if debug:
+                print(f"[DEBUG] Auto-detecting crop region from raw screenshot...")
+            result = detect_potential_region(raw_screenshot, debug=debug, cube_type=self.cube_type)
+            if result:
+                # detect_potential_region returns ((crop_x, crop_y, crop_w, crop_h), (reset_x, reset_y, reset_w, reset_h) or None)
+                crop_region, reset_pos = result
+                self.crop_region = crop_region
+                self.reset_button_pos = reset_pos
                 if debug:
-                    print(f"[TEST MODE] Loaded test image, shape: {screenshot.shape}")
+                    print(f"[DEBUG] Auto-detected crop region: {self.crop_region}")
+                    if reset_pos:
+                        print(f"[DEBUG] Auto-detected Reset button position: {reset_pos}")
             else:
-                # Always take fresh screenshot - clear cache first
-                self.last_screenshot = None
-                screenshot = self.wincap.get_screenshot()
-                if debug:
-                    print(f"[DEBUG] Screenshot captured, shape: {screenshot.shape if screenshot is not None else 'None'}")
-            
-            # Auto-detect crop region if enabled and not already set
-            # (cached after first detection to avoid re-detecting on every call)
-            if self.auto_detect_crop and self.crop_region is None:
                 if debug:
-                    print(f"[DEBUG] Auto-detecting crop region from screenshot...")
-                detected_region = detect_potential_region(screenshot, debug=debug)
-                if detected_region:
-                    self.crop_region = detected_region
-                    if debug:
-                        print(f"[DEBUG] Auto-detected crop region: {self.crop_region}")
-                else:
-                    if debug:
-                        print(f"[DEBUG] Warning: Could not auto-detect crop region, using full image")
-            
+                    print(f"[DEBUG] Warning: Could not auto-detect crop region, using full image")
+        
+        if debug:
+            print(f"[DEBUG] Crop region status: auto_detect_crop={self.auto_detect_crop}, crop_region={self.crop_region}")
+            print(f"[DEBUG] Raw screenshot shape before cropping: {raw_screenshot.shape if raw_screenshot is not None else 'None'}")
+        
+        roi = raw_screenshot
+        if self.crop_region:
+            roi = self.crop_image(raw_screenshot, debug=debug)
+            if debug:
+                print(f"[DEBUG] Raw screenshot shape after cropping: {roi.shape if roi is not None else 'None'}")
+                # Only save debug images in debug mode and only on first call
+                if not hasattr(self, '_debug_cropped_saved'):
+                    try:
+                        cv.imwrite('debug_current_cropped.png', roi)
+                        print(f"[DEBUG] Saved cropped screenshot to: debug_current_cropped.png")
+                        self._debug_cropped_saved = True
+                    except Exception as e:
+                        print(f"[DEBUG] Could not save cropped debug screenshot: {e}")
+        else:
+            if debug:
+                print(f"[DEBUG] No crop region set - using full image")
+        
+        if roi is not None:
+            self.last_roi_signature = roi_signature(roi)
+        return roi, frame_info
+
+    def start_background_capture(self, capacity=BACKGROUND_BUFFER_SIZE, interval=DEFAULT_FRAME_INTERVAL):
+        """
+        Start a producer thread that keeps grabbing the ROI into a ring buffer.
+        capture_roi() then reads the newest buffered frame instead of doing a blocking capture.
+        Requires the crop region to be known (call after the first get_ocr_result()).
+        
+        Returns:
+            True if the thread was started
+        """
+        if self.capture_thread is not None and self.capture_thread.is_alive():
+            return True
+        if self.crop_region is None:
+            return False
+        region = self.get_crop_rect(self.source.width, self.source.height)
+        started = time.monotonic()
+        first = self.source.grab(region=region, grayscale=True)
+        self.frame_buffer = FrameRingBuffer(capacity, first.shape, first.dtype)
+        self.frame_buffer.write(first, timestamp=started)
+        self.capture_thread = CaptureThread(self.source, region, self.frame_buffer, grayscale=True, interval=interval)
+        self.capture_thread.start()
+        return True
+    
+    def stop_background_capture(self):
+        """Stop the background capture thread (if running) and release the pinned frame"""
+        if self.capture_thread is not None:
+            self.capture_thread.stop()
+            self.capture_thread = None
+        self.release_frame()
+    
+    def require_frame_after(self, timestamp):
+        """Only accept buffered frames captured after this time.monotonic() value (e.g. the last reset input)"""
+        self.min_frame_timestamp = timestamp
+    
+    def release_frame(self):
+        """Release the buffer slot pinned by the last buffered read"""
+        if self._pinned_frame is not None:
+            self._pinned_frame.release()
+            self._pinned_frame = None
+    
+    def _read_buffered_roi(self, debug=False):
+        """
+        Return the newest frame captured after min_frame_timestamp as a read-only view into the
+        ring buffer (no copy). The slot stays pinned until the next read or release_frame().
+        """
+        self.release_frame()
+        ref = self.frame_buffer.newest_after(self.min_frame_timestamp, timeout=BACKGROUND_FRAME_TIMEOUT)
+        if ref is None:
             if debug:
-                print(f"[DEBUG] screenshot() - Crop region status: auto_detect_crop={self.auto_detect_crop}, crop_region={self.crop_region}")
+                print(f"[DEBUG] No frame newer than {self.min_frame_timestamp:.3f} within {BACKGROUND_FRAME_TIMEOUT}s, using newest buffered frame")
+            ref = self.frame_buffer.newest()
+            if ref is None:
+                raise Exception("Background capture has not produced any frame")
+        self._pinned_frame = ref
+        self.last_roi_signature = roi_signature(ref.image)
+        frame_info = {"frame_id": ref.seq, "timestamp": ref.timestamp, "content_hash": ref.content_hash}
+        if debug:
+            print(f"[DEBUG] Using buffered frame {ref.seq} (captured {time.monotonic() - ref.timestamp:.3f}s ago)")
+        return ref.image, frame_info
+
+    def wait_for_panel_change(self, timeout=change_detector.DEFAULT_TIMEOUT, stable_frames=change_detector.DEFAULT_STABLE_FRAMES,
+                              threshold=change_detector.DEFAULT_THRESHOLD, poll_interval=change_detector.DEFAULT_POLL_INTERVAL,
+                              stop_event=None, debug=False):
+        """
+        Wait until the ROI differs from the last frame read and has then settled (see change_detector.py).
+        Call after the reset input instead of sleeping a fixed time.
+        
+        The settled frame is handed to the next capture_roi(), so the following OCR reads exactly the
+        frame change detection accepted (with background capture: the next buffered frame at or after it).
+        
+        Returns:
+            Result dict from change_detector.wait_for_change(), or None if there is no reference frame
+            yet or the crop region is unknown (caller should fall back to a fixed delay)
+        """
+        if self.last_roi_signature is None or self.crop_region is None:
+            return None
+        self._settled_roi = None
+        buffered = self.capture_thread is not None and self.capture_thread.is_alive()
+        region = None if buffered else self.get_crop_rect(self.source.width, self.source.height)
+        last_timestamp = [time.monotonic()]
+        
+        def grab():
+            if buffered:
+                ref = self.frame_buffer.newest_after(last_timestamp[0], timeout=poll_interval or 0.05)
+                if ref is None:
+                    return None, None
+                with ref:
+                    last_timestamp[0] = ref.timestamp
+                    # Copy before unpinning - the producer may reuse the slot right after (ROI is small)
+                    return ref.image.copy(), ref.timestamp
+            return self.source.grab(region=region, grayscale=True), time.monotonic()
+        
+        # Buffered frames are already paced by the capture thread - no extra sleep needed
+        result = wait_for_change(grab, self.last_roi_signature, timeout=timeout, stable_frames=stable_frames,
+                                 threshold=threshold, poll_interval=0.0 if buffered else poll_interval,
+                                 stop_event=stop_event)
+        if result["stable"]:
+            if buffered:
+                # Next buffered read must be the settled frame or newer
+                self.require_frame_after(result["stable_since"] - 1e-6)
+            else:
+                self.frame_counter += 1
+                self._settled_roi = (result["image"], {"frame_id": self.frame_counter, "timestamp": result["timestamp"]})
+        # Don't keep a reference to a buffer slot (it's reused by the producer)
+        result["image"] = None
+        self.last_change_wait = result
+        if debug:
+            print(f"[DEBUG] Panel change wait: changed={result['changed']}, stable={result['stable']}, "
+                  f"{result['frames']} frames in {result['elapsed'] * 1000:.0f} ms")
+        return result
+
+    def screenshot(self, debug=False, processing_method='adaptive', roi=None):
+        """
+        Preprocess a cropped frame for OCR and store it in self.image.
+        
+        Args:
+            debug: If True, print debug info
+            processing_method: Method passed to image_process()
+            roi: Already captured and cropped BGR image (from capture_roi()). If None, a new
+                 frame is captured first.
+        """
+        try:
+            # Clear cached image before processing
+            self.image = None
             
-            # Crop to region of interest if specified
-            if self.crop_region:
-                screenshot = self.crop_image(screenshot, debug=debug)
-                if debug:
-                    print(f"[DEBUG] After cropping, shape: {screenshot.shape}")
+            if roi is None:
+                roi, frame_info = self.capture_roi(debug=debug)
             
             # Try multiple processing methods if adaptive doesn't work
-            processed_img = image_process(screenshot, method=processing_method)
+            processed_img = image_process(roi, method=processing_method)
             if debug:
                 print(f"[DEBUG] Image processed with method '{processing_method}', shape: {processed_img.shape if processed_img is not None else 'None'}")
         except Exception as e:
@@ -170,6 +463,12 @@ class potlines:
     
     def save_debug_image(self):
         """Save the last screenshot to debug_original_image.png (called when bot stops)"""
+        if self.last_screenshot is None and self.frame_buffer is not None:
+            # Background capture doesn't keep per-roll copies - save the newest buffered frame
+            ref = self.frame_buffer.newest()
+            if ref is not None:
+                with ref:
+                    self.last_screenshot = ref.image.copy()
         if self.last_screenshot is not None:
             try:
                 save_screenshot = self.last_screenshot.copy()
@@ -185,9 +484,408 @@ class potlines:
     
     def clear_cache(self):
         """Clear all cached images and data"""
+        self.release_frame()
+        self._settled_roi = None
         self.last_screenshot = None
         self.image = None
     
+    def _candidate_image(self, method, roi, frame_info, processed_images, debug=False):
+        """Image a cascade candidate OCRs: the grayscale ROI for 'raw', else the ROI preprocessed with method"""
+        if method in processed_images:
+            image = processed_images[method]
+            if method != 'raw' and image is not None:
+                self.image = image
+            return image
+        try:
+            if method == 'raw':
+                # Convert to grayscale only (ROI captures may already be grayscale)
+                image = roi if roi.ndim == 2 else cv.cvtColor(roi, cv.COLOR_BGR2GRAY)
+                if debug:
+                    print(f"[DEBUG] Trying raw cropped image (no processing) from frame {frame_info['frame_id']}")
+            else:
+                self.screenshot(debug=debug, processing_method=method, roi=roi)
+                image = self.image
+                if debug:
+                    print(f"[DEBUG] Trying OCR with method: {method}")
+                    print(f"[DEBUG] Image shape: {image.shape if image is not None else 'None'}")
+        except Exception as e:
+            if debug:
+                print(f"[DEBUG] Error with method {method}: {e}")
+            image = None
+        processed_images[method] = image
+        return image
+    
+    def _ocr_segmented(self, roi, frame_info, engine, debug=False):
+        """
+        OCR the crop line by line (see line_segmentation.py). Every slot is resolved by the cheapest
+        source that is confident about it:
+        
+        1. line dictionary (line images read cleanly before)
+        2. glyph atlas
+        3. ONE image_to_data pass over the whole crop - words are assigned to slots by their position
+           and every slot gets the lowest word confidence as its confidence
+        4. per-line fallback passes (PSM 7, preprocessing) - only for slots whose confidence is still
+           below min_line_confidence; the most confident read that parses is kept
+        
+        Returns:
+            The 3 lines joined with newlines, or None if some slot never gave a valid line
+            (the caller then runs the full-block cascade)
+        """
+        from src.translate_ocr_results import is_potential_line, lex_line, is_legal_value
+        gray = roi if roi.ndim == 2 else cv.cvtColor(roi, cv.COLOR_BGR2GRAY)
+        slot_rows, layout = segment_lines(gray, self.cube_type)
+        raw_strips = [[strip_image(gray, row) for row in rows] for rows in slot_rows]
+        reads = [None] * len(slot_rows)  # Best parsed read per slot: {"text", "confidence", "source", "words"}
+        
+        def confident(i):
+            return reads[i] is not None and reads[i]["confidence"] >= self.min_line_confidence
+        
+        def offer(i, text, confidence, source, words=None):
+            """Keep a read for slot i if it parses and beats the current one; True if the slot is now confident"""
+            self.last_segment_attempts.append({"slot": i, "method": source, "text": text, "confidence": confidence})
+            if is_potential_line(text) and (reads[i] is None or confidence > reads[i]["confidence"]):
+                reads[i] = {"text": text, "confidence": confidence, "source": source, "words": words or []}
+            return confident(i)
+        
+        # Known line images first: a line seen (and parsed) before needs no recognition at all
+        dictionary = get_line_dictionary() if self.use_line_dictionary else None
+        slot_keys = [None] * len(slot_rows)
+        if dictionary is not None:
+            for i, strips in enumerate(raw_strips):
+                slot_keys[i] = slot_hash(strips)
+                entry = dictionary.lookup(slot_keys[i])
+                if entry is not None:
+                    offer(i, entry["text"], 100.0, 'dictionary')
+            if debug:
+                print(f"[DEBUG] Line dictionary: {[r and r['text'] for r in reads]}")
+        known = [reads[i] is not None for i in range(len(reads))]
+        
+        # Glyph atlas next: lines it reads confidently never reach Tesseract
+        matcher = get_glyph_matcher() if self.glyph_matching else None
+        if matcher is not None and not all(known):
+            started = time.perf_counter()
+            for i, strips in enumerate(raw_strips):
+                if confident(i):
+                    continue
+                glyph_reads = [matcher.recognize(strip) for strip in strips]
+                text = ' '.join(t for t, _ in glyph_reads if t)
+                confidences = [c for _, line_confidences in glyph_reads for c in line_confidences]
+                confidence = min(confidences) if confidences else 0.0
+                if confidence >= self.glyph_min_confidence:
+                    offer(i, text, confidence * 100.0, 'glyph')
+            self.last_segment_passes.append(('glyph', time.perf_counter() - started))
+            if debug:
+                print(f"[DEBUG] Glyph pass ({(time.perf_counter() - started) * 1000:.2f} ms): {[r and r['text'] for r in reads]}")
+        
+        # One image_to_data pass over the whole crop: words + confidences for every remaining slot at once
+        pending = [i for i in range(len(reads)) if not confident(i)]
+        if pending:
+            started = time.perf_counter()
+            words = []
+            try:
+                words = data_to_words(engine.image_to_data(gray, config=PRIMARY_DATA_CONFIG))
+            except Exception as e:
+                if debug:
+                    print(f"[DEBUG] image_to_data pass failed: {e}")
+            elapsed = time.perf_counter() - started
+            self.last_segment_passes.append(('data', elapsed))
+            slot_words = assign_words_to_slots(words, slot_rows)
+            for i in pending:
+                if slot_words[i]:
+                    offer(i, ' '.join(w["text"] for w in slot_words[i]), min(w["conf"] for w in slot_words[i]),
+                          'data', slot_words[i])
+            if debug:
+                print(f"[DEBUG] image_to_data pass ({elapsed * 1000:.1f} ms, {len(words)} words): "
+                      f"{[r and (r['text'], round(r['confidence'])) for r in reads]}")
+        
+        # Per-line fallbacks, only for slots that are still missing or below the confidence threshold
+        for method, config in SEGMENT_PASSES:
+            failing = [i for i in range(len(reads)) if not confident(i)]
+            if not failing:
+                break
+            jobs = []  # (slot, part, image)
+            for i in failing:
+                for part, strip in enumerate(raw_strips[i]):
+                    image = strip if method == 'raw' else image_process(strip, method=method)
+                    jobs.append((i, part, image))
+            
+            results = {}
+            started = time.perf_counter()
+            if self.ocr_pool is not None and len(jobs) > 1:
+                # Read all strips of this pass at once on the worker pool (accept nothing = wait for all)
+                _, pool_results = self.ocr_pool.run_speculative(
+                    [(f"line {i + 1}.{part}", image, config) for i, part, image in jobs],
+                    accept=lambda data: False, cache=get_ocr_cache(), kind='data')
+                for job_index, data, _ in pool_results:
+                    results[jobs[job_index][:2]] = data_to_words(data)
+            else:
+                try:
+                    # One request for all strips when the engine batches (OCR server), one call each otherwise
+                    batch = engine.image_to_data_batch([(image, config) for _, _, image in jobs])
+                    for (i, part, _), data in zip(jobs, batch):
+                        results[(i, part)] = data_to_words(data)
+                except Exception as e:
+                    if debug:
+                        print(f"[DEBUG] Line pass OCR failed ({method}, {config}): {e}")
+            elapsed = time.perf_counter() - started
+            self.last_segment_passes.append((method, elapsed))
+            
+            for i in failing:
+                # A wrapped double line is read row by row and joined back into one line
+                parts = [results.get((i, part), []) for part in range(len(raw_strips[i]))]
+                line_words = [w for part_words in parts for w in part_words]
+                text = ' '.join(w["text"] for w in line_words)
+                confidence = min((w["conf"] for w in line_words), default=0.0)
+                offer(i, text, confidence, method, line_words)
+            if debug:
+                print(f"[DEBUG] Line pass {method} '{config[:10]}' ({layout} layout, {len(jobs)} strips, "
+                      f"{elapsed * 1000:.1f} ms): {[r and (r['text'], round(r['confidence'])) for r in reads]}")
+        
+        if any(read is None for read in reads):
+            return None
+        # Stats of every line, from one scan of its text
+        slot_stats = [lex_line(read["text"]).stats for read in reads]
+        illegal = [False] * len(reads)
+        if self.value_recheck:
+            # Pass words are in strip coordinates - only the whole-crop words can locate the value
+            slot_words = [read["words"] if read["source"] == 'data' else [] for read in reads]
+            texts = self._recheck_values(gray, [read["text"] for read in reads], slot_words, slot_rows, engine, debug)
+            for i, text in enumerate(texts):
+                if text != reads[i]["text"]:
+                    reads[i] = dict(reads[i], text=text, source=reads[i]["source"] + '+value')
+                    slot_stats[i] = lex_line(text).stats
+            illegal = [any(not is_legal_value(token.stat, token.value) for token in stats) for stats in slot_stats]
+        for i, read in enumerate(reads):
+            if read["confidence"] < self.min_line_confidence or known[i] or illegal[i]:
+                # Never teach the atlas or the dictionary a line whose value can't exist
+                continue
+            if matcher is not None and not read["source"].startswith('glyph') and len(raw_strips[i]) == 1:
+                # Confident Tesseract read: teach the glyph atlas this line's characters
+                matcher.learn(raw_strips[i][0], read["text"])
+            if dictionary is not None:
+                # Remember the line image with its parsed stats
+                dictionary.add(slot_keys[i], read["text"], [(token.stat, token.value) for token in slot_stats[i]])
+        
+        slot_texts = [read["text"] for read in reads]
+        self.last_line_slots = slot_texts
+        self.last_read = self._build_read('segmented', reads)
+        self.last_frame = dict(frame_info, method='segmented', layout=layout)
+        return '\n'.join(slot_texts) + '\n'
+
+    def _recheck_values(self, gray, texts, slot_words, slot_rows=None, engine=None, debug=False):
+        """
+        Numbers-only second look at lines whose parsed value can't exist for their stat (see value_reader.py).
+        
+        The value column is located from the line's words (crop coordinates) or, for a single-row slot,
+        from the glyph clusters of its row; only that region is read again - glyph atlas first, then
+        Tesseract with a digits/sign/percent whitelist.
+        
+        Args:
+            gray: Grayscale crop the words and rows refer to
+            texts: Line texts in slot order
+            slot_words: Words of every line (empty lists where the words can't be used)
+            slot_rows: Rows of every slot (see line_segmentation.segment_lines()), or None
+        
+        Returns:
+            The line texts, with the value replaced where the second read gave a legal one
+        """
+        from src.translate_ocr_results import lex_line, is_legal_value, get_all_stats_from_line
+        texts = list(texts)
+        matcher = get_glyph_matcher() if self.glyph_matching else None
+        started = time.perf_counter()
+        checked = 0
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            stats = lex_line(text).stats
+            # Illegal value, or a value the percent fixes turned into nothing ("+55%" -> "+%%%")
+            if not (any(not is_legal_value(token.stat, token.value) for token in stats) or
+                    (get_all_stats_from_line(text) and not stats)):
+                continue
+            box = value_box_from_words(slot_words[i]) if slot_words[i] else None
+            if box is None and slot_rows is not None and len(slot_rows[i]) == 1:
+                box = value_box_from_pixels(gray, slot_rows[i][0])
+            crop, line_extent = value_crop(gray, box) if box is not None else (None, None)
+            if crop is None:
+                continue
+            checked += 1
+            
+            def legal_line(value_text):
+                for value in value_candidates(value_text):
+                    candidate = replace_value(text, value)
+                    stats = lex_line(candidate).stats
+                    if stats and all(is_legal_value(token.stat, token.value) for token in stats):
+                        return candidate
+                return None
+            
+            fixed = None
+            if matcher is not None:
+                value_text, confidences = matcher.recognize(crop, line_extent)
+                if confidences and min(confidences) >= self.glyph_min_confidence:
+                    self.last_segment_attempts.append({"slot": i, "method": 'value-glyph', "text": value_text,
+                                                       "confidence": min(confidences) * 100.0})
+                    fixed = legal_line(value_text)
+            if fixed is None:
+                try:
+                    value_text = (engine or get_ocr_engine()).image_to_string(prepare_for_ocr(crop), config=VALUE_OCR_CONFIG)
+                except Exception as e:
+                    value_text = ""
+                    if debug:
+                        print(f"[DEBUG] Value re-read of line {i + 1} failed: {e}")
+                self.last_segment_attempts.append({"slot": i, "method": 'value', "text": value_text.strip(),
+                                                   "confidence": None})
+                fixed = legal_line(value_text)
+            if debug:
+                print(f"[DEBUG] Line {i + 1} value re-read: {repr(text)} -> {repr(fixed)}")
+            if fixed is not None:
+                texts[i] = fixed
+        if checked:
+            self.last_segment_passes.append(('value', time.perf_counter() - started))
+        return texts
+
+    def _cascade_slots(self, roi, image, words, engine=None, debug=False):
+        """
+        Potential lines of an accepted cascade read (see line_assembler.py), with illegal values re-read.
+        
+        Args:
+            roi: Captured ROI of the roll
+            image: Image the words were read from (may be a rescaled preprocessed ROI)
+            words: Words of the accepted read
+        
+        Returns:
+            Tuple (lines, changed): the 3 slot lines, and whether a value was replaced
+        """
+        lines = assemble_lines(words)
+        if not self.value_recheck:
+            return lines, False
+        gray = roi if roi.ndim == 2 else cv.cvtColor(roi, cv.COLOR_BGR2GRAY)
+        # Preprocessing may rescale the ROI - bring the boxes back to ROI coordinates
+        fx, fy = image.shape[1] / float(gray.shape[1]), image.shape[0] / float(gray.shape[0])
+        scaled = [dict(w, left=w["left"] / fx, top=w["top"] / fy, width=w["width"] / fx, height=w["height"] / fy)
+                  for w in words]
+        checked = self._recheck_values(gray, lines, assemble_line_words(scaled), engine=engine, debug=debug)
+        return checked, checked != lines
+
+    def _cascade_reads(self, attempt, texts=None):
+        """
+        Per-line reads of a full-block cascade attempt, for _build_read().
+        
+        The attempt's words are assembled into the line slots (see line_assembler.py); a line's
+        confidence is that of its least confident word. Under a character whitelist Tesseract reports
+        0 for every word, so whitelist reads count as not measured (None) instead of low confidence.
+        
+        Args:
+            attempt: Entry of self.last_attempts
+            texts: Final line texts in slot order (after the value recheck), or None for the assembled lines
+        """
+        lines = assemble_lines(attempt["words"])
+        line_words = assemble_line_words(attempt["words"])
+        if texts is None:
+            texts = lines
+        measured = OCR_WHITELIST not in attempt["config"]
+        return [{"text": text,
+                 "confidence": min((w["conf"] for w in words), default=0.0) if measured else None,
+                 "source": attempt["method"] if text == line else attempt["method"] + '+value'}
+                for text, line, words in zip(texts, lines, line_words)]
+    
+    def _build_read(self, path, reads):
+        """
+        Structured result of a roll for bot_logic: per-line text, confidence (0-100, None if not measured)
+        and source, plus the indexes of the lines below min_line_confidence.
+        """
+        lines = [{"text": r["text"], "confidence": r["confidence"], "source": r["source"]} for r in reads]
+        measured = [line["confidence"] for line in lines if line["confidence"] is not None]
+        low = [i for i, line in enumerate(lines)
+               if line["confidence"] is not None and line["confidence"] < self.min_line_confidence]
+        return {
+            "path": path,
+            "lines": lines,
+            "confidence": min(measured) if measured else None,
+            "low_confidence_lines": low,
+            "threshold": self.min_line_confidence,
+        }
+
+    def _build_trace(self, path, accepted_by, valid_lines, roll_started):
+        """
+        Per-roll trace of the OCR work: which candidates ran, what they parsed and how long they took.
+        
+        Args:
+            path: 'segmented' (line by line) or 'cascade' (full-block candidates)
+            accepted_by: Candidate id of the accepted read, or None if nothing parsed completely
+            valid_lines: Potential lines found in the returned text
+            roll_started: perf_counter() at the start of get_ocr_result()
+        """
+        attempts = [(candidate_id(a["method"], a["config"]), a["valid_lines"], a["time"]) for a in self.last_attempts]
+        return {
+            "path": path,
+            "accepted": accepted_by,
+            "valid_lines": valid_lines,
+            "candidates_tried": len(attempts),
+            "line_reads": len(self.last_segment_attempts or []),
+            "line_passes": list(self.last_segment_passes or []),
+            "attempts": attempts,
+            "total_time": time.perf_counter() - roll_started,
+        }
+
+    def enable_parallel_ocr(self, workers=None, top_k=DEFAULT_TOP_K, backend='auto'):
+        """
+        Race the cascade candidates after the first one on a warm process pool (see ocr_pool.py).
+        
+        Args:
+            workers: Worker processes (default: CPU count - 1)
+            top_k: Candidates sent to the pool at once
+            backend: OCR backend the workers load
+        """
+        self.ocr_pool = get_ocr_pool(workers=workers, backend=backend)
+        self.parallel_top_k = max(1, top_k)
+    
+    def disable_parallel_ocr(self):
+        """Go back to the sequential cascade (the shared pool stays warm for the next run)"""
+        self.ocr_pool = None
+    
+    def _run_parallel_batch(self, batch, roi, frame_info, processed_images, debug=False):
+        """
+        OCR a batch of candidates on the worker pool. The first read that parses into the expected
+        number of potential lines wins.
+        
+        Returns:
+            Tuple (text, candidate id) of the accepted read, or (None, None) if no read of the batch
+            parsed (the cascade goes on); the accepted read's lines go to self.last_line_slots
+        """
+        from src.translate_ocr_results import count_valid_lines
+        jobs = []
+        for method, config, desc in batch:
+            image = self._candidate_image(method, roi, frame_info, processed_images, debug=debug)
+            if image is not None:
+                jobs.append((f"{method} ({desc})", image, config))
+        if not jobs:
+            return None, None
+        
+        winner, results = self.ocr_pool.run_speculative(
+            jobs, accept=lambda data: count_valid_lines(words_to_text(data_to_words(data))) >= self.expected_lines,
+            cache=get_ocr_cache(), kind='data')
+        by_index = {}
+        for job_index, data, seconds in results:
+            method = jobs[job_index][0].split(' ', 1)[0]
+            words = data_to_words(data)
+            text = words_to_text(words)
+            self.last_attempts.append({"method": method, "config": jobs[job_index][2], "text": text,
+                                       "time": seconds or 0.0, "cached": seconds is None,
+                                       "valid_lines": count_valid_lines(text), "words": words})
+            by_index[job_index] = (text, words)
+        if debug:
+            print(f"[DEBUG] Parallel OCR batch of {len(jobs)}: {len(results)} finished, winner={winner}")
+        
+        if winner is None:
+            return None, None
+        method = jobs[winner][0].split(' ', 1)[0]
+        self.last_frame = dict(frame_info, method=method)
+        text, words = by_index[winner]
+        self.last_line_slots, changed = self._cascade_slots(roi, jobs[winner][1], words, debug=debug)
+        if changed:
+            text = '\n'.join(self.last_line_slots) + '\n'
+        return text, candidate_id(method, jobs[winner][2])
+
     def get_ocr_result(self, debug=False, processing_method='adaptive'):
         # Try multiple processing methods - start with simplest first
         # Order: simple (no processing) -> adaptive -> numbers (for better number recognition) -> fixed -> original
@@ -200,185 +898,150 @@ class potlines:
                 methods_to_try.remove(processing_method)
                 methods_to_try.insert(0, processing_method)
         
-        # Also try raw image (just cropped, no processing at all)
+        from src.translate_ocr_results import count_valid_lines
+        roll_started = time.perf_counter()
         last_result = ""
+        self.last_frame = None
+        self.last_attempts = []
+        self.last_trace = None
+        self.last_read = None
+        self.last_line_slots = None
+        self.last_segment_attempts = []
+        self.last_segment_passes = []
+        engine = get_ocr_engine()  # Persistent tesserocr handle if available, pytesseract otherwise
         
-        # First, try raw cropped image without any processing
+        # Capture the ROI ONCE per roll - every variant below (raw and processed) reads this buffer,
+        # so the fallbacks can't end up looking at a different frame than the raw pass did
         try:
+            roi, frame_info = self.capture_roi(debug=debug)
+        except Exception as e:
             if debug:
-                print(f"[DEBUG] Trying raw cropped image (no processing)")
-            
-            # Get FRESH screenshot (from window or test image)
-            # This ensures we always get the latest state, not a cached image
-            # Clear any cached screenshot first
-            self.last_screenshot = None
-            if self.test_image_path:
-                if debug:
-                    print(f"[DEBUG] Using test image: {self.test_image_path}")
-                raw_screenshot = cv.imread(self.test_image_path)
-                if raw_screenshot is None:
-                    raise Exception(f"Failed to load test image: {self.test_image_path}")
-            else:
-                # Always take a fresh screenshot - don't use cached image
-                # No delay needed - screenshot is fast and window should be updated after click
-                if debug:
-                    print(f"[DEBUG] Taking fresh screenshot from window: {self.wincap.window_name if self.wincap else 'None'}")
-                    print(f"[DEBUG] Window handle: {self.wincap.hwnd if self.wincap else 'None'}")
-                raw_screenshot = self.wincap.get_screenshot()
+                print(f"[DEBUG] Error capturing frame: {e}")
+            return ""
+        
+        # Line by line first: only lines that fail get retried, and double lines are joined by layout
+        if self.line_segmentation:
+            try:
+                segmented = self._ocr_segmented(roi, frame_info, engine, debug=debug)
+            except Exception as e:
+                segmented = None
                 if debug:
-                    print(f"[DEBUG] Screenshot captured successfully, shape: {raw_screenshot.shape if raw_screenshot is not None else 'None'}")
-                    # Only save debug images in debug mode and only on first call (not every retry)
-                    if debug and not hasattr(self, '_debug_image_saved'):
-                        try:
-                            cv.imwrite('debug_current_capture.png', raw_screenshot)
-                            print(f"[DEBUG] Saved current screenshot to: debug_current_capture.png")
-                            self._debug_image_saved = True
-                        except Exception as e:
-                            print(f"[DEBUG] Could not save debug screenshot: {e}")
-            
-            # Store screenshot for potential saving when bot stops (don't save during iterations)
-            # Only store if we successfully got a screenshot
-            if raw_screenshot is not None:
-                self.last_screenshot = raw_screenshot.copy()
-            
-            # Auto-detect crop region if enabled and not already set
-            # (This should already be set from __init__() or screenshot(), but check again just in case)
-            if self.auto_detect_crop and self.crop_region is None:
+                    print(f"[DEBUG] Line segmentation failed: {e}")
+            if segmented is not None:
                 if debug:
-                    print(f"[DEBUG] Auto-detecting crop region from raw screenshot...")
-                result = detect_potential_region(raw_screenshot, debug=debug, cube_type=self.cube_type)
-                if result:
-                    # detect_potential_region returns ((crop_x, crop_y, crop_w, crop_h), (reset_x, reset_y, reset_w, reset_h) or None)
-                    crop_region, reset_pos = result
-                    self.crop_region = crop_region
-                    self.reset_button_pos = reset_pos
-                    if debug:
-                        print(f"[DEBUG] Auto-detected crop region: {self.crop_region}")
-                        if reset_pos:
-                            print(f"[DEBUG] Auto-detected Reset button position: {reset_pos}")
-                else:
-                    if debug:
-                        print(f"[DEBUG] Warning: Could not auto-detect crop region, using full image")
-            
+                    print(f"[DEBUG] Success with line segmentation: {repr(segmented)}")
+                self.last_trace = self._build_trace('segmented', 'segmented', self.expected_lines, roll_started)
+                return segmented
+        
+        # Flat cascade of (method, config) candidates: the raw crop first (grayscale only, no processing),
+        # then every processing method with the PSM configs
+        candidates = [('raw', config, desc) for config, desc in RAW_OCR_CONFIGS]
+        for method in methods_to_try:
+            candidates.extend((method, config, desc) for config, desc in PROCESSED_OCR_CONFIGS)
+        
+        # Learned order: candidates that usually give a parseable 3-line read (and are fast) go first
+        profile = None
+        profile_key = None
+        if self.adaptive_ocr:
+            profile = get_strategy_profile()
+            profile_key = profile.make_key(self.source.width, self.source.height, self.cube_type)
+            candidates = profile.order(profile_key, candidates)
             if debug:
-                print(f"[DEBUG] Crop region status: auto_detect_crop={self.auto_detect_crop}, crop_region={self.crop_region}")
-                print(f"[DEBUG] Raw screenshot shape before cropping: {raw_screenshot.shape if raw_screenshot is not None else 'None'}")
-            
-            if self.crop_region:
-                raw_screenshot = self.crop_image(raw_screenshot, debug=debug)
-                if debug:
-                    print(f"[DEBUG] Raw screenshot shape after cropping: {raw_screenshot.shape if raw_screenshot is not None else 'None'}")
-                    # Only save debug images in debug mode and only on first call
-                    if debug and not hasattr(self, '_debug_cropped_saved'):
-                        try:
-                            cv.imwrite('debug_current_cropped.png', raw_screenshot)
-                            print(f"[DEBUG] Saved cropped screenshot to: debug_current_cropped.png")
-                            self._debug_cropped_saved = True
-                        except Exception as e:
-                            print(f"[DEBUG] Could not save cropped debug screenshot: {e}")
-            else:
+                print(f"[DEBUG] Cascade order for {profile_key}: {[candidate_id(m, c)[:40] for m, c, _ in candidates[:4]]} ...")
+        
+        processed_images = {}  # method -> preprocessed image (each method runs at most once per roll)
+        result = ""
+        accepted = None
+        accepted_by = None
+        index = 0
+        cascade_started = time.perf_counter()  # The budget is the cascade's own: the line passes above don't use it up
+        while index < len(candidates) and accepted is None:
+            if index > 0 and time.perf_counter() - cascade_started > self.cascade_budget:
                 if debug:
-                    print(f"[DEBUG] No crop region set - using full image")
-            # Convert to grayscale only
-            raw_gray = cv.cvtColor(raw_screenshot, cv.COLOR_BGR2GRAY)
+                    print(f"[DEBUG] OCR cascade budget ({self.cascade_budget}s) used up after {index} candidates")
+                break
+            if self.ocr_pool is not None and index > 0:
+                # The first candidate didn't do it - race the next top-K on the worker pool
+                batch = candidates[index:index + self.parallel_top_k]
+                index += len(batch)
+                accepted, accepted_by = self._run_parallel_batch(batch, roi, frame_info, processed_images, debug=debug)
+                continue
             
-            # Try OCR on raw image with multiple configs for better number recognition
-            raw_result = ""
-            raw_configs = [
-                ('--psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz+%: ', 'raw with whitelist'),
-                ('--psm 6', 'raw standard'),
-                ('--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz+%: ', 'raw single line'),
-            ]
-            for config, desc in raw_configs:
-                try:
-                    ocr_config = tesseract_config.wrap_tesseract_config(config)
-                    test_result = pytesseract.image_to_string(raw_gray, config=ocr_config)
-                    if test_result and len(test_result.strip()) > len(raw_result.strip()):
-                        raw_result = test_result
-                        if debug:
-                            print(f"[DEBUG] Raw OCR with {desc}: {repr(test_result[:50])}")
-                        if len(raw_result.strip()) > 2:
-                            break
-                except Exception as e:
-                    try:
-                        from src.translate_ocr_results import set_last_ocr_error
-                        set_last_ocr_error(f"Tesseract OCR failed ({desc}): {e}")
-                    except Exception:
-                        pass
-                    if debug:
-                        print(f"[DEBUG] Error with {desc}: {e}")
-                    continue
-            if raw_result and len(raw_result.strip()) > 2:
-                if debug:
-                    print(f"[DEBUG] Success with raw image: {repr(raw_result[:100])}")
-                return raw_result  # Early return - skip all processing methods
-            elif raw_result:
-                last_result = raw_result
-        except Exception as e:
-            if debug:
-                print(f"[DEBUG] Error trying raw image: {e}")
-        
-        # Now try processed images
-        for method in methods_to_try:
+            method, config, desc = candidates[index]
+            index += 1
+            ocr_image = self._candidate_image(method, roi, frame_info, processed_images, debug=debug)
+            if ocr_image is None:
+                continue
+            
+            started = time.perf_counter()
             try:
-                self.screenshot(debug=debug, processing_method=method)
-                if debug:
-                    print(f"[DEBUG] Trying OCR with method: {method}")
-                    print(f"[DEBUG] Image shape: {self.image.shape if self.image is not None else 'None'}")
-                    print(f"[DEBUG] Image dtype: {self.image.dtype if self.image is not None else 'None'}")
-                
-                # Try OCR with optimized configuration (fewer PSM modes for speed)
-                # PSM 6 works best for this use case (uniform block of text)
-                # Add configs that prioritize number recognition
-                psm_configs = [
-                    ('--psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz+%: ', 'uniform block with whitelist'),  # Best for this use case with number focus
-                    ('--psm 6', 'uniform block'),  # Best for this use case
-                    ('--psm 11', 'sparse text'),   # Fallback if PSM 6 fails
-                    ('--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz+%: ', 'single line with whitelist'),  # Single line with number focus
-                ]
-                
-                result = ""
-                for psm_config, desc in psm_configs:
-                    try:
-                        ocr_config = tesseract_config.wrap_tesseract_config(psm_config)
-                        test_result = pytesseract.image_to_string(self.image, config=ocr_config)
-                        if test_result and len(test_result.strip()) > len(result.strip()):
-                            result = test_result
-                            if debug and result.strip():
-                                print(f"[DEBUG] Best result so far from PSM {psm_config}: {repr(result[:50])}")
-                            # Early exit if we get a good result
-                            if result and len(result.strip()) > 2:
-                                break
-                    except Exception as e:
-                        try:
-                            from src.translate_ocr_results import set_last_ocr_error
-                            set_last_ocr_error(f"Tesseract OCR failed ({desc}): {e}")
-                        except Exception:
-                            pass
-                        continue
-                
-                # Check if result has meaningful content (more than just 1-2 characters)
-                if result and len(result.strip()) > 2:
-                    if debug:
-                        print(f"[DEBUG] Success with method: {method}")
-                        print(f"[DEBUG] OCR result length: {len(result)}")
-                        print(f"[DEBUG] OCR result (first 100 chars): {repr(result[:100])}")
-                    return result
-                elif result and len(result.strip()) > 0:
-                    # Keep track of partial results but continue trying
-                    if len(result.strip()) > len(last_result.strip()):
-                        last_result = result
-                    if debug:
-                        print(f"[DEBUG] Method {method} returned partial result: {repr(result)}")
-                else:
-                    if debug:
-                        print(f"[DEBUG] Method {method} returned empty result")
+                # Word boxes, not just text: the accepted read's lines are assembled by layout
+                data, cached = engine.image_to_data_cached(ocr_image, config=config)
+                words = data_to_words(data)
+                result = words_to_text(words)
             except Exception as e:
+                try:
+                    from src.translate_ocr_results import set_last_ocr_error
+                    set_last_ocr_error(f"Tesseract OCR failed ({desc}): {e}")
+                except Exception:
+                    pass
                 if debug:
-                    print(f"[DEBUG] Error with method {method}: {e}")
+                    print(f"[DEBUG] Error with {method} {desc}: {e}")
                 continue
+            elapsed = time.perf_counter() - started
+            valid_lines = count_valid_lines(result)
+            self.last_attempts.append({"method": method, "config": config, "text": result, "time": elapsed,
+                                       "cached": cached, "valid_lines": valid_lines, "words": words})
+            
+            # Semantic early exit: stop only when the parser finds every potential line in the read
+            if valid_lines >= self.expected_lines:
+                if debug:
+                    print(f"[DEBUG] Success with {method} ({desc}): {repr(result[:100])}")
+                self.last_frame = dict(frame_info, method=method)
+                accepted = result
+                accepted_by = candidate_id(method, config)
+                self.last_line_slots, changed = self._cascade_slots(roi, ocr_image, words, engine, debug=debug)
+                if changed:
+                    accepted = '\n'.join(self.last_line_slots) + '\n'
+            elif debug:
+                print(f"[DEBUG] {method} ({desc}) parsed {valid_lines}/{self.expected_lines} lines, trying next: {repr(result[:100])}")
+        
+        if accepted is None:
+            # Nothing parsed completely - fall back to the read with the most valid lines (longest on ties,
+            # also covers reads from parallel batches), so process_lines still gets the best partial read
+            best_key = (0, 0)
+            best_attempt = None
+            for attempt in self.last_attempts:
+                text = attempt["text"]
+                key = (attempt["valid_lines"], len(text.strip()) if text else 0)
+                if text and key > best_key:
+                    best_key = key
+                    best_attempt = attempt
+                    last_result = text
+                    self.last_frame = dict(frame_info, method=attempt["method"])
+            reads = self._cascade_reads(best_attempt) if best_attempt is not None else []
+        else:
+            attempt = next(a for a in self.last_attempts if candidate_id(a["method"], a["config"]) == accepted_by)
+            reads = self._cascade_reads(attempt, self.last_line_slots)
+        
+        # Only engine calls are learned from: a cached read takes ~0 s and would push whatever
+        # candidate happened to be cached to the front of the order
+        engine_attempts = [a for a in self.last_attempts if not a["cached"]]
+        if profile is not None and engine_attempts:
+            # Success = the read parses into the expected potential lines, not just "some text"
+            profile.record(profile_key, [
+                (candidate_id(a["method"], a["config"]), a["valid_lines"] >= self.expected_lines, a["time"])
+                for a in engine_attempts
+            ])
+        self.last_read = self._build_read('cascade', reads)
+        self.last_trace = self._build_trace('cascade', accepted_by, count_valid_lines(accepted or last_result),
+                                            roll_started)
+        if accepted is not None:
+            return accepted
         
         # If all methods failed, return last result (might be empty)
+        if self.last_frame is None:
+            self.last_frame = dict(frame_info, method=None)
         if debug:
             print(f"[DEBUG] All processing methods failed, returning last result")
             print(f"[DEBUG] Final OCR result length: {len(last_result) if last_result else 0}")
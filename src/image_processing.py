@@ -7,6 +7,9 @@ def invert_image(image):
     return cv.bitwise_not(image)
 
 def greyscale(image):
+    # ROI captures can already be single-channel
+    if image.ndim == 2:
+        return image
     return cv.cvtColor(image, cv.COLOR_BGR2GRAY)
 
 def adjust_threshold_fixed(gray_image, threshold=127):
@@ -71,7 +74,7 @@ def image_process(image, method='adaptive'):
     Process image for OCR with multiple methods.
     
     Args:
-        image: Input image (BGR format from window capture)
+        image: Input image (BGR or grayscale from window capture)
         method: Processing method - 'adaptive', 'fixed', 'simple', or 'original'
     
     Returns:
@@ -0,0 +1,97 @@
+"""
+Assemble the 3 potential lines from word boxes.
+
+Instead of guessing from the text which OCR output lines belong together (set_lines()), the words
+of one image_to_data result (see ocr_engine.data_to_words()) are grouped into text rows by their
+vertical position, and rows are grouped into line slots by layout - the same rule
+line_segmentation.group_rows() applies to pixel rows: a wrapped double line ("Attacks ignore 30%
+Monster" / "Defense") is a short row that sits closer to the row above it than lines sit to each
+other. The result is always exactly 3 lines in slot order, and the same boxes always give the same
+lines.
+"""
+from src.line_segmentation import LINE_SLOTS, WRAP_RIGHT_MARGIN, CONTINUATION_MAX_WIDTH
+
+ROW_OVERLAP = 0.5  # A word joins a row if it overlaps the row vertically by this fraction of its height
+
+
+def group_word_rows(words):
+    """
+    Group words into text rows by vertical overlap.
+
+    Returns:
+        List of rows top to bottom, each a dict with words (left to right), top, bottom, left, right
+    """
+    rows = []
+    for word in sorted(words, key=lambda w: (w["top"] + w["height"] / 2.0, w["left"])):
+        top, bottom = word["top"], word["top"] + word["height"]
+        for row in rows:
+            overlap = min(bottom, row["bottom"]) - max(top, row["top"])
+            if overlap >= ROW_OVERLAP * min(word["height"], row["bottom"] - row["top"]):
+                row["words"].append(word)
+                row["top"], row["bottom"] = min(row["top"], top), max(row["bottom"], bottom)
+                row["left"] = min(row["left"], word["left"])
+                row["right"] = max(row["right"], word["left"] + word["width"])
+                break
+        else:
+            rows.append({"words": [word], "top": top, "bottom": bottom,
+                         "left": word["left"], "right": word["left"] + word["width"]})
+    rows.sort(key=lambda r: r["top"])
+    for row in rows:
+        row["words"].sort(key=lambda w: w["left"])
+    return rows
+
+
+def row_text(row):
+    return ' '.join(w["text"] for w in row["words"])
+
+
+def words_to_text(words):
+    """Plain text of a word list, one text row per line (what image_to_string would return)"""
+    return '\n'.join(row_text(row) for row in group_word_rows(words))
+
+
+def assemble_line_rows(words, slots=LINE_SLOTS):
+    """
+    Group word rows into the potential line slots.
+
+    Rows without any letter or digit (stray marks) are dropped; while there are more rows than
+    slots, the tightest pair whose second row looks like a continuation is merged into one line.
+
+    Returns:
+        List of up to `slots` lists of rows (see group_word_rows()) in slot order
+    """
+    rows = [row for row in group_word_rows(words) if any(c.isalnum() for c in row_text(row))]
+    if rows:
+        full_width = max(row["right"] for row in rows) - min(row["left"] for row in rows)
+        right_edge = max(row["right"] for row in rows)
+    grouped = [[row] for row in rows]
+    while len(grouped) > slots:
+        best = None
+        for i in range(len(grouped) - 1):
+            previous, following = grouped[i][-1], grouped[i + 1][0]
+            gap = following["top"] - previous["bottom"]
+            continuation = (following["right"] - following["left"] <= full_width * CONTINUATION_MAX_WIDTH or
+                            previous["right"] >= right_edge - full_width * WRAP_RIGHT_MARGIN)
+            score = (not continuation, gap)
+            if best is None or score < best[0]:
+                best = (score, i)
+        i = best[1]
+        grouped[i:i + 2] = [grouped[i] + grouped[i + 1]]
+    return grouped
+
+
+def assemble_lines(words, slots=LINE_SLOTS):
+    """
+    Build the potential lines from word boxes (see assemble_line_rows()).
+
+    Returns:
+        List of exactly `slots` strings in slot order ('' for slots without text)
+    """
+    lines = [' '.join(row_text(row) for row in group) for group in assemble_line_rows(words, slots)]
+    return lines + [''] * (slots - len(lines))
+
+
+def assemble_line_words(words, slots=LINE_SLOTS):
+    """Words of every potential line (see assemble_line_rows()), `slots` lists in slot order"""
+    grouped = [[w for row in group for w in row["words"]] for group in assemble_line_rows(words, slots)]
+    return grouped + [[] for _ in range(slots - len(grouped))]
@@ -0,0 +1,297 @@
+"""
+Catalog of every potential line the bot knows.
+
+Each line kind (STR %, Boss Damage, the first half of the IED double line, flat DEX, a Decent
+skill, ...) has its text templates - the canonical spelling first, then the other spellings the
+game/OCR show for it - and, for the stats the bot reads, the values it can roll. Generated from it:
+
+- legal_stat_values (the values a stat can have at all, any cube and item tier), used by the
+  stat lexer to spot misread numbers
+- the known line lists of translate_ocr_results/bot_logic
+- the stat name spellings (STAT_NAMES) the stat patterns of translate_ocr_results and the lexer
+  are built from
+
+Decoding matches an OCR line to a template, never to a value: the line is reduced to a key (upper
+case, no spaces or colons) with one of its numbers (the last first) replaced by '#', and those
+keys are looked up in a dict of the template keys. Only on a miss is the nearest template searched
+by edit distance, within MAX_DISTANCE_RATIO of the key length, among the templates with the same
+unit ('%', 'sec' or none - a flat "DEX: +12" is never matched to "DEX: +12%"). Equally near
+templates of different lines or values, or a nearest template whose kind can't have the value as
+read, leave the line undecoded.
+Snapping writes the line as its template with the value exactly as read.
+"""
+import re
+import threading
+from collections import namedtuple, OrderedDict
+
+MAX_DISTANCE_RATIO = 0.2  # Edits allowed per key character (at least 1)
+DECODE_CACHE_SIZE = 1024  # Decoded template keys kept per catalog
+MAX_VALUE_DIGITS = 4  # Longer digit runs are garbage, not a value
+
+# Values a potential line can have, per stat (union over cube types, tiers and item levels)
+legal_stat_values = {
+    "STR": {3, 4, 6, 7, 9, 10, 12, 13},
+    "DEX": {3, 4, 6, 7, 9, 10, 12, 13},
+    "INT": {3, 4, 6, 7, 9, 10, 12, 13},
+    "LUK": {3, 4, 6, 7, 9, 10, 12, 13},
+    "ALL": {3, 4, 5, 6, 7, 9, 10},
+    "ATT": {3, 4, 6, 7, 9, 10, 12, 13},
+    "MATT": {3, 4, 6, 7, 9, 10, 12, 13},
+    "BD": {20, 25, 30, 35, 40},
+    "CD": {1, 2, 3, 4, 5, 6, 7, 8},
+    "IED": {15, 20, 25, 30, 35, 40, 45, 50},
+}
+
+# What follows a stat name on a line; group 1 is the number
+PERCENT_VALUE = r'\s*:?\s*\+?(\d+)%+'  # "STR: +9%", "STR +9%", "STR:9%"
+SECONDS_VALUE = r'\s*:?\s*-(\d+)\s*sec'  # "Skill Cooldowns: -2 sec"
+DOUBLE_LINE_VALUE = r'\s+(\d+)%\s+Monster(?:\s+Defense)?'  # "Attacks ignore 30% Monster"
+
+# Name spellings of the stats the bot reads (with the OCR misspellings seen in practice), most
+# preferred first, each with the value that follows it. STR/DEX/INT/LUK need a word boundary in
+# front, ATT must not be the end of "Magic ATT"
+STAT_NAMES = {
+    "STR": ((r'\bSTR', PERCENT_VALUE),),
+    "DEX": ((r'\bDEX', PERCENT_VALUE),),
+    "INT": ((r'\bINT', PERCENT_VALUE),),
+    "LUK": ((r'\bLUK', PERCENT_VALUE),),
+    "ALL": ((r'All\s+Stats', PERCENT_VALUE), (r'All', PERCENT_VALUE), (r'Allstats', PERCENT_VALUE),
+            (r'Alistats', PERCENT_VALUE), (r'Alstats', PERCENT_VALUE)),
+    "ATT": ((r'(?<!Magic\s)ATT', PERCENT_VALUE), (r'(?<!Magic\s)A[ti]tack\s+Power', PERCENT_VALUE),
+            (r'(?<!Magic)A[ti]tackPower', PERCENT_VALUE)),
+    "MATT": ((r'Magic\s+ATT', PERCENT_VALUE), (r'MagicATT', PERCENT_VALUE),
+             (r'Magic\s+A[ti]tack\s+Power', PERCENT_VALUE), (r'MagicA[ti]tackPower', PERCENT_VALUE)),
+    "BD": ((r'BossDamage', PERCENT_VALUE), (r'Boss\s+Damage', PERCENT_VALUE), (r'[BGx]ossDamage', PERCENT_VALUE),
+           (r'[BGx]oss\s+Damage', PERCENT_VALUE), (r'B[Gx]ossDamage', PERCENT_VALUE),
+           (r'B[Gx]oss\s+Damage', PERCENT_VALUE)),
+    "CD": ((r'CriticalDamage', PERCENT_VALUE), (r'Critical\s+Damage', PERCENT_VALUE)),
+    "IED": ((r'Ign[aoe]r[ae]Defense', PERCENT_VALUE), (r'Ign[aoe]r[ae]\s+Defense', PERCENT_VALUE),
+            (r'Attacks\s+ignore', DOUBLE_LINE_VALUE)),
+    "SC": ((r'Skill\s+[Cc]ooldowns?', SECONDS_VALUE), (r'Skill[Cc]ooldowns?', SECONDS_VALUE)),
+}
+
+DECENT_SKILLS = ("Haste", "Mystic Door", "Sharp Eyes", "Hyper Body", "Combat Orders", "Advanced Blessing",
+                 "Speed Infusion", "Holy Symbol")
+
+# (kind, stat read from it or None, spellings, values or None for any value); a spelling is
+# (template, double) - '{}' is the value (templates without one have no number), double marks the
+# first row of a line the game wraps over two rows
+LINE_KINDS = (
+    ("STR", "STR", (("STR: +{}%", False),), legal_stat_values["STR"]),
+    ("DEX", "DEX", (("DEX: +{}%", False),), legal_stat_values["DEX"]),
+    ("INT", "INT", (("INT: +{}%", False),), legal_stat_values["INT"]),
+    ("LUK", "LUK", (("LUK: +{}%", False),), legal_stat_values["LUK"]),
+    ("ALL", "ALL", (("All Stats: +{}%", False),), legal_stat_values["ALL"]),
+    ("ATT", "ATT", (("ATT: +{}%", False), ("Attack Power: +{}%", False), ("Attack Power +{}%", False)),
+     legal_stat_values["ATT"]),
+    ("MATT", "MATT", (("Magic ATT: +{}%", False), ("Magic Attack Power: +{}%", False)), legal_stat_values["MATT"]),
+    ("BD", "BD", (("Boss Damage: +{}%", False),), legal_stat_values["BD"]),
+    ("CD", "CD", (("Critical Damage: +{}%", False),), legal_stat_values["CD"]),
+    ("IED", "IED", (("Ignore Defense: +{}%", False), ("Attacks ignore {}% Monster Defense", False),
+                    ("Attacks ignore {}% Monster", True)), legal_stat_values["IED"]),
+    ("IA", None, (("Item Acquisition Rate: +{}%", False), ("tem Acquisition Rate: +{}%", False)), {10, 12}),
+    ("DROP", None, (("Item Drop Rate: +{}%", False),), {20}),
+    ("MESO", None, (("Mesos Obtained: +{}%", False), ("Meso Obtained: +{}%", False)), {20}),
+    ("SC", None, (("Skill Cooldowns: -{} sec", False),), {1, 2}),
+    ("Drop", None, (("Increases Item Drop Rate by a", True),), None),
+    ("MnD", None, (("Increases tem and Meso Drop", True),), None),
+    # Lines the bot reads no stat from
+    ("STR flat", None, (("STR: +{}", False),), None),
+    ("DEX flat", None, (("DEX: +{}", False),), None),
+    ("INT flat", None, (("INT: +{}", False),), None),
+    ("LUK flat", None, (("LUK: +{}", False),), None),
+    ("ALL flat", None, (("All Stats: +{}", False),), None),
+    ("ATT flat", None, (("ATT: +{}", False),), None),
+    ("MATT flat", None, (("Magic ATT: +{}", False),), None),
+    ("HP flat", None, (("Max HP: +{}", False),), None),
+    ("MP flat", None, (("Max MP: +{}", False),), None),
+    ("HP", None, (("Max HP: +{}%", False),), None),
+    ("MP", None, (("Max MP: +{}%", False),), None),
+    ("DEF", None, (("DEF: +{}", False),), None),
+    ("DEF %", None, (("DEF: +{}%", False),), None),
+    ("Speed", None, (("Speed: +{}", False),), None),
+    ("Jump", None, (("Jump: +{}", False),), None),
+    ("CR", None, (("Critical Rate: +{}%", False),), None),
+    ("Damage", None, (("Damage: +{}%", False),), None),
+    ("STR level", None, (("STR per 10 Character Levels: +{}", False),), None),
+    ("DEX level", None, (("DEX per 10 Character Levels: +{}", False),), None),
+    ("INT level", None, (("INT per 10 Character Levels: +{}", False),), None),
+    ("LUK level", None, (("LUK per 10 Character Levels: +{}", False),), None),
+    ("ATT level", None, (("ATT per 10 Character Levels: +{}", False),), None),
+    ("MATT level", None, (("Magic ATT per 10 Character Levels: +{}", False),), None),
+    ("Recovery", None, (("HP Recovery Items and Skills: +{}%", False),), None),
+) + tuple((f"Decent {skill}", None, ((f"Enables the Decent {skill} skill", False),), None) for skill in DECENT_SKILLS)
+
+LineKind = namedtuple('LineKind', ['kind', 'stat', 'values'])
+CatalogSpelling = namedtuple('CatalogSpelling', ['template', 'key', 'double', 'line_kind'])
+CatalogMatch = namedtuple('CatalogMatch', ['text', 'line_kind', 'value', 'distance'])
+
+KEY_STRIP = re.compile(r'[\s:]+')
+KEY_VALUE = re.compile(r'\d+')
+
+
+def line_key(text):
+    """Lookup key of a line: upper case without spaces and colons"""
+    return KEY_STRIP.sub('', text).upper()
+
+
+def template_keys(text):
+    """
+    Lookup keys of a line: its key with one digit run replaced by '#' - each run in turn, the last
+    first (values come after the name) - then the key as it is (lines without a number).
+
+    Returns:
+        List of (key, value as read or None)
+    """
+    key = line_key(text)
+    keys = [(key[:run.start()] + '#' + key[run.end():], run.group(0)) for run in reversed(list(KEY_VALUE.finditer(key)))
+            if len(run.group(0)) <= MAX_VALUE_DIGITS]
+    return keys + [(key, None)]
+
+
+def key_unit(key):
+    if '%' in key:
+        return '%'
+    if key.endswith('SEC'):
+        return 'sec'
+    return ''
+
+
+def edit_distance(a, b, limit=None):
+    """Levenshtein distance; with a limit, any distance above it comes back as limit + 1"""
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class LineCatalog:
+    """Every line template, indexed by template key for decoding"""
+
+    def __init__(self, line_kinds=LINE_KINDS):
+        self.kinds = []
+        self.spellings = []
+        self.by_key = {}  # template key -> spelling
+        self.by_unit = {}  # unit -> spellings, for the edit distance search
+        for kind, stat, templates, values in line_kinds:
+            line_kind = LineKind(kind, stat, frozenset(values) if values is not None else None)
+            self.kinds.append(line_kind)
+            for template, double in templates:
+                key = line_key(template.format('#'))
+                spelling = CatalogSpelling(template, key, double, line_kind)
+                self.spellings.append(spelling)
+                if key in self.by_key:
+                    # Spellings that only differ in spaces/colons ("Attack Power: +9%", "Attack Power +9%")
+                    # decode to the first one
+                    if self.by_key[key].line_kind is not line_kind:
+                        raise ValueError(f"Line templates {self.by_key[key].template!r} and {template!r} have the same key")
+                    continue
+                self.by_key[key] = spelling
+                self.by_unit.setdefault(key_unit(key), []).append(spelling)
+        self._decoded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def texts(self, kind, double=False):
+        """
+        Every line of one kind ('BD', 'IED', ...) with each of its values, single-row spellings or the
+        first rows of double lines
+        """
+        line_kind = next(k for k in self.kinds if k.kind == kind)
+        values = sorted(line_kind.values) if line_kind.values is not None else [None]
+        spellings = [s for s in self.spellings if s.line_kind is line_kind and s.double == double]
+        return [s.template if value is None else s.template.format(value) for value in values for s in spellings]
+
+    def _nearest(self, key):
+        """(spelling, distance) of the one template nearest to a key, or None"""
+        radius = max(1, int(len(key) * MAX_DISTANCE_RATIO))
+        found = []
+        for spelling in self.by_unit.get(key_unit(key), ()):
+            distance = edit_distance(key, spelling.key, radius)
+            if distance <= radius:
+                found.append((distance, spelling))
+        if not found:
+            return None
+        nearest = min(distance for distance, _ in found)
+        kinds = {spelling.line_kind for distance, spelling in found if distance == nearest}
+        if len(kinds) > 1:
+            return None  # Equally near different lines - no way to tell which one it was
+        return next(spelling for distance, spelling in found if distance == nearest), nearest
+
+    def _lookup(self, key):
+        """_nearest() through the cache of decoded keys"""
+        with self._lock:
+            if key in self._decoded:
+                self._decoded.move_to_end(key)
+                return self._decoded[key]
+        found = self._nearest(key)
+        with self._lock:
+            self._decoded[key] = found
+            while len(self._decoded) > DECODE_CACHE_SIZE:
+                self._decoded.popitem(last=False)
+        return found
+
+    def decode(self, text):
+        """
+        Catalog template of a line, with the value as read.
+
+        Returns:
+            CatalogMatch(text, line_kind, value, distance) - text is the template filled in with the
+            value as read - or None if nothing is near enough
+        """
+        keys = template_keys(text or '')
+        if not keys[-1][0]:
+            return None
+        for key, value in keys:
+            spelling = self.by_key.get(key)
+            match = self._match(spelling, value, 0) if spelling is not None else None
+            if match is not None:
+                return match
+        # Not a template as it is: the nearest template of any key, if only one line is that near
+        matches = []
+        for key, value in keys:
+            found = self._lookup(key)
+            match = self._match(found[0], value, found[1]) if found is not None else None
+            if match is not None:
+                matches.append(match)
+        nearest = [match for match in matches if match.distance == min(m.distance for m in matches)]
+        if len({(match.line_kind, match.value) for match in nearest}) != 1:
+            return None
+        return nearest[0]
+
+    def _match(self, spelling, value, distance):
+        """CatalogMatch of a line read as `spelling` with `value`, or None if it can't be that line"""
+        if '{}' not in spelling.template:
+            # A line without a number (that may have picked up a stray digit)
+            return CatalogMatch(spelling.template, spelling.line_kind, None, distance)
+        if value is None:
+            return None
+        if distance and spelling.line_kind.values is not None and int(value) not in spelling.line_kind.values:
+            return None  # A value the nearest line can't have: more likely a line that isn't in the catalog
+        return CatalogMatch(spelling.template.format(value), spelling.line_kind, int(value), distance)
+
+    def snap(self, text):
+        """The line as its catalog template with the value as read, or unchanged if it has none"""
+        match = self.decode(text)
+        return match.text if match is not None else text
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_line_catalog():
+    """Shared LineCatalog"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = LineCatalog()
+        return _catalog
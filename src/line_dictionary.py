@@ -0,0 +1,168 @@
+"""
+Persistent dictionary of potential line images.
+
+Only a few hundred different potential lines exist ("Boss Damage: +40%", "ATT: +9%", ...), and
+the game draws each one identically every time. Every line strip that reads cleanly is stored
+under a perceptual hash of its text mask together with its text and parsed stats, and looked up
+before any OCR - so once the common lines have been seen, most rolls need no OCR call at all.
+
+The hash is an average hash of the binarized text, cropped to the ink and scaled to a fixed
+height: it ignores the strip's position and padding and the background brightness, and small
+anti-aliasing differences don't flip the thresholded cells, while the width stays proportional
+so lines that differ by one digit ("+6%" / "+9%") get different keys.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import cv2 as cv
+import numpy as np
+from src.line_segmentation import text_mask
+from src.data_paths import get_data_path
+
+DICTIONARY_FILENAME = "line_dictionary.json"
+HASH_HEIGHT = 12  # Rows of the hash grid (the width keeps the line's aspect ratio)
+MAX_ENTRIES = 2000  # Least recently used lines are evicted beyond this
+SAVE_EVERY = 20  # Save after this many new entries (and at exit)
+
+
+def get_dictionary_path():
+    """Dictionary file in the runtime data folder (see data_paths.py)"""
+    return get_data_path(DICTIONARY_FILENAME)
+
+
+def line_hash(gray):
+    """
+    Perceptual hash of one grayscale line strip.
+
+    Returns:
+        Key string "WxH:hexbits", or None if the strip has no text
+    """
+    mask = text_mask(gray)
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if len(rows) == 0 or len(cols) == 0:
+        return None
+    ink = mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1].astype(np.float32)
+    width = max(1, int(round(ink.shape[1] * HASH_HEIGHT / float(ink.shape[0]))))
+    cells = cv.resize(ink, (width, HASH_HEIGHT), interpolation=cv.INTER_AREA) >= 0.5
+    # Digest of the bit grid keeps the keys short in the JSON file
+    digest = hashlib.blake2b(np.packbits(cells).tobytes(), digest_size=12).hexdigest()
+    return f"{width}x{HASH_HEIGHT}:{digest}"
+
+
+def slot_hash(strips):
+    """Hash of a line slot (a wrapped double line has 2 strips)"""
+    hashes = [line_hash(strip) for strip in strips]
+    if not hashes or any(h is None for h in hashes):
+        return None
+    return '|'.join(hashes)
+
+
+class LineDictionary:
+    """LRU map of line hash -> {"text", "stats", "hits"}, saved to disk"""
+
+    def __init__(self, path=None, max_entries=MAX_ENTRIES):
+        self.path = path or get_dictionary_path()
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # Least recently used first
+        self.stats = {"hits": 0, "misses": 0, "added": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                # Restore the LRU order from the saved last-use times
+                items = sorted(data.items(), key=lambda item: item[1].get("last_used", 0))
+                self.entries = OrderedDict(items[-self.max_entries:])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[OCR] Could not load line dictionary {self.path}: {e}")
+
+    def save(self):
+        with self._lock:
+            if not self._unsaved:
+                return
+            data = json.dumps(self.entries, indent=1)
+            self._unsaved = 0
+        try:
+            # Write to a temp file first so a crash mid-write can't corrupt the dictionary
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[OCR] Could not save line dictionary {self.path}: {e}")
+
+    def lookup(self, key):
+        """Entry for a line hash (None if unknown); marks it as recently used"""
+        if key is None:
+            return None
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            entry["hits"] = entry.get("hits", 0) + 1
+            entry["last_used"] = time.time()
+            self.stats["hits"] += 1
+            return entry
+
+    def add(self, key, text, stats):
+        """
+        Store a cleanly parsed line.
+
+        Args:
+            key: Line hash (see slot_hash())
+            text: Confirmed raw text of the line
+            stats: Parsed stats, list of (stat_type, value)
+        """
+        if key is None:
+            return
+        should_save = False
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return
+            self.entries[key] = {"text": text, "stats": [list(stat) for stat in stats], "hits": 0,
+                                 "last_used": time.time()}
+            self.stats["added"] += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evicted"] += 1
+            self._unsaved += 1
+            should_save = self._unsaved >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, entries=len(self.entries),
+                        hit_rate=self.stats["hits"] / lookups if lookups else 0.0)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self._unsaved += 1
+
+
+_dictionary = None
+
+
+def get_line_dictionary():
+    """Shared line dictionary, loaded on first use and saved at exit"""
+    global _dictionary
+    if _dictionary is None:
+        _dictionary = LineDictionary()
+        atexit.register(_dictionary.save)
+    return _dictionary
@@ -0,0 +1,120 @@
+"""
+Memoized parse results of potential lines.
+
+Every roll the bot asks the same few questions about the same three lines several times: the
+stats of each line (get_stat_values(), again for the totals string, the highest stat and the
+cubes-used-up check), which stat types each comma part is (flexible check, 2L ATT, BD+ATT+IED),
+the comparison text... and most rolls repeat lines seen a few rolls earlier. A ParsedLine holds
+everything parsed from one line string; parse_line() hands out one per string from a bounded LRU,
+so each line is parsed once and every consumer reads the same object.
+"""
+import threading
+from collections import OrderedDict
+from src.translate_ocr_results import get_all_stats_from_line
+
+PARSE_CACHE_SIZE = 512  # Distinct line strings kept (a session sees a few hundred at most)
+
+
+class ParsedLine:
+    """
+    Parse result of one line string.
+
+    stats is computed up front; the comma parts and the per-type checks are computed on first use
+    and kept (check() memoizes any function of the line text under a name).
+    """
+    __slots__ = ('text', 'stats', '_parts', '_checks')
+
+    def __init__(self, text):
+        self.text = text
+        self.stats = tuple(get_all_stats_from_line(text))  # ((stat, value), ...) - see get_all_stats_from_line()
+        self._parts = None
+        self._checks = {}
+
+    @property
+    def parts(self):
+        """ParsedLine of each comma separated part (stripped), in order"""
+        if self._parts is None:
+            self._parts = tuple(parse_line(part.strip()) for part in self.text.split(','))
+        return self._parts
+
+    def check(self, name, detect):
+        """
+        Result of detect(text), computed once per line.
+
+        Args:
+            name: Key of the check (e.g. the stat type); one name must always mean the same detect
+            detect: Function of the line text
+        """
+        try:
+            return self._checks[name]
+        except KeyError:
+            result = self._checks[name] = detect(self.text)
+            return result
+
+
+class ParseCache:
+    """Bounded LRU of line string -> ParsedLine, with hit/miss counters (max_entries 0 = parse every time)"""
+
+    def __init__(self, max_entries=PARSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text):
+        """Return the ParsedLine of text (parsed now and stored on a miss)"""
+        with self._lock:
+            parsed = self._entries.get(text)
+            if parsed is not None:
+                self._entries.move_to_end(text)
+                self.hits += 1
+                return parsed
+            self.misses += 1
+        # Parse outside the lock; two threads missing the same line just parse it twice
+        parsed = ParsedLine(text)
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[text] = parsed
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return parsed
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_parse_cache = ParseCache()
+
+
+def parse_line(text):
+    """Return the (shared) ParsedLine of a line string"""
+    return _parse_cache.get(text or "")
+
+
+def get_parse_cache():
+    """Return the shared ParseCache (hit/miss counters via get_stats())"""
+    return _parse_cache
+
+
+def clear_parse_cache():
+    """Forget all parsed lines and reset the counters"""
+    _parse_cache.clear()
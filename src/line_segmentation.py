@@ -0,0 +1,157 @@
+"""
+Split the potential crop into one strip per line.
+
+A horizontal projection profile of the text mask gives the rows that contain text. Rows are then
+grouped into the 3 potential line slots by layout: the double lines ("Attacks ignore 30% Monster" /
+"Defense", "Increases Item Drop Rate by a" / ...) wrap into a short continuation row that sits
+closer to its first row than the lines sit to each other, so the tightest such pair is one line.
+If the profile doesn't give exactly 3 slots, the fixed line offsets from crop_config are used.
+
+Each slot can then be OCR'd on its own (PSM 7), and only the slots that fail need a retry; words
+from a whole-crop image_to_data pass are mapped to the slots by their position.
+"""
+import cv2 as cv
+import numpy as np
+from src.crop_config import LINE_OFFSETS_Y, LINE_HEIGHT, BRIGHT_LINE_OFFSETS_Y, BRIGHT_LINE_HEIGHT, STAT_HEIGHT, BRIGHT_STAT_HEIGHT
+
+LINE_SLOTS = 3
+MIN_ROW_HEIGHT = 4  # Text rows shorter than this (px) are noise
+ROW_GAP_MERGE = 1  # Runs separated by at most this many empty rows belong to the same text row
+WRAP_RIGHT_MARGIN = 0.08  # Text reaching into the last 8% of the width wraps to the next row
+CONTINUATION_MAX_WIDTH = 0.6  # A continuation row covers at most 60% of the width
+STRIP_PADDING = 4  # Background pixels added around every strip (Tesseract dislikes text touching the border)
+
+
+def text_mask(gray):
+    """Boolean mask of text pixels (Otsu threshold; text is the minority class, light or dark)"""
+    _, binary = cv.threshold(gray, 0, 255, cv.THRESH_BINARY + cv.THRESH_OTSU)
+    mask = binary > 0
+    if mask.mean() > 0.5:
+        mask = ~mask
+    return mask
+
+
+def find_text_rows(mask, min_height=MIN_ROW_HEIGHT, gap=ROW_GAP_MERGE):
+    """
+    Rows containing text, from the horizontal projection profile.
+
+    Returns:
+        List of (y0, y1) half-open row ranges, top to bottom
+    """
+    height, width = mask.shape
+    profile = mask.sum(axis=1)
+    # A row counts as text if it has more than a few ink pixels (ignores single-pixel noise)
+    ink = profile > max(1, int(width * 0.01))
+    rows = []
+    start = None
+    last_ink = None
+    for y in range(height):
+        if ink[y]:
+            if start is None:
+                start = y
+            elif y - last_ink - 1 > gap:
+                rows.append((start, last_ink + 1))
+                start = y
+            last_ink = y
+    if start is not None:
+        rows.append((start, last_ink + 1))
+    return [(y0, y1) for y0, y1 in rows if y1 - y0 >= min_height]
+
+
+def row_extent(mask, row):
+    """(x0, x1) horizontal extent of the text in a row"""
+    columns = np.flatnonzero(mask[row[0]:row[1]].any(axis=0))
+    if len(columns) == 0:
+        return 0, 0
+    return int(columns[0]), int(columns[-1]) + 1
+
+
+def group_rows(mask, rows, slots=LINE_SLOTS):
+    """
+    Group text rows into line slots. A wrapped (double) line shows up as an extra row that sits
+    closer to the row above it than lines sit to each other, and is shorter than the panel width,
+    so while there are more rows than slots the tightest such pair is merged.
+
+    Returns:
+        List of slots, each a list of 1+ (y0, y1) rows
+    """
+    width = mask.shape[1]
+    grouped = [[row] for row in rows]
+    while len(grouped) > slots:
+        best = None
+        for i in range(len(grouped) - 1):
+            gap = grouped[i + 1][0][0] - grouped[i][-1][1]
+            x0, x1 = row_extent(mask, grouped[i + 1][0])
+            # Prefer continuations: short rows, or rows following a line that runs into the right edge
+            continuation = (x1 - x0 <= width * CONTINUATION_MAX_WIDTH or
+                            row_extent(mask, grouped[i][-1])[1] >= width * (1 - WRAP_RIGHT_MARGIN))
+            score = (not continuation, gap)
+            if best is None or score < best[0]:
+                best = (score, i)
+        i = best[1]
+        grouped[i:i + 2] = [grouped[i] + grouped[i + 1]]
+    return grouped
+
+
+def fixed_slots(height, cube_type="Glowing"):
+    """Line slots from the fixed offsets in crop_config, scaled to the crop height"""
+    if cube_type == "Bright":
+        offsets, line_height, reference_height = BRIGHT_LINE_OFFSETS_Y, BRIGHT_LINE_HEIGHT, BRIGHT_STAT_HEIGHT
+    else:
+        offsets, line_height, reference_height = LINE_OFFSETS_Y, LINE_HEIGHT, STAT_HEIGHT
+    scale = height / float(reference_height)
+    slots = []
+    for y in offsets:
+        y0 = min(height - 1, int(round(y * scale)))
+        y1 = min(height, max(y0 + 1, int(round((y + line_height) * scale))))
+        slots.append([(y0, y1)])
+    return slots
+
+
+def segment_lines(gray, cube_type="Glowing", slots=LINE_SLOTS):
+    """
+    Find the line slots of a grayscale potential crop.
+
+    Returns:
+        Tuple (slot_rows, method): slot_rows is a list of `slots` lists of (y0, y1) rows (2 rows for a
+        wrapped double line); method is 'projection' or 'fixed'
+    """
+    mask = text_mask(gray)
+    grouped = group_rows(mask, find_text_rows(mask), slots)
+    if len(grouped) == slots:
+        return grouped, 'projection'
+    return fixed_slots(gray.shape[0], cube_type)[:slots], 'fixed'
+
+
+def strip_image(gray, row, padding=STRIP_PADDING):
+    """Crop one text row (plus padding) and surround it with background so no glyph touches the border"""
+    y0, y1 = row
+    strip = gray[max(0, y0 - 1):min(gray.shape[0], y1 + 1)]
+    background = int(np.median(gray))
+    return cv.copyMakeBorder(strip, padding, padding, padding, padding, cv.BORDER_CONSTANT, value=background)
+
+
+def assign_words_to_slots(words, slot_rows):
+    """
+    Distribute image_to_data words (see ocr_engine.data_to_words()) over the line slots.
+
+    A word belongs to the slot whose rows contain its vertical center (the nearest row if it falls
+    into a gap); words keep Tesseract's reading order, so the two rows of a double line come out
+    as one line.
+
+    Returns:
+        List with one list of words per slot
+    """
+    slot_words = [[] for _ in slot_rows]
+    if not slot_rows:
+        return slot_words
+    for word in words:
+        center = word["top"] + word["height"] / 2.0
+        best_slot, best_distance = 0, None
+        for i, rows in enumerate(slot_rows):
+            for y0, y1 in rows:
+                distance = 0.0 if y0 <= center < y1 else min(abs(center - y0), abs(center - y1))
+                if best_distance is None or distance < best_distance:
+                    best_slot, best_distance = i, distance
+        slot_words[best_slot].append(word)
+    return slot_words
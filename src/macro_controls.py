@@ -1,7 +1,16 @@
-import pyautogui
 import time
+import threading
+from collections import deque
 import keyboard
 
+# pyautogui needs a display to import; keep this module importable on headless machines
+# (replay benchmarks) - only click() uses it
+try:
+    import pyautogui
+    PYAUTOGUI_AVAILABLE = True
+except Exception:
+    PYAUTOGUI_AVAILABLE = False
+
 
 
         
@@ -32,10 +41,14 @@ def click():
         time.sleep(0.03)  # Reduced from 0.05s - still enough for key press to register
 
 
-def press_reset_spacebar():
+def press_reset_spacebar(settle_delay=0.5):
     """
     Press spacebar to reset (replaces clicking the Reset button).
     This is faster and more reliable than moving the mouse and clicking.
+    
+    Args:
+        settle_delay: Seconds to wait for the panel to redraw after the presses. Pass 0 when the
+                      caller waits for the panel change itself (see potlines.wait_for_panel_change()).
     """
     # Press spacebar to reset
     keyboard.press_and_release('space')
@@ -46,7 +59,186 @@ def press_reset_spacebar():
         # pyautogui.press('enter')
         keyboard.press_and_release('space')
         time.sleep(0.03)  # Reduced from 0.05s - still enough for key press to register
-    time.sleep(0.5)
+    if settle_delay > 0:
+        time.sleep(settle_delay)
     return True
 
 
+RESET_SEQUENCE = ('space', 'space')  # Reset + confirm - the minimum presses for one reroll
+RESET_KEY_DELAY = 0.1  # Seconds between the keys of RESET_SEQUENCE (lets the confirm prompt open)
+
+
+class KeyboardInputBackend:
+    """Sends real key presses through the keyboard module"""
+    
+    def press(self, key):
+        keyboard.press_and_release(key)
+
+
+class FakeInputBackend:
+    """
+    Simulated game input for testing the reset driver without Windows.
+    
+    Every `presses_per_reset` registered presses count as one reset: the fake window then shows the
+    next frame from `frames` after `redraw_delay` seconds. `drop_next` makes upcoming presses get
+    lost (like a press during a lag spike) so retries can be exercised.
+    """
+    
+    def __init__(self, window=None, frames=None, redraw_delay=0.0, presses_per_reset=len(RESET_SEQUENCE)):
+        """
+        Args:
+            window: Object with a `frame` attribute to update (e.g. windowcapture.FakeWindowBackend)
+            frames: List of frames shown one after another on each reset (cycled)
+            redraw_delay: Seconds between the completed reset and the new frame appearing
+            presses_per_reset: Registered presses needed to complete one reset
+        """
+        self.window = window
+        self.frames = frames or []
+        self.redraw_delay = redraw_delay
+        self.presses_per_reset = presses_per_reset
+        self.drop_next = 0
+        self.presses = []  # (key, time.monotonic(), registered) for every press
+        self.resets = 0
+        self._pending = 0
+    
+    def prompt_open(self):
+        """True while a reset is half done: the reset press registered but its confirm was lost"""
+        return self._pending > 0
+    
+    def press(self, key):
+        registered = self.drop_next <= 0
+        if not registered:
+            self.drop_next -= 1
+        self.presses.append((key, time.monotonic(), registered))
+        if not registered:
+            return
+        self._pending += 1
+        if self._pending >= self.presses_per_reset:
+            self._pending = 0
+            self.resets += 1
+            if self.window is not None and self.frames:
+                frame = self.frames[(self.resets - 1) % len(self.frames)]
+                if self.redraw_delay > 0:
+                    timer = threading.Timer(self.redraw_delay, setattr, (self.window, 'frame', frame))
+                    timer.daemon = True
+                    timer.start()
+                else:
+                    self.window.frame = frame
+
+
+class ResetInputDriver:
+    """
+    Closed-loop reset: send the minimum key sequence, confirm the panel changed, and only
+    press again (with growing backoff) when the input was missed.
+    
+    `verify(timeout, stop_event)` waits for the panel change and returns the result dict of
+    change_detector.wait_for_change() (or None when it can't tell, e.g. no reference frame yet -
+    the driver then falls back to a fixed delay like press_reset_spacebar()).
+    
+    An unchanged panel alone is no missed input - being out of cubes looks the same - so it is only
+    retried when `input_missed()` says the input was lost (e.g. the confirm prompt is still open).
+    Otherwise the reset returns unchanged after one timeout, and the bot's same-stats check decides.
+    """
+    
+    def __init__(self, verify=None, input_backend=None, sequence=RESET_SEQUENCE, key_delay=RESET_KEY_DELAY,
+                 retry_keys=('space',), max_retries=3, change_timeout=1.5, backoff=0.05, backoff_factor=2.0,
+                 fallback_delay=0.5, history_size=100, input_missed=None):
+        """
+        Args:
+            verify: Callable(timeout, stop_event) -> change result dict or None
+            input_backend: Object with press(key) (default: KeyboardInputBackend)
+            sequence: Keys sent for one reset
+            key_delay: Seconds between keys of the sequence
+            retry_keys: Keys re-sent when the input was missed (confirm the prompt again)
+            max_retries: Retries per roll before giving up
+            change_timeout: Seconds each attempt waits for the panel to change
+            backoff: Seconds to wait before the first retry (multiplied by backoff_factor per retry)
+            backoff_factor: Backoff growth per retry
+            fallback_delay: Fixed delay used when verify can't tell whether the panel changed
+            history_size: Number of per-roll records to keep
+            input_missed: Callable() -> True if the reset input was lost (e.g. FakeInputBackend.prompt_open);
+                          None = never retry
+        """
+        self.verify = verify
+        self.input_missed = input_missed
+        self.input = input_backend if input_backend is not None else KeyboardInputBackend()
+        self.sequence = tuple(sequence)
+        self.key_delay = key_delay
+        self.retry_keys = tuple(retry_keys)
+        self.max_retries = max_retries
+        self.change_timeout = change_timeout
+        self.backoff = backoff
+        self.backoff_factor = backoff_factor
+        self.fallback_delay = fallback_delay
+        self.history = deque(maxlen=history_size)
+        self.totals = {"rolls": 0, "retries": 0, "presses": 0, "unchanged": 0}
+        self.last_change = None  # Change result of the last attempt of the last reset
+    
+    def _send(self, keys, stop_event=None):
+        for i, key in enumerate(keys):
+            if stop_event is not None and stop_event.is_set():
+                return i
+            if i > 0 and self.key_delay > 0:
+                time.sleep(self.key_delay)
+            self.input.press(key)
+        return len(keys)
+    
+    def reset(self, stop_event=None):
+        """
+        Reroll once and wait until the panel shows the new potential.
+        
+        Returns:
+            Dict for this roll: 'presses', 'retries', 'changed', 'stable', 'latency' (seconds from the
+            first key press to the first changed frame, or None) and 'elapsed'
+        """
+        start = time.monotonic()
+        stats = {"presses": 0, "retries": 0, "changed": False, "stable": False, "latency": None, "elapsed": 0.0}
+        stats["presses"] += self._send(self.sequence, stop_event)
+        
+        if self.verify is None:
+            time.sleep(self.fallback_delay)
+        else:
+            delay = self.backoff
+            while True:
+                wait_start = time.monotonic()
+                change = self.verify(self.change_timeout, stop_event)
+                self.last_change = change
+                if change is None:
+                    # Can't verify (no reference frame) - behave like the open-loop version
+                    time.sleep(self.fallback_delay)
+                    break
+                if change["changed"]:
+                    stats["changed"] = True
+                    stats["stable"] = change["stable"]
+                    stats["latency"] = wait_start - start + change["change_latency"]
+                    break
+                if stats["retries"] >= self.max_retries or (stop_event is not None and stop_event.is_set()):
+                    break
+                if self.input_missed is None or not self.input_missed():
+                    # No sign the input was lost (out of cubes looks the same) - don't press again
+                    break
+                # The confirm prompt was missed. Back off, then confirm again.
+                stats["retries"] += 1
+                if stop_event is not None:
+                    stop_event.wait(delay)
+                else:
+                    time.sleep(delay)
+                delay *= self.backoff_factor
+                stats["presses"] += self._send(self.retry_keys, stop_event)
+        
+        stats["elapsed"] = time.monotonic() - start
+        self.history.append(stats)
+        self.totals["rolls"] += 1
+        self.totals["retries"] += stats["retries"]
+        self.totals["presses"] += stats["presses"]
+        if self.verify is not None and not stats["changed"]:
+            self.totals["unchanged"] += 1
+        return stats
+    
+    def get_stats(self):
+        """Totals plus mean/max input->change latency over the kept history"""
+        latencies = [s["latency"] for s in self.history if s["latency"] is not None]
+        summary = dict(self.totals)
+        summary["mean_latency"] = sum(latencies) / len(latencies) if latencies else None
+        summary["max_latency"] = max(latencies) if latencies else None
+        return summary
@@ -0,0 +1,601 @@
+"""
+OCR engine layer - one interface in front of the Tesseract backends.
+
+- TesserocrEngine: keeps a loaded Tesseract API handle (eng.traineddata already parsed) per worker
+  thread through the tesserocr binding, so a call costs only the recognition itself.
+- PipeEngine: starts tesseract.exe per call like pytesseract, but streams the image as uncompressed
+  PGM/PPM bytes through stdin and reads the result from stdout - no PNG encoding, no temp files.
+- PytesseractEngine: the original path - every call writes a temp image, starts tesseract.exe and
+  parses its output. Always available, used as the last fallback.
+- ServerEngine: sends the images to the shared OCR server process (see ocr_server.py), which keeps
+  one of the engines above loaded for the GUI, the bot and the tools.
+
+image_finder and auto_detect_crop call get_ocr_engine().image_to_string()/image_to_data() and never
+talk to pytesseract directly. Configs are the usual Tesseract command line strings
+('--psm 6 -c tessedit_char_whitelist=...') for both backends.
+"""
+import hashlib
+import shlex
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+import cv2 as cv
+import numpy as np
+import src.tesseract_config as tesseract_config  # Configure Tesseract path before importing pytesseract
+import pytesseract
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+OCR_BACKENDS = ('auto', 'tesserocr', 'pipe', 'pytesseract')
+OCR_CACHE_SIZE = 256  # Results kept by the shared OCR result cache
+PIPE_TIMEOUT = 10  # Seconds a piped tesseract.exe call may take before it is killed
+DATA_KEYS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+             'left', 'top', 'width', 'height', 'conf', 'text')
+
+
+def parse_tesseract_config(config):
+    """
+    Split a Tesseract command line config into its parts.
+
+    Args:
+        config: e.g. '--psm 6 -c tessedit_char_whitelist=0123456789+%: '
+
+    Returns:
+        Tuple (psm, oem, variables, tessdata_dir) - psm/oem are ints or None, variables is a dict
+    """
+    psm = None
+    oem = None
+    tessdata_dir = None
+    variables = {}
+    # Same tokenizing as pytesseract, so both backends see identical settings
+    tokens = shlex.split(config or '', posix=True)
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == '--psm' and i + 1 < len(tokens):
+            psm = int(tokens[i + 1])
+            i += 2
+        elif token == '--oem' and i + 1 < len(tokens):
+            oem = int(tokens[i + 1])
+            i += 2
+        elif token == '--tessdata-dir' and i + 1 < len(tokens):
+            tessdata_dir = tokens[i + 1]
+            i += 2
+        elif token == '-c' and i + 1 < len(tokens):
+            name, _, value = tokens[i + 1].partition('=')
+            variables[name] = value
+            i += 2
+        else:
+            i += 1
+    return psm, oem, variables, tessdata_dir
+
+
+class OcrEngine:
+    """
+    Interface shared by all OCR backends.
+
+    image_to_string(image, config) returns the recognized text; image_to_data(image, config) returns a
+    dict of word boxes with the same keys as pytesseract.image_to_data(..., output_type=Output.DICT)
+    ('text', 'conf', 'left', 'top', 'width', 'height', 'block_num', 'par_num', 'line_num', 'word_num').
+    Images are numpy arrays (grayscale or BGR) or PIL images.
+    """
+    name = "ocr"
+
+    def image_to_string(self, image, config=''):
+        raise NotImplementedError
+
+    def image_to_data(self, image, config=''):
+        raise NotImplementedError
+
+    def image_to_data_batch(self, jobs):
+        """
+        image_to_data for several (image, config) pairs - one request for engines that can batch
+        (ServerEngine), one call after the other for the rest.
+
+        Returns:
+            List of image_to_data dicts in job order
+        """
+        return [self.image_to_data(image, config) for image, config in jobs]
+
+    def close(self):
+        """Release any handles held by the engine"""
+        pass
+
+
+class PytesseractEngine(OcrEngine):
+    """One tesseract.exe subprocess per call (through pytesseract)"""
+    name = "pytesseract"
+
+    def image_to_string(self, image, config=''):
+        return pytesseract.image_to_string(image, config=tesseract_config.wrap_tesseract_config(config))
+
+    def image_to_data(self, image, config=''):
+        return pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT,
+                                         config=tesseract_config.wrap_tesseract_config(config))
+
+
+def encode_pnm(image):
+    """
+    Uncompressed PGM (grayscale) or PPM (color) bytes of an image - a header plus the raw pixels,
+    which Tesseract (Leptonica) reads straight from stdin.
+
+    Args:
+        image: numpy array (grayscale or BGR) or PIL image
+    """
+    if not isinstance(image, np.ndarray):
+        image = np.asarray(image.convert('L' if image.mode in ('1', 'L', 'P') else 'RGB'))
+    elif image.ndim == 3:
+        image = cv.cvtColor(image, cv.COLOR_BGRA2RGB if image.shape[2] == 4 else cv.COLOR_BGR2RGB)
+    if image.dtype != np.uint8:
+        image = np.clip(image, 0, 255).astype(np.uint8)
+    height, width = image.shape[:2]
+    magic = b'P5' if image.ndim == 2 else b'P6'
+    return b'%s\n%d %d\n255\n' % (magic, width, height) + np.ascontiguousarray(image).tobytes()
+
+
+def parse_tsv(tsv):
+    """image_to_data dict (same keys and types as pytesseract's Output.DICT) from Tesseract's TSV output"""
+    data = {key: [] for key in DATA_KEYS}
+    lines = tsv.splitlines()
+    # Everything after the header line (anything printed before it is not part of the table)
+    start = next((i + 1 for i, line in enumerate(lines) if line.startswith('level\t')), len(lines))
+    for line in lines[start:]:
+        fields = line.split('\t')
+        if len(fields) < len(DATA_KEYS) - 1:
+            continue
+        fields += [''] * (len(DATA_KEYS) - len(fields))
+        for key, value in zip(DATA_KEYS, fields):
+            if key == 'text':
+                data[key].append(value)
+            elif key == 'conf':
+                data[key].append(float(value))
+            else:
+                data[key].append(int(value))
+    return data
+
+
+class PipeEngine(OcrEngine):
+    """
+    One tesseract.exe subprocess per call, fed through pipes: `tesseract stdin stdout`.
+
+    Same executable and configs as pytesseract, minus its per-call overhead: pytesseract saves
+    every image as a PNG temp file (zlib encoding plus disk I/O) and reads the result back from
+    another temp file.
+    """
+    name = "pipe"
+
+    def __init__(self, lang='eng', tesseract_cmd=None):
+        self.lang = lang
+        self.tesseract_cmd = tesseract_cmd or tesseract_config.get_tesseract_exe() or pytesseract.pytesseract.tesseract_cmd
+        # No console window flashing up for every call on Windows
+        self._creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+
+    def _run(self, image, config, extension=None):
+        args = [self.tesseract_cmd, 'stdin', 'stdout', '-l', self.lang]
+        args += shlex.split(tesseract_config.wrap_tesseract_config(config) or '', posix=True)
+        if extension:
+            args.append(extension)
+        result = subprocess.run(args, input=encode_pnm(image), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                timeout=PIPE_TIMEOUT, creationflags=self._creationflags)
+        if result.returncode != 0:
+            raise Exception(f"tesseract exited with {result.returncode}: "
+                            f"{result.stderr.decode('utf-8', 'replace').strip()}")
+        return result.stdout.decode('utf-8', 'replace')
+
+    def image_to_string(self, image, config=''):
+        return self._run(image, config)
+
+    def image_to_data(self, image, config=''):
+        return parse_tsv(self._run(image, config, 'tsv'))
+
+
+class TesserocrEngine(OcrEngine):
+    """
+    In-process Tesseract through tesserocr.
+
+    Each thread gets its own PyTessBaseAPI (the handle is not thread safe), created on first use and
+    kept for the life of the thread. Variables set by one call are reset before the next call so the
+    configs behave like independent tesseract.exe runs.
+    """
+    name = "tesserocr"
+
+    def __init__(self, lang='eng', tessdata_dir=None):
+        if not TESSEROCR_AVAILABLE:
+            raise Exception("tesserocr is not installed")
+        self.lang = lang
+        self.tessdata_dir = tessdata_dir or tesseract_config.get_tessdata_dir()
+        self._local = threading.local()
+        self._apis = []  # Every handle created, so close() can end them all
+        self._lock = threading.Lock()
+        # Create the calling thread's handle now so a broken install fails here, not mid-roll
+        self._get_api(None)
+
+    def _get_api(self, oem):
+        api = getattr(self._local, 'api', None)
+        if api is not None and getattr(self._local, 'oem', None) == oem:
+            return api
+        if api is not None:
+            api.End()
+        kwargs = {'lang': self.lang}
+        if self.tessdata_dir:
+            kwargs['path'] = self.tessdata_dir.rstrip('/\\') + '/'
+        if oem is not None:
+            kwargs['oem'] = oem
+        api = tesserocr.PyTessBaseAPI(**kwargs)
+        self._local.api = api
+        self._local.oem = oem
+        self._local.defaults = {}  # Original value of every variable a config changed
+        with self._lock:
+            self._apis.append(api)
+        return api
+
+    def _prepare(self, image, config):
+        """Apply config and image to this thread's handle"""
+        psm, oem, variables, _ = parse_tesseract_config(config)
+        api = self._get_api(oem)
+        defaults = self._local.defaults
+        # Undo variables set by earlier calls that this config doesn't set
+        for name, value in defaults.items():
+            if name not in variables:
+                api.SetVariable(name, value)
+        for name, value in variables.items():
+            if name not in defaults:
+                defaults[name] = api.GetVariableAsString(name) or ''
+            api.SetVariable(name, value)
+        # Tesseract's command line default is PSM 3 (fully automatic page segmentation)
+        api.SetPageSegMode(psm if psm is not None else tesserocr.PSM.AUTO)
+
+        if not isinstance(image, np.ndarray):
+            api.SetImage(image)  # PIL image
+            return api
+        if image.ndim == 3:
+            image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+        image = np.ascontiguousarray(image)
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        height, width = image.shape[:2]
+        # Raw pixels straight from the numpy buffer - no PIL conversion, no temp file
+        api.SetImageBytes(image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+        return api
+
+    def image_to_string(self, image, config=''):
+        api = self._prepare(image, config)
+        return api.GetUTF8Text()
+
+    def image_to_data(self, image, config=''):
+        api = self._prepare(image, config)
+        api.Recognize()
+        data = {key: [] for key in DATA_KEYS}
+        iterator = api.GetIterator()
+        if iterator is None:
+            return data
+        RIL = tesserocr.RIL
+        block_num = par_num = line_num = word_num = 0
+        for word in tesserocr.iterate_level(iterator, RIL.WORD):
+            if word.IsAtBeginningOf(RIL.BLOCK):
+                block_num += 1
+                par_num = 0
+            if word.IsAtBeginningOf(RIL.PARA):
+                par_num += 1
+                line_num = 0
+            if word.IsAtBeginningOf(RIL.TEXTLINE):
+                line_num += 1
+                word_num = 0
+            word_num += 1
+            box = word.BoundingBox(RIL.WORD)
+            if box is None:
+                continue
+            x1, y1, x2, y2 = box
+            data['level'].append(5)
+            data['page_num'].append(1)
+            data['block_num'].append(block_num)
+            data['par_num'].append(par_num)
+            data['line_num'].append(line_num)
+            data['word_num'].append(word_num)
+            data['left'].append(x1)
+            data['top'].append(y1)
+            data['width'].append(x2 - x1)
+            data['height'].append(y2 - y1)
+            data['conf'].append(word.Confidence(RIL.WORD))
+            data['text'].append(word.GetUTF8Text(RIL.WORD) or '')
+        return data
+
+    def close(self):
+        with self._lock:
+            for api in self._apis:
+                try:
+                    api.End()
+                except Exception:
+                    pass
+            self._apis = []
+        self._local = threading.local()
+
+
+class ServerEngine(OcrEngine):
+    """Client of the shared OCR server process (started on first use if none is running)"""
+
+    def __init__(self, backend='auto', priority=None):
+        """
+        Args:
+            backend: Engine the server loads if this client has to start it
+            priority: Queue priority of this client's requests (default: ocr_server.PRIORITY_BOT)
+        """
+        from src.ocr_server import OcrServerClient, PRIORITY_BOT
+        self.client = OcrServerClient(backend, PRIORITY_BOT if priority is None else priority)
+        self.name = f"server ({backend})"
+
+    def _run(self, jobs):
+        results = self.client.run_batch(jobs)
+        for status, result in results:
+            if status != 'ok':
+                raise Exception(f"OCR server: {result}")
+        return [result for _, result in results]
+
+    def image_to_string(self, image, config=''):
+        return self._run([('string', image, config)])[0]
+
+    def image_to_data(self, image, config=''):
+        return self._run([('data', image, config)])[0]
+
+    def image_to_data_batch(self, jobs):
+        return self._run([('data', image, config) for image, config in jobs])
+
+    def close(self):
+        self.client.close()
+
+
+class FallbackEngine(OcrEngine):
+    """Use the primary engine, and the fallback engine for any call the primary one fails on"""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name} (fallback: {fallback.name})"
+        self.fallback_calls = 0
+
+    def image_to_string(self, image, config=''):
+        try:
+            return self.primary.image_to_string(image, config)
+        except Exception as e:
+            self.fallback_calls += 1
+            print(f"[OCR] {self.primary.name} failed ({e}), using {self.fallback.name}")
+            return self.fallback.image_to_string(image, config)
+
+    def image_to_data(self, image, config=''):
+        try:
+            return self.primary.image_to_data(image, config)
+        except Exception as e:
+            self.fallback_calls += 1
+            print(f"[OCR] {self.primary.name} failed ({e}), using {self.fallback.name}")
+            return self.fallback.image_to_data(image, config)
+
+    def image_to_data_batch(self, jobs):
+        try:
+            return self.primary.image_to_data_batch(jobs)
+        except Exception as e:
+            self.fallback_calls += 1
+            print(f"[OCR] {self.primary.name} failed ({e}), using {self.fallback.name}")
+            return self.fallback.image_to_data_batch(jobs)
+
+    def close(self):
+        self.primary.close()
+        self.fallback.close()
+
+
+class OcrResultCache:
+    """
+    Bounded LRU cache of OCR results keyed by image content + config.
+
+    Rolls often produce pixel-identical crops (a reset that didn't register, the same potential again,
+    test-mode replays); those are answered from here without calling Tesseract.
+    """
+
+    def __init__(self, max_entries=OCR_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(image, config, kind):
+        """Hash of the pixels (plus shape/dtype, so reshaped buffers don't collide) and the OCR config"""
+        pixels = np.ascontiguousarray(image if isinstance(image, np.ndarray) else np.asarray(image))
+        digest = hashlib.blake2b(pixels.data, digest_size=16)
+        digest.update(f"{pixels.shape}{pixels.dtype}".encode())
+        return (digest.digest(), config or '', kind)
+
+    def get(self, key):
+        """Return the cached result or None (counts a hit or a miss)"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class CachedOcrEngine(OcrEngine):
+    """Answer repeated image/config pairs from an OcrResultCache, pass everything else to the engine"""
+
+    def __init__(self, engine, cache):
+        self.engine = engine
+        self.cache = cache
+        self.name = engine.name
+
+    def image_to_string(self, image, config=''):
+        key = self.cache.make_key(image, config, 'string')
+        text = self.cache.get(key)
+        if text is None:
+            text = self.engine.image_to_string(image, config)
+            self.cache.put(key, text)
+        return text
+
+    def image_to_data(self, image, config=''):
+        return self.image_to_data_cached(image, config)[0]
+
+    def image_to_data_cached(self, image, config=''):
+        """image_to_data() result and whether it was answered from the cache (no engine call)"""
+        key = self.cache.make_key(image, config, 'data')
+        data = self.cache.get(key)
+        cached = data is not None
+        if not cached:
+            data = self.engine.image_to_data(image, config)
+            self.cache.put(key, data)
+        # Copy the lists so callers can't modify the cached entry
+        return {name: list(values) for name, values in data.items()}, cached
+
+    def image_to_data_batch(self, jobs):
+        keys = [self.cache.make_key(image, config, 'data') for image, config in jobs]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, data in enumerate(results) if data is None]
+        if missing:
+            # Only the uncached jobs go to the engine, still as one batch
+            for i, data in zip(missing, self.engine.image_to_data_batch([jobs[i] for i in missing])):
+                self.cache.put(keys[i], data)
+                results[i] = data
+        return [{name: list(values) for name, values in data.items()} for data in results]
+
+    def close(self):
+        self.engine.close()
+
+
+def create_ocr_engine(backend='auto', server=False, priority=None):
+    """
+    Create an OCR engine.
+
+    Args:
+        backend: 'auto' (tesserocr if it loads, then the piped tesseract.exe, then pytesseract as fallbacks),
+            'tesserocr', 'pipe' or 'pytesseract'
+        server: Run the backend in the shared OCR server process instead of this one (the piped
+            tesseract.exe/pytesseract engines take over if the server fails)
+        priority: Queue priority of the requests when server is True (see ocr_server.py)
+
+    Returns:
+        OcrEngine instance
+    """
+    if backend not in OCR_BACKENDS:
+        raise Exception(f"ERROR: Unknown OCR backend '{backend}'. Use one of: {', '.join(OCR_BACKENDS)}")
+    if server:
+        try:
+            return FallbackEngine(ServerEngine(backend, priority), FallbackEngine(PipeEngine(), PytesseractEngine()))
+        except Exception as e:
+            print(f"[OCR] Could not reach the OCR server ({e}), loading {backend} in this process")
+    if backend == 'pytesseract':
+        return PytesseractEngine()
+    if backend == 'pipe':
+        return PipeEngine()
+    if backend == 'tesserocr':
+        return TesserocrEngine()
+    # auto
+    subprocess_engine = FallbackEngine(PipeEngine(), PytesseractEngine())
+    if TESSEROCR_AVAILABLE:
+        try:
+            return FallbackEngine(TesserocrEngine(), subprocess_engine)
+        except Exception as e:
+            print(f"[OCR] Could not start tesserocr ({e}), using {subprocess_engine.name}")
+    return subprocess_engine
+
+
+_engine = None
+_engine_backend = None
+_engine_lock = threading.Lock()
+_ocr_cache = OcrResultCache()
+
+
+def set_ocr_backend(backend='auto', server=False, priority=None):
+    """
+    Select the backend used by get_ocr_engine() (recreates the engine when it changes).
+
+    Args:
+        backend: See create_ocr_engine()
+        server: Use the shared OCR server process (see ocr_server.py)
+        priority: Queue priority of this process' requests on the server
+    """
+    global _engine, _engine_backend
+    with _engine_lock:
+        if _engine is not None and _engine_backend == (backend, server, priority):
+            return _engine
+        if _engine is not None:
+            _engine.close()
+        _engine = CachedOcrEngine(create_ocr_engine(backend, server, priority), _ocr_cache)
+        _engine_backend = (backend, server, priority)
+        print(f"[OCR] Using OCR engine: {_engine.name}")
+        return _engine
+
+
+def get_ocr_engine():
+    """Return the shared OCR engine (created with the 'auto' backend on first use)"""
+    if _engine is None:
+        return set_ocr_backend(*(_engine_backend or ('auto',)))
+    return _engine
+
+
+def get_ocr_cache():
+    """Return the shared OcrResultCache (hit/miss counters via get_stats())"""
+    return _ocr_cache
+
+
+def clear_ocr_cache():
+    """Forget all cached OCR results (called by translate_ocr_results.clear_potlines_cache())"""
+    _ocr_cache.clear()
+
+
+def data_to_words(data):
+    """
+    Words of an image_to_data() result, with numeric confidences.
+
+    Drops the block/paragraph/line rows pytesseract reports (conf -1) and empty words.
+
+    Returns:
+        List of dicts with text, conf (0-100), left, top, width, height and
+        line (the (block_num, par_num, line_num) Tesseract assigned), in reading order
+    """
+    words = []
+    for i, text in enumerate(data.get('text', [])):
+        try:
+            conf = float(data['conf'][i])
+        except (TypeError, ValueError):
+            continue
+        if conf < 0 or not text or not str(text).strip():
+            continue
+        words.append({
+            "text": str(text).strip(),
+            "conf": conf,
+            "left": int(data['left'][i]),
+            "top": int(data['top'][i]),
+            "width": int(data['width'][i]),
+            "height": int(data['height'][i]),
+            "line": (data['block_num'][i], data['par_num'][i], data['line_num'][i]),
+        })
+    return words
@@ -0,0 +1,151 @@
+"""
+Speculative parallel OCR on a warm process pool.
+
+When the first cascade candidate doesn't give a usable read, get_ocr_result() can send the next
+top-K (method, config) candidates to a pool of worker processes at once instead of trying them
+one after another. The first result that parses into potential lines wins; queued candidates are
+cancelled and late results are ignored.
+
+Each worker keeps its own OCR engine (a loaded tesserocr handle when available), created once by
+the pool initializer. OMP_THREAD_LIMIT=1 is set in every worker before Tesseract loads, so K
+workers use K cores instead of each one spawning a thread per core.
+"""
+import atexit
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+DEFAULT_TOP_K = 4
+
+# Set in each worker process by _init_worker()
+_worker_engine = None
+
+
+def _init_worker(backend):
+    """Pool initializer: limit Tesseract's OpenMP threads, then load the engine once"""
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    global _worker_engine
+    from src.ocr_engine import create_ocr_engine
+    _worker_engine = create_ocr_engine(backend)
+
+
+def _ocr_task(image, config, kind='string'):
+    """Runs in a worker: OCR one image, return (text or image_to_data dict, seconds)"""
+    started = time.perf_counter()
+    if kind == 'data':
+        result = _worker_engine.image_to_data(image, config)
+    else:
+        result = _worker_engine.image_to_string(image, config)
+    return result, time.perf_counter() - started
+
+
+def _warm_task():
+    return os.getpid()
+
+
+class OcrWorkerPool:
+    """A ProcessPoolExecutor of OCR workers with a speculative first-valid-wins runner"""
+
+    def __init__(self, workers=None, backend='auto'):
+        """
+        Args:
+            workers: Number of worker processes (default: CPU count - 1, at least 1)
+            backend: OCR backend each worker loads (see ocr_engine.create_ocr_engine())
+        """
+        if not workers:
+            workers = max(1, (os.cpu_count() or 2) - 1)
+        self.workers = workers
+        self.backend = backend
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(backend,))
+        self.stats = {"batches": 0, "jobs": 0, "cancelled": 0, "wins": 0}
+
+    def warm(self):
+        """Start every worker now (and load its engine) so the first bad roll doesn't pay for it"""
+        futures = [self.executor.submit(_warm_task) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def run_speculative(self, jobs, accept, cache=None, kind='string'):
+        """
+        OCR all jobs in parallel and return as soon as one is accepted.
+
+        Args:
+            jobs: List of (tag, image, config) in preference order
+            accept: Callable(text) -> True if the result is good enough to stop
+            cache: Optional ocr_engine.OcrResultCache - answered jobs skip the pool, new results are stored
+            kind: 'string' (image_to_string text) or 'data' (image_to_data dict with word confidences)
+
+        Returns:
+            Tuple (winner, results) where winner is the index of the accepted job (or None) and results
+            is a list of (index, text, seconds) for every job that finished, in completion order
+            (seconds is None for jobs answered from the cache)
+        """
+        self.stats["batches"] += 1
+        results = []
+        pending = {}
+        keys = {}
+        for index, (tag, image, config) in enumerate(jobs):
+            if cache is not None:
+                keys[index] = cache.make_key(image, config, kind)
+                text = cache.get(keys[index])
+                if text is not None:
+                    results.append((index, text, None))
+                    if accept(text):
+                        self.stats["wins"] += 1
+                        return index, results
+                    continue
+            pending[self.executor.submit(_ocr_task, image, config, kind)] = index
+            self.stats["jobs"] += 1
+
+        winner = None
+        while pending and winner is None:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    text, seconds = future.result()
+                except Exception as e:
+                    print(f"[OCR] Worker failed on {jobs[index][0]}: {e}")
+                    continue
+                if cache is not None:
+                    cache.put(keys[index], text)
+                results.append((index, text, seconds))
+                if winner is None and accept(text):
+                    winner = index
+
+        # Cancel whatever hasn't started; running calls finish in the background and are ignored
+        for future in pending:
+            if future.cancel():
+                self.stats["cancelled"] += 1
+        if winner is not None:
+            self.stats["wins"] += 1
+        return winner, results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+
+
+def get_ocr_pool(workers=None, backend='auto'):
+    """Shared warm pool (recreated if the worker count or backend changes)"""
+    global _pool
+    if _pool is not None and (_pool.backend != backend or (workers and _pool.workers != workers)):
+        _pool.shutdown()
+        _pool = None
+    if _pool is None:
+        _pool = OcrWorkerPool(workers=workers, backend=backend)
+        _pool.warm()
+        print(f"[OCR] Started {_pool.workers} OCR worker processes ({backend})")
+    return _pool
+
+
+def shutdown_ocr_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+atexit.register(shutdown_ocr_pool)
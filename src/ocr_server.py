@@ -0,0 +1,468 @@
+"""
+Long-lived OCR server shared by the GUI, the bot and the tools.
+
+One server process loads the OCR engine once (see ocr_engine.create_ocr_engine()) and serves every
+process of this install over a local connection - a named pipe on Windows, a Unix socket
+elsewhere (multiprocessing.connection). The first client that finds no server starts one as a
+detached process, later clients (a tool run while the GUI is open) connect to it and get
+warm-model latency from the first call. The server outlives the client that started it and exits
+once no client has been connected for SERVER_IDLE_TIMEOUT seconds.
+
+- Every server generates a random key for its session and writes it to a file only this user can
+  read (see get_key_path()); clients authenticate with it before anything is unpickled. Only the
+  process that started the server may shut it down.
+
+- Images are not pickled through the connection: each client owns a shared memory block, writes
+  the pixels of a request into it and only sends (offset, shape, dtype); the server copies them
+  out when the request arrives.
+- A request is a batch of jobs (every strip of a line pass at once); the reply comes when the
+  whole batch is done.
+- Jobs wait in one priority queue (lower number first, FIFO within a priority), so a bot roll is
+  never stuck behind a tool's slow full-screen OCR.
+
+ServerEngine is the client side, an OcrEngine like the others: set_ocr_backend(backend, server=True).
+"""
+import atexit
+import hashlib
+import itertools
+import os
+import queue
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+import cv2 as cv
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+    SHARED_MEMORY_AVAILABLE = True
+except ImportError:
+    SHARED_MEMORY_AVAILABLE = False
+
+PRIORITY_BOT = 0  # Rolls of a running bot
+PRIORITY_GUI = 5  # Interactive GUI requests
+PRIORITY_TOOL = 10  # Command line tools
+SERVER_THREADS = 2  # Jobs the server runs at once (each thread keeps its own Tesseract handle)
+SERVER_START_TIMEOUT = 30  # Seconds a client waits for a server it started to load the engine
+MIN_SEGMENT_SIZE = 1 << 20  # Initial size of a client's shared memory block (grows as needed)
+SERVER_IDLE_TIMEOUT = 600  # Seconds the server keeps running with no client connected
+SERVER_ARG = '--ocr-server'  # Command line switch that makes a frozen build run the server (see botUI.py)
+
+
+def _server_name():
+    """Name of this install's server (one server per project/executable directory)"""
+    from src.data_paths import get_base_dir
+    return "maple_autocuber_ocr_" + hashlib.blake2b(get_base_dir().encode(), digest_size=4).hexdigest()
+
+
+def get_runtime_dir():
+    """Per-user folder for the server's socket and key file (nobody else can read or write it)"""
+    if sys.platform == 'win32':
+        return tempfile.gettempdir()  # Already per user (%LOCALAPPDATA%\Temp)
+    path = os.path.join(tempfile.gettempdir(), f"maple_autocuber_{os.getuid()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise Exception(f"OCR server folder {path} must belong to this user with mode 700")
+    return path
+
+
+def get_server_address():
+    """Local address of this install's server"""
+    if sys.platform == 'win32':
+        return r'\\.\pipe' + '\\' + _server_name()
+    return os.path.join(get_runtime_dir(), _server_name() + ".sock")
+
+
+def get_key_path():
+    """File holding the running server's session key"""
+    return os.path.join(get_runtime_dir(), _server_name() + ".key")
+
+
+def _write_key(key):
+    """Publish the session key, readable by this user only"""
+    path = get_key_path()
+    temp_path = f"{path}.{os.getpid()}"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    os.replace(temp_path, path)
+
+
+def connect_ocr_server(address=None):
+    """
+    Connect to the running server with its session key.
+    
+    Raises:
+        OSError if no server answers (none running, still starting, or a stale key file)
+    """
+    address = address or get_server_address()
+    try:
+        with open(get_key_path(), 'rb') as f:
+            key = f.read()
+    except FileNotFoundError:
+        raise ConnectionRefusedError("No OCR server key file")
+    try:
+        return Client(address, authkey=key)
+    except AuthenticationError as e:
+        raise ConnectionRefusedError(f"OCR server rejected the session key: {e}")
+
+
+def _socket_alive(address):
+    """Whether something listens on a Unix socket file (without authenticating)"""
+    import socket
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(address)
+            return True
+        except OSError:
+            return False
+
+
+def _attach_segment(name):
+    """Open a client's shared memory block without taking ownership of it (the client unlinks it)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: attaching registers the block with the server's resource tracker, which
+        # would unlink it when the server exits - unregister it again
+        segment = shared_memory.SharedMemory(name=name)
+        if sys.platform != 'win32':
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+
+class OcrServer:
+    """The server process: one engine, a priority job queue and a few worker threads"""
+
+    def __init__(self, address, backend='auto', threads=SERVER_THREADS, owner_pid=None,
+                 idle_timeout=SERVER_IDLE_TIMEOUT):
+        from src.ocr_engine import create_ocr_engine
+        self.address = address
+        self.backend = backend
+        self.threads = threads
+        self.owner_pid = owner_pid  # Process that started the server, the only one allowed to shut it down
+        self.idle_timeout = idle_timeout
+        self.key = secrets.token_bytes(32)  # Session key, published by serve_forever()
+        self.engine = create_ocr_engine(backend)  # Loaded once for every client
+        self.jobs = queue.PriorityQueue()
+        self._order = itertools.count()  # FIFO within a priority
+        self.stats = {"clients": 0, "requests": 0, "jobs": 0, "errors": 0}
+        self._connected = 0
+        self._idle_since = time.monotonic()
+        self._clients_lock = threading.Lock()
+
+    def serve_forever(self):
+        listener = Listener(self.address, authkey=self.key)
+        # Only the server that got the address publishes its key (a server that lost the start race
+        # fails on Listener() above and never overwrites the winner's)
+        _write_key(self.key)
+        signal.signal(signal.SIGTERM, lambda *_: self._exit())
+        for _ in range(self.threads):
+            threading.Thread(target=self._work, daemon=True).start()
+        threading.Thread(target=self._watch_idle, daemon=True).start()
+        print(f"[OCR] OCR server {os.getpid()} ({self.engine.name}) listening on {self.address}")
+        while True:
+            try:
+                connection = listener.accept()
+            except (AuthenticationError, EOFError, OSError):
+                continue  # Wrong key or a liveness probe - nothing was read from it
+            self.stats["clients"] += 1
+            threading.Thread(target=self._serve_client, args=(connection,), daemon=True).start()
+
+    def _watch_idle(self):
+        """Exit once no client has been connected for idle_timeout seconds"""
+        while True:
+            time.sleep(5)
+            with self._clients_lock:
+                idle = self._connected == 0 and time.monotonic() - self._idle_since > self.idle_timeout
+            if idle and self.jobs.empty():
+                print(f"[OCR] OCR server {os.getpid()} idle for {self.idle_timeout}s, exiting")
+                self._exit()
+
+    def _serve_client(self, connection):
+        send_lock = threading.Lock()
+        segment = None  # The client's current shared memory block
+        with self._clients_lock:
+            self._connected += 1
+        try:
+            while True:
+                message = connection.recv()
+                op = message[0]
+                if op == 'ocr':
+                    _, request_id, priority, jobs = message
+                    self.stats["requests"] += 1
+                    batch = {"connection": connection, "send_lock": send_lock, "request_id": request_id,
+                             "results": [None] * len(jobs), "remaining": len(jobs), "lock": threading.Lock()}
+                    for index, (kind, config, image) in enumerate(jobs):
+                        if image[0] == 'shm':
+                            _, name, offset, shape, dtype = image
+                            if segment is None or segment.name != name:
+                                if segment is not None:
+                                    segment.close()
+                                segment = _attach_segment(name)
+                            # Copy out now: the client reuses the block for its next request
+                            array = np.frombuffer(segment.buf, dtype=dtype, count=int(np.prod(shape)),
+                                                  offset=offset).reshape(shape).copy()
+                        else:
+                            array = image[1]
+                        self.jobs.put((priority, next(self._order), batch, index, kind, config, array))
+                elif op == 'stats':
+                    with send_lock:
+                        connection.send(('stats', dict(self.stats, pid=os.getpid(), engine=self.engine.name,
+                                                       queued=self.jobs.qsize())))
+                elif op == 'shutdown':
+                    _, client_pid = message
+                    if client_pid != self.owner_pid:
+                        with send_lock:
+                            connection.send(('error', "Only the process that started the OCR server can shut it down"))
+                        continue
+                    with send_lock:
+                        connection.send(('bye',))
+                    self._exit()
+        except (EOFError, OSError):
+            pass  # Client went away
+        finally:
+            if segment is not None:
+                segment.close()
+            connection.close()
+            with self._clients_lock:
+                self._connected -= 1
+                self._idle_since = time.monotonic()
+
+    def _work(self):
+        while True:
+            _, _, batch, index, kind, config, image = self.jobs.get()
+            try:
+                if kind == 'data':
+                    result = ('ok', self.engine.image_to_data(image, config))
+                else:
+                    result = ('ok', self.engine.image_to_string(image, config))
+            except Exception as e:
+                self.stats["errors"] += 1
+                result = ('error', str(e))
+            self.stats["jobs"] += 1
+            with batch["lock"]:
+                batch["results"][index] = result
+                batch["remaining"] -= 1
+                done = batch["remaining"] == 0
+            if done:
+                try:
+                    with batch["send_lock"]:
+                        batch["connection"].send(('result', batch["request_id"], batch["results"]))
+                except (EOFError, OSError):
+                    pass
+
+    def _exit(self):
+        """Remove the socket file and the key file (unless a newer server replaced it), then exit"""
+        if sys.platform != 'win32':
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        try:
+            with open(get_key_path(), 'rb') as f:
+                if f.read() == self.key:
+                    os.unlink(get_key_path())
+        except OSError:
+            pass
+        os._exit(0)
+
+
+def run_server(address, backend='auto', threads=SERVER_THREADS, owner_pid=None):
+    """Server process entry point"""
+    os.environ["OMP_THREAD_LIMIT"] = "1"  # One core per job thread, like the OCR pool workers
+    try:
+        server = OcrServer(address, backend, threads, owner_pid)
+    except Exception as e:
+        print(f"[OCR] OCR server could not load the {backend} engine: {e}")
+        return
+    if sys.platform != 'win32' and os.path.exists(address):
+        if _socket_alive(address):
+            return  # Another server won the race
+        # A socket file nobody answers on is left over from a server that died
+        os.unlink(address)
+    try:
+        server.serve_forever()
+    except OSError as e:
+        # Another server is already listening (two clients started one at the same time)
+        print(f"[OCR] OCR server not started: {e}")
+
+
+def _server_command(address, backend):
+    """Command line that runs the server in a new process (frozen builds run their own executable)"""
+    args = ['--address', address, '--backend', backend, '--owner', str(os.getpid())]
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, SERVER_ARG] + args
+    return [sys.executable, '-m', 'src.ocr_server'] + args
+
+
+_server_process = None
+
+
+def start_ocr_server(backend='auto', address=None, timeout=SERVER_START_TIMEOUT):
+    """
+    Make sure a server is running: connect to this install's server, or start one (detached, so it
+    keeps serving the other clients when this process exits) and wait until it has loaded its engine.
+
+    Returns:
+        An open connection to the server
+    """
+    global _server_process
+    from src.data_paths import get_base_dir, get_data_path
+    address = address or get_server_address()
+    try:
+        return connect_ocr_server(address)
+    except OSError:
+        pass
+    if _server_process is None or _server_process.poll() is not None:
+        if sys.platform == 'win32':
+            detach = {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            detach = {"start_new_session": True}
+        with open(get_data_path("ocr_server.log"), 'a') as log:
+            _server_process = subprocess.Popen(_server_command(address, backend), cwd=get_base_dir(),
+                                               env=dict(os.environ, PYTHONUNBUFFERED='1'),
+                                               stdin=subprocess.DEVNULL, stdout=log, stderr=log, **detach)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return connect_ocr_server(address)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise Exception(f"OCR server did not start within {timeout}s")
+            if _server_process.poll() is not None:
+                # It lost a start race - the winner may only be listening a moment later
+                _server_process = None
+                try:
+                    time.sleep(0.2)
+                    return connect_ocr_server(address)
+                except OSError:
+                    raise Exception("OCR server exited during startup")
+            time.sleep(0.05)
+
+
+class OcrServerClient:
+    """Connection to the OCR server with its own shared memory block for the images"""
+
+    def __init__(self, backend='auto', priority=PRIORITY_BOT, address=None):
+        self.backend = backend
+        self.priority = priority
+        self.address = address or get_server_address()
+        self.connection = start_ocr_server(backend, self.address)
+        self.segment = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()  # One request in flight per client (the block is reused)
+        # The client owns its block - unlink it at exit instead of relying on the resource tracker
+        atexit.register(self.close)
+
+    def _to_array(self, image):
+        if isinstance(image, np.ndarray):
+            return np.ascontiguousarray(image)
+        # PIL image -> grayscale or BGR array, the layout the engines expect from numpy
+        if image.mode in ('1', 'L', 'P'):
+            return np.asarray(image.convert('L'))
+        return cv.cvtColor(np.asarray(image.convert('RGB')), cv.COLOR_RGB2BGR)
+
+    def _pack(self, arrays):
+        """Copy the images into the shared memory block; image descriptors for the request"""
+        if not SHARED_MEMORY_AVAILABLE:
+            return [('array', array) for array in arrays]
+        needed = sum(array.nbytes for array in arrays)
+        if self.segment is None or self.segment.size < needed:
+            self._release_segment()
+            self.segment = shared_memory.SharedMemory(create=True, size=max(MIN_SEGMENT_SIZE, 2 * needed))
+        images = []
+        offset = 0
+        for array in arrays:
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=self.segment.buf, offset=offset)
+            view[...] = array
+            images.append(('shm', self.segment.name, offset, array.shape, array.dtype.str))
+            offset += array.nbytes
+        return images
+
+    def _release_segment(self):
+        if self.segment is not None:
+            self.segment.close()
+            try:
+                self.segment.unlink()
+            except FileNotFoundError:
+                pass
+            self.segment = None
+
+    def run_batch(self, jobs, priority=None):
+        """
+        OCR a batch of images in one request.
+
+        Args:
+            jobs: List of (kind, image, config) with kind 'string' or 'data'
+            priority: Queue priority (default: the client's)
+
+        Returns:
+            List of ('ok', result) or ('error', message), in job order
+        """
+        priority = self.priority if priority is None else priority
+        arrays = [self._to_array(image) for _, image, _ in jobs]
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    request_id = next(self._ids)
+                    images = self._pack(arrays)
+                    self.connection.send(('ocr', request_id, priority,
+                                          [(kind, config, image) for (kind, _, config), image in zip(jobs, images)]))
+                    reply = self.connection.recv()
+                    return reply[2]
+                except (EOFError, OSError):
+                    if attempt:
+                        raise
+                    # The server went away (idle exit, shutdown, crash): start/find one and retry once,
+                    # with a new block
+                    self.connection.close()
+                    self._release_segment()
+                    self.connection = start_ocr_server(self.backend, self.address)
+
+    def get_stats(self):
+        with self._lock:
+            self.connection.send(('stats',))
+            return self.connection.recv()[1]
+
+    def shutdown(self):
+        """Stop the server (only honoured for the process that started it); True if it stopped"""
+        with self._lock:
+            self.connection.send(('shutdown', os.getpid()))
+            reply = self.connection.recv()
+        if reply[0] != 'bye':
+            print(f"[OCR] {reply[1]}")
+            return False
+        return True
+
+    def close(self):
+        with self._lock:
+            try:
+                self.connection.close()
+            except OSError:
+                pass
+            self._release_segment()
+
+
+def main(argv=None):
+    """Command line entry point of the server process (see _server_command())"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Shared OCR server")
+    parser.add_argument("--address", default=None, help="Listening address (default: this install's)")
+    parser.add_argument("--backend", default='auto', help="OCR backend to load")
+    parser.add_argument("--threads", type=int, default=SERVER_THREADS, help="Jobs run at once")
+    parser.add_argument("--owner", type=int, default=None, help="PID of the process allowed to shut the server down")
+    args = parser.parse_args(argv)
+    run_server(args.address or get_server_address(), args.backend, args.threads, args.owner)
+
+
+if __name__ == "__main__":
+    main()
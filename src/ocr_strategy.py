@@ -0,0 +1,144 @@
+"""
+Adaptive ordering of the OCR cascade.
+
+get_ocr_result() tries (preprocessing method, Tesseract config) candidates one after another until
+one gives a usable read. On a given setup the same candidate wins almost every time, so the profile
+records, per candidate, how often it produced a parseable three-line result and how long it took,
+and orders the cascade by expected cost (mean latency / success rate). Profiles are kept per window
+resolution and cube type and saved to disk, so the next session starts with the learned order.
+"""
+import atexit
+import json
+import os
+import threading
+from src.data_paths import get_data_path
+
+PROFILE_FILENAME = "ocr_strategy_profile.json"
+SAVE_EVERY = 20  # Save after this many recorded rolls (and at exit)
+DEFAULT_LATENCY = 0.1  # Assumed seconds per call for candidates that were never timed
+
+
+def get_profile_path():
+    """Profile file in the runtime data folder (see data_paths.py)"""
+    return get_data_path(PROFILE_FILENAME)
+
+
+def candidate_id(method, config):
+    """Stable id of a cascade candidate, e.g. 'raw|--psm 6'"""
+    return f"{method}|{config}"
+
+
+class OcrStrategyProfile:
+    """Success/latency statistics of every cascade candidate, per 'WIDTHxHEIGHT:cube_type' key"""
+
+    def __init__(self, path=None):
+        self.path = path or get_profile_path()
+        self.profiles = {}  # key -> {candidate id -> {"attempts", "successes", "time"}}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.load()
+
+    @staticmethod
+    def make_key(width, height, cube_type):
+        return f"{width}x{height}:{cube_type}"
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.profiles = data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[OCR] Could not load strategy profile {self.path}: {e}")
+
+    def save(self):
+        with self._lock:
+            if not self._unsaved:
+                return
+            data = json.dumps(self.profiles, indent=1, sort_keys=True)
+            self._unsaved = 0
+        try:
+            # Write to a temp file first so a crash mid-write can't corrupt the profile
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[OCR] Could not save strategy profile {self.path}: {e}")
+
+    def record(self, key, attempts):
+        """
+        Record one roll of the cascade.
+
+        Args:
+            key: Profile key (see make_key())
+            attempts: List of (candidate id, success, seconds) for every candidate the engine ran
+                (reads answered from an OCR cache take ~0 s and must be left out)
+        """
+        with self._lock:
+            profile = self.profiles.setdefault(key, {})
+            for cid, success, seconds in attempts:
+                stats = profile.setdefault(cid, {"attempts": 0, "successes": 0, "time": 0.0})
+                stats["attempts"] += 1
+                stats["successes"] += 1 if success else 0
+                stats["time"] += seconds
+            self._unsaved += 1
+            should_save = self._unsaved >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def order(self, key, candidates):
+        """
+        Sort candidates by expected cost: mean latency divided by (smoothed) success rate.
+
+        Candidates that were never tried get a neutral 50% prior, so they are still explored;
+        ties keep the default order.
+
+        Args:
+            key: Profile key
+            candidates: List of (method, config, description) in default order
+
+        Returns:
+            New list in learned order
+        """
+        with self._lock:
+            profile = dict(self.profiles.get(key, {}))
+        if not profile:
+            return list(candidates)
+
+        def expected_cost(item):
+            index, (method, config, _) = item
+            stats = profile.get(candidate_id(method, config))
+            if stats is None or stats["attempts"] == 0:
+                return (DEFAULT_LATENCY / 0.5, index)
+            success_rate = (stats["successes"] + 1) / (stats["attempts"] + 2)
+            latency = stats["time"] / stats["attempts"]
+            return (latency / success_rate, index)
+
+        return [c for _, c in sorted(enumerate(candidates), key=expected_cost)]
+
+    def summary(self, key):
+        """List of (candidate id, attempts, success rate, mean seconds), best first"""
+        with self._lock:
+            profile = dict(self.profiles.get(key, {}))
+        rows = []
+        for cid, stats in profile.items():
+            attempts = stats["attempts"]
+            rows.append((cid, attempts, stats["successes"] / attempts if attempts else 0.0,
+                         stats["time"] / attempts if attempts else 0.0))
+        rows.sort(key=lambda r: (-r[2], r[3]))
+        return rows
+
+
+_profile = None
+
+
+def get_strategy_profile():
+    """Shared profile, loaded on first use and saved at exit"""
+    global _profile
+    if _profile is None:
+        _profile = OcrStrategyProfile()
+        atexit.register(_profile.save)
+    return _profile
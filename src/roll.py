@@ -0,0 +1,102 @@
+"""
+Compact record of one roll.
+
+A Roll holds the three lines of a potential, the stats they add up to as a fixed-width int vector
+indexed by StatKind, flags about the read, its OCR confidence and timings. ALL stats are added to
+STR, DEX, INT and LUK like get_stat_values() always did, so the vector answers the threshold and
+totals questions directly; two rolls have the same stats when their vectors are equal (one array
+comparison, used by the cubes-used-up check).
+"""
+import time
+from array import array
+from enum import IntEnum, IntFlag
+from src.line_parse import parse_line
+
+STAT_MAX = 2 ** 31 - 1  # Stat sums saturate here (a garbage line can parse into a huge number)
+
+
+class StatKind(IntEnum):
+    """Index of each stat in a Roll's stat vector (same names as get_all_stats_from_line())"""
+    STR = 0
+    DEX = 1
+    INT = 2
+    LUK = 3
+    ALL = 4
+    ATT = 5
+    MATT = 6
+    BD = 7
+    CD = 8
+    IED = 9
+
+
+MAIN_STATS = (StatKind.STR, StatKind.DEX, StatKind.INT, StatKind.LUK)  # Also get the ALL stat value
+STAT_KINDS = {kind.name: kind for kind in StatKind}
+
+
+class RollFlag(IntFlag):
+    NONE = 0
+    UNKNOWN = 1  # Some line stayed below the OCR confidence threshold
+    OCR_FAILED = 2  # OCR returned nothing usable (line 1 and 2 are Trash)
+    NO_STATS = 4  # No line has a stat (garbage, or lines like IA/meso that carry no stat value)
+
+
+class Roll:
+    """One roll: lines, stat vector, flags, OCR confidence and timings"""
+    __slots__ = ('lines', 'stats', 'flags', 'confidence', 'ocr_time', 'read_at')
+
+    def __init__(self, lines, unknown=False, confidence=None, ocr_time=0.0, read_at=None):
+        """
+        Args:
+            lines: (line1, line2, line3) as read ("Trash" or None for missing lines)
+            unknown: Some line was read below the OCR confidence threshold
+            confidence: Lowest line confidence of the read (0-100, None if not measured)
+            ocr_time: Seconds the OCR of the roll took
+            read_at: time.monotonic() of the read (default: now)
+        """
+        self.lines = tuple(lines)
+        self.stats = array('i', bytes(4 * len(StatKind)))
+        for line in self.lines:
+            if line and line != "Trash":
+                for stat_type, value in parse_line(line).stats:
+                    kind = STAT_KINDS[stat_type]
+                    self.stats[kind] = min(self.stats[kind] + value, STAT_MAX)
+        all_value = self.stats[StatKind.ALL]
+        if all_value > 0:
+            for kind in MAIN_STATS:
+                self.stats[kind] = min(self.stats[kind] + all_value, STAT_MAX)
+
+        flags = RollFlag.NONE
+        if unknown:
+            flags |= RollFlag.UNKNOWN
+        if self.lines[0] == "Trash" and self.lines[1] == "Trash":
+            flags |= RollFlag.OCR_FAILED
+        if not any(self.stats):
+            flags |= RollFlag.NO_STATS
+        self.flags = flags
+        self.confidence = confidence
+        self.ocr_time = ocr_time
+        self.read_at = time.monotonic() if read_at is None else read_at
+
+    @property
+    def has_stats(self):
+        """At least one stat was read (garbage OCR reads none)"""
+        return not self.flags & RollFlag.NO_STATS
+
+    @property
+    def unknown(self):
+        return bool(self.flags & RollFlag.UNKNOWN)
+
+    def same_stats(self, other):
+        return self.stats == other.stats
+
+    def stat(self, kind):
+        """Value of a stat (StatKind or its name)"""
+        return self.stats[STAT_KINDS[kind] if isinstance(kind, str) else kind]
+
+    def stats_dict(self):
+        """The stats as the {name: value} dict get_stat_values() returns"""
+        return {kind.name: self.stats[kind] for kind in StatKind}
+
+    def __repr__(self):
+        stats = ", ".join(f"{kind.name}: {self.stats[kind]}" for kind in StatKind if self.stats[kind])
+        return f"Roll({self.lines!r}, stats=({stats}), flags={self.flags!r})"
@@ -0,0 +1,288 @@
+"""
+Roll targets compiled into one predicate.
+
+The targets of a session - the stat threshold and the flexible line check from the GUI, plus any
+targets declared in roll_targets.json - are turned into rule objects once, at session start.
+The compiled predicate then runs over a Roll (see roll.py) in a single pass: the line types every
+rule needs are detected once per comma part (a bitmask, memoized on the parsed line, see
+line_parse.py), the stat rules read the stat vector, and the first rule that matches is returned.
+
+roll_targets.json (next to the executable, or in the project root in dev runs) holds extra
+targets, checked after the GUI ones:
+
+    {"targets": [
+        {"name": "2L Boss Damage", "type": "lines", "stat_types": ["BD"], "count": 2},
+        {"name": "BD + ATT + IED", "type": "all_lines", "stat_types": ["BD", "ATT", "IED"]},
+        {"name": "30 LUK", "type": "threshold", "stats": ["LUK"], "min": 30},
+        {"name": "Bossing", "type": "stats", "min": {"BD": 70, "IED": 30}, "enabled": false}
+    ]}
+
+Rule types:
+    threshold: the highest of the listed stats (ALL already added to STR/DEX/INT/LUK) is at least min
+    lines: at least count lines (comma separated stats count one each) are one of stat_types
+    all_lines: every one of stat_types is on some line
+    stats: every listed stat is at least its value
+"""
+import json
+import os
+import sys
+from src.line_parse import parse_line
+from src.roll import StatKind, STAT_KINDS
+
+TARGETS_FILENAME = "roll_targets.json"
+
+# Line types a rule can ask for (detected by bot_logic's _has_* checks) and their GUI spellings
+LINE_TYPES = ("BD", "ATT", "MATT", "IED", "CD", "IA", "MESO", "SC")
+LINE_TYPE_ALIASES = {
+    "BOSS DAMAGE": "BD", "ATTACK POWER": "ATT", "MAGIC ATT": "MATT", "IGNORE DEFENSE": "IED",
+    "CRIT DAMAGE": "CD", "CRITICAL DAMAGE": "CD", "ITEM DROP RATE": "IA", "DROP RATE": "IA",
+    "MESO OBTAINED": "MESO", "SKILL COOLDOWNS": "SC",
+}
+CHECKABLE_STATS = (StatKind.STR, StatKind.DEX, StatKind.INT, StatKind.LUK, StatKind.ALL, StatKind.ATT, StatKind.MATT)
+
+
+def get_targets_path():
+    """Targets file next to the executable (frozen builds) or in the project root (dev runs)"""
+    if getattr(sys, 'frozen', False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, TARGETS_FILENAME)
+
+
+def canonical_line_type(stat_type):
+    """'Boss Damage' -> 'BD'; None for a type no detector knows"""
+    name = str(stat_type).strip().upper()
+    name = LINE_TYPE_ALIASES.get(name, name)
+    return name if name in LINE_TYPES else None
+
+
+def _stat_kind(name):
+    try:
+        return STAT_KINDS[str(name).strip().upper()]
+    except KeyError:
+        raise ValueError(f"unknown stat {name!r} (one of {', '.join(STAT_KINDS)})")
+
+
+def _line_types(stat_types):
+    types = [canonical_line_type(t) for t in stat_types or []]
+    unknown = [t for t, c in zip(stat_types or [], types) if c is None]
+    if unknown:
+        raise ValueError(f"unknown line type(s) {unknown} (one of {', '.join(LINE_TYPES)})")
+    return tuple(dict.fromkeys(types))
+
+
+class RollRule:
+    """A roll target; matches() gets the roll and the line type bitmask of each comma part"""
+    line_types = ()
+
+    def __init__(self, name=None):
+        self.name = name
+
+    def matches(self, roll, part_masks, bits):
+        raise NotImplementedError
+
+    def summary(self, roll, total_stats):
+        """Text inside the PASS (...) of the result line"""
+        return f"{self.name}, Stats: {total_stats}"
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class ThresholdRule(RollRule):
+    """Highest of some stats (stat vector) at least a minimum - the GUI stat threshold"""
+
+    def __init__(self, stats, minimum, name=None):
+        super().__init__(name)
+        self.stats = tuple(stats)
+        self.minimum = minimum
+
+    def highest(self, roll):
+        return max((roll.stats[kind] for kind in self.stats), default=0)
+
+    def matches(self, roll, part_masks, bits):
+        return self.highest(roll) >= self.minimum
+
+    def summary(self, roll, total_stats):
+        if self.name:
+            return super().summary(roll, total_stats)
+        return f"Stats: {total_stats}, Highest: {self.highest(roll)}, Threshold: {self.minimum}"
+
+
+class LinesRule(RollRule):
+    """At least `count` lines of the given types - the GUI flexible roll check"""
+
+    def __init__(self, line_types, count, name=None):
+        super().__init__(name)
+        self.line_types = tuple(line_types)
+        self.count = count
+
+    def matches(self, roll, part_masks, bits):
+        wanted = 0
+        for line_type in self.line_types:
+            wanted |= bits[line_type]
+        return sum(1 for mask in part_masks if mask & wanted) >= self.count
+
+    def summary(self, roll, total_stats):
+        if self.name:
+            return super().summary(roll, total_stats)
+        return f"{self.count}L: {', '.join(self.line_types)}, Stats: {total_stats}"
+
+
+class AllLinesRule(RollRule):
+    """Every one of the given types on some line"""
+
+    def __init__(self, line_types, name=None):
+        super().__init__(name)
+        self.line_types = tuple(line_types)
+
+    def matches(self, roll, part_masks, bits):
+        seen = 0
+        for mask in part_masks:
+            seen |= mask
+        return all(seen & bits[line_type] for line_type in self.line_types)
+
+    def summary(self, roll, total_stats):
+        if self.name:
+            return super().summary(roll, total_stats)
+        return f"{' + '.join(self.line_types)}, Stats: {total_stats}"
+
+
+class StatsRule(RollRule):
+    """Every listed stat (stat vector) at least its minimum"""
+
+    def __init__(self, minimums, name=None):
+        super().__init__(name)
+        self.minimums = tuple(minimums.items())  # ((StatKind, minimum), ...)
+
+    def matches(self, roll, part_masks, bits):
+        return all(roll.stats[kind] >= minimum for kind, minimum in self.minimums)
+
+    def summary(self, roll, total_stats):
+        if self.name:
+            return super().summary(roll, total_stats)
+        return f"{', '.join(f'{kind.name} {minimum}+' for kind, minimum in self.minimums)}, Stats: {total_stats}"
+
+
+def rule_from_dict(spec):
+    """
+    Build a rule from its JSON form (see the module docstring).
+
+    Raises:
+        ValueError: Unknown type, stat or line type, or a missing field
+    """
+    rule_type = spec.get("type")
+    name = spec.get("name")
+    try:
+        if rule_type == "threshold":
+            return ThresholdRule([_stat_kind(s) for s in spec["stats"]], int(spec["min"]), name)
+        if rule_type == "lines":
+            count = int(spec.get("count", 1))
+            if not 1 <= count <= 3:
+                raise ValueError(f"count must be 1-3, not {count}")
+            return LinesRule(_line_types(spec["stat_types"]), count, name)
+        if rule_type == "all_lines":
+            return AllLinesRule(_line_types(spec["stat_types"]), name)
+        if rule_type == "stats":
+            return StatsRule({_stat_kind(s): int(v) for s, v in spec["min"].items()}, name)
+    except KeyError as e:
+        raise ValueError(f"missing {e.args[0]!r}")
+    raise ValueError(f"unknown rule type {rule_type!r} (threshold, lines, all_lines or stats)")
+
+
+def load_roll_targets(path=None):
+    """
+    Rules declared in the targets file (none if there is no file).
+
+    Entries with "enabled": false are skipped; invalid entries are reported and skipped.
+    """
+    path = path or get_targets_path()
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        print(f"Could not load roll targets {path}: {e}")
+        return []
+    entries = data.get("targets", []) if isinstance(data, dict) else data
+    rules = []
+    for index, spec in enumerate(entries):
+        if not isinstance(spec, dict) or not spec.get("enabled", True):
+            continue
+        try:
+            rules.append(rule_from_dict(spec))
+        except ValueError as e:
+            print(f"Skipping roll target {spec.get('name') or index + 1} in {path}: {e}")
+    return rules
+
+
+def rules_from_config(config):
+    """
+    The rules of a bot config: stat threshold, flexible roll check, then the targets file.
+
+    The targets file is config["roll_targets_file"] if set, otherwise roll_targets.json (get_targets_path()).
+    """
+    rules = []
+    if config.get("stopAtStatThreshold", False):
+        stats = [kind for kind in CHECKABLE_STATS if config.get(f"{kind.name}check", False)]
+        rules.append(ThresholdRule(stats, config.get("statThreshold", 0)))
+    flex_config = config.get("flexible_roll_check", {})
+    if flex_config.get("enabled", False):
+        required_count = flex_config.get("required_count", 2)
+        # Types no detector knows never match, like they never did in check_roll_flexible()
+        line_types = [t for t in (canonical_line_type(s) for s in flex_config.get("stat_types", [])) if t]
+        if line_types and 1 <= required_count <= 3:
+            rules.append(LinesRule(dict.fromkeys(line_types), required_count))
+    rules.extend(load_roll_targets(config.get("roll_targets_file")))
+    return rules
+
+
+class CompiledRollRules:
+    """
+    The predicate of a session: call it with a Roll, get the first matching rule (or None).
+
+    Args:
+        rules: Rules in priority order
+        detectors: Line type -> function(text) -> bool (bot_logic's _has_* checks)
+    """
+
+    def __init__(self, rules, detectors):
+        self.rules = list(rules)
+        # Only the line types some rule needs are detected, one bit each
+        self.line_types = tuple(dict.fromkeys(t for rule in self.rules for t in rule.line_types))
+        self.bits = {line_type: 1 << index for index, line_type in enumerate(self.line_types)}
+        checks = [(self.bits[t], detectors[t]) for t in self.line_types]
+        self._mask_key = ("line_types",) + self.line_types
+
+        def mask_of(text):
+            mask = 0
+            for bit, detect in checks:
+                if detect(text):
+                    mask |= bit
+            return mask
+        self._mask_of = mask_of
+
+    def part_masks(self, roll):
+        """Line type bitmask of every comma part of the roll's lines"""
+        if not self.line_types:
+            return ()
+        return [part.check(self._mask_key, self._mask_of)
+                for line in roll.lines if line and line != "Trash"
+                for part in parse_line(line).parts]
+
+    def __call__(self, roll):
+        part_masks = self.part_masks(roll)
+        for rule in self.rules:
+            if rule.matches(roll, part_masks, self.bits):
+                return rule
+        return None
+
+    def __bool__(self):
+        return bool(self.rules)
+
+
+def compile_roll_rules(config, detectors):
+    """Compile a bot config (plus the targets file) into the session's predicate"""
+    return CompiledRollRules(rules_from_config(config), detectors)
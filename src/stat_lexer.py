@@ -0,0 +1,386 @@
+"""
+Single-pass lexer for potential lines.
+
+A raw OCR line is scanned once, with one compiled pattern, into name tokens ("Boss Damage",
+"LUK", "Magic ATT", ...), number tokens (runs of '+', digits and '%') and commas; the text in
+between is kept as gaps. The OCR corrections work on those tokens instead of rewriting the whole
+line pattern by pattern:
+
+- '%' misread as 5, 96 or 9 ("+95", "+796", "+49%") only ever changes a number token, and only
+  when the line as read has no stat or a value that can't exist (see legal_stat_values)
+- "+3%%" is collapsed in the number token
+- a number read as the stat name again ("Luk +Luk%") becomes 9
+- a missing '+' ("LUK 12%") is added, and letters in front of the name that aren't part of a
+  stat ("B LUK 12%") are dropped
+
+The stats are then read off the corrected tokens: per comma separated part, the first stat (in
+STAT_ORDER) whose name is followed by ": +value%". Nothing backtracks over more than one token,
+so a line costs time linear in its length - also the long garbage lines of a full-window OCR
+fallback.
+
+lex_line(line) -> LexedLine(text, stats): the corrected text and a tuple of
+StatToken(stat, value, confidence).
+"""
+import re
+import string
+from collections import namedtuple
+# Values a potential line can have, per stat (union over cube types and tiers). A parsed value
+# outside these is a misread of the number - usually '%' read as 5, 9 or 96.
+from src.line_catalog import legal_stat_values, STAT_NAMES
+
+StatToken = namedtuple('StatToken', ['stat', 'value', 'confidence'])
+LexedLine = namedtuple('LexedLine', ['text', 'stats'])
+
+CONFIDENCE_READ = 1.0  # Value read as it is
+CONFIDENCE_REPAIRED = 0.5  # '%' was misread as 5, 96 or 9 and the value repaired
+CONFIDENCE_INFERRED = 0.2  # No number was read ("Luk +Luk%") - 9 is assumed
+
+# A part of a line is read as the first of these stats it contains (MATT before ATT)
+STAT_ORDER = ("STR", "DEX", "INT", "LUK", "ALL", "MATT", "ATT", "BD", "CD", "IED")
+
+
+def is_legal_value(stat_type, value):
+    """True if `value` can appear on a potential line of `stat_type` (unknown stats are always legal)"""
+    legal = legal_stat_values.get(stat_type)
+    return legal is None or value in legal
+
+
+# Stat names (with the OCR misspellings seen in practice), numbers and commas. Names match
+# anywhere, also inside words - like the stat patterns always did; only STR/DEX/INT/LUK need a
+# word boundary in front to count as a stat (checked when the stats are read)
+TOKEN_PATTERN = re.compile(r"""
+      (?P<magic>Magic\s*(?:A[ti]tack\s*Power|ATT(?!acks\s+ignore)))
+    | (?P<attacks>Attacks\s+ignore(?!\s*Defense))
+    | (?P<attack>A[ti]tack\s*Power)
+    | (?P<boss>(?:B[Gx]|[BGx])oss\s*Damage)
+    | (?P<crit>Critical\s*Damage)
+    | (?P<ignore>Ign[aoe]r[ae]\s*Defense)
+    | (?P<all>All\s+Stats?|Allstats?|Alistats?|Alstats?|All)
+    | (?P<stat>STR|DEX|INT|LUK)
+    | (?P<att>ATT)
+    | (?P<num>[+\d%]+)
+    | (?P<comma>,)
+""", re.IGNORECASE | re.VERBOSE)
+
+NAME_KINDS = frozenset(('magic', 'attacks', 'attack', 'boss', 'crit', 'ignore', 'all', 'stat', 'att'))
+KIND_STATS = {'magic': 'MATT', 'attacks': 'IED', 'attack': 'ATT', 'boss': 'BD', 'crit': 'CD',
+              'ignore': 'IED', 'all': 'ALL', 'att': 'ATT'}  # 'stat' tokens are their own stat
+
+
+def _spellings(*patterns):
+    return [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+
+
+# Spellings a name token counts as its stat in, most preferred first (a part with two names of
+# one stat is read from the more preferred spelling) - the line catalog's name spellings, matched
+# against the whole token. Tokens that match none ("All Stat", "Magic AttackPower") are not read as a stat
+STAT_SPELLINGS = {stat: _spellings(*(name for name, _ in STAT_NAMES[stat]))
+                  for stat in ("ALL", "MATT", "ATT", "BD", "CD", "IED")}
+# Name tokens a missing '+' is added after (every kind but 'attacks', these two only in these spellings)
+PLUS_SPELLINGS = {
+    'all': re.compile(r'All\s+Stats?|Allstats?|Alistats?|Alstats?', re.IGNORECASE),
+    'magic': re.compile(r'Magic\s+ATT|MagicATT|Magic\s+A[ti]tack\s+Power|MagicA[ti]tackPower', re.IGNORECASE),
+}
+# Words in front of a name that are kept when a missing '+' is added (anything else is noise)
+PLUS_KEEP_WORDS = ('str', 'dex', 'int', 'luk', 'att', 'all')
+
+VALUE = re.compile(r'\+?(\d+)%+')  # After a name and whitespace with at most one ':'
+UNSIGNED_VALUE = re.compile(r'(\d+)%')
+DOUBLE_LINE_VALUE = re.compile(r'(\d+)%')  # "Attacks ignore 30% Monster"
+DOUBLE_LINE_END = re.compile(r'\s+Monster', re.IGNORECASE)
+MAX_VALUE_DIGITS = 20  # Longer digit runs (garbage) are no value
+
+# '%' read as 5 ("+95"), 96 ("+796", "+796%") or 9 ("+49%"); each matches inside one number token
+# (the lookahead is given the character after the token)
+PERCENT_AS_FIVE = re.compile(r'\+\d+5(?=\s|$|,|%)')
+PERCENT_AS_NINETY_SIX = re.compile(r'\+\d+96%?(?=\s|$|,|%)')
+PERCENT_AS_NINE = re.compile(r'\+\d+9%')
+DOUBLE_PERCENT = re.compile(r'(?<!\d)(\d+)%%+')  # From the start of the digits only (no retries inside them)
+PERCENT_PREFIX_VALUES = (3, 4, 6, 7, 9, 10, 12, 13)  # Values left once a trailing 96/9 is dropped
+
+# Characters of the run of text in front of a name ([A-Za-z\s] case-insensitively)
+RUN_LETTERS = frozenset(string.ascii_letters + 'İıſK')
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+def _is_value_gap(gap):
+    """Whitespace with at most one ':' (r'\\s*:?\\s*', checked without regex backtracking)"""
+    rest = gap.replace(':', '', 1)
+    return not rest or rest.isspace()
+
+
+def _number(digits):
+    return int(digits) if len(digits) <= MAX_VALUE_DIGITS else 0
+
+
+def _percent_as_five(match):
+    text = match.group(0)
+    # Every +XX5 with XX >= 2 ("+95" -> "+9%"); "+15" is a real value
+    return text.replace('5', '%') if len(text) > MAX_VALUE_DIGITS or int(text[1:-1]) >= 2 else text
+
+
+def _percent_as_ninety_six(match):
+    text = match.group(0)
+    prefix = _number(text[1:].rstrip('%')[:-2])
+    return f"+{prefix}%" if prefix in PERCENT_PREFIX_VALUES else text
+
+
+def _percent_as_nine(match):
+    text = match.group(0)
+    prefix = _number(text[1:-2])
+    return f"+{prefix}%" if prefix in PERCENT_PREFIX_VALUES else text
+
+
+def _repair_number(text, follow, repair_percent):
+    """
+    Correct one number token. `follow` is the character after the token ('' at the end of the
+    line) - what the misread patterns look ahead at.
+
+    Returns:
+        Tuple (text, repaired) - repaired is True if a misread '%' was put back
+    """
+    fixed = text + follow
+    if repair_percent:
+        fixed = PERCENT_AS_FIVE.sub(_percent_as_five, fixed)
+        fixed = PERCENT_AS_NINETY_SIX.sub(_percent_as_ninety_six, fixed)
+        fixed = PERCENT_AS_NINE.sub(_percent_as_nine, fixed)
+    repaired = fixed != text + follow
+    fixed = DOUBLE_PERCENT.sub(r'\1%', fixed)
+    return fixed[:len(fixed) - len(follow)], repaired
+
+
+def tokenize(line):
+    """
+    Scan a line into [kind, text, confidence] segments: a name kind (see TOKEN_PATTERN), 'num',
+    'comma', or 'gap' for the text between tokens. Joining the texts gives the line back.
+    """
+    segments = []
+    end = 0
+    for match in TOKEN_PATTERN.finditer(line):
+        if match.start() > end:
+            segments.append(['gap', line[end:match.start()], CONFIDENCE_READ])
+        segments.append([match.lastgroup, match.group(), CONFIDENCE_READ])
+        end = match.end()
+    if end < len(line):
+        segments.append(['gap', line[end:], CONFIDENCE_READ])
+    return segments
+
+
+def _read_value(segments, index, prev_char):
+    """(stat, spelling rank, index, value, confidence) if the name at `index` is followed by its value"""
+    kind, text, _ = segments[index]
+    if kind == 'stat':
+        if _is_word_char(prev_char):
+            return None
+        stat, rank = text.upper(), 0
+    else:
+        stat = KIND_STATS[kind]
+        rank = next((k for k, spelling in enumerate(STAT_SPELLINGS[stat]) if spelling.fullmatch(text)), None)
+        if rank is None:
+            return None
+    j = index + 1
+    gap = ''
+    if j < len(segments) and segments[j][0] == 'gap':
+        gap = segments[j][1]
+        j += 1
+    if j >= len(segments) or segments[j][0] != 'num':
+        return None
+    number, confidence = segments[j][1], segments[j][2]
+    if kind == 'attacks':
+        # "Attacks ignore 30% Monster": no sign, one '%', and the line goes on with "Monster"
+        match = gap.isspace() and DOUBLE_LINE_VALUE.fullmatch(number)
+        if not (match and j + 1 < len(segments) and segments[j + 1][0] == 'gap' and
+                DOUBLE_LINE_END.match(segments[j + 1][1])):
+            return None
+    else:
+        match = _is_value_gap(gap) and VALUE.match(number)
+        if not match:
+            return None
+    return stat, rank, index, _number(match.group(1)), confidence
+
+
+def _pick_stat(candidates, has_magic):
+    """The stat a comma separated part is read as (a list of at most one StatToken)"""
+    for stat in STAT_ORDER:
+        if stat == "ATT" and has_magic:
+            continue  # "Magic ATT" / "Magic Attack Power" in the part: ATT is the magic one
+        found = [c for c in candidates if c[0] == stat]
+        if found:
+            _, _, _, value, confidence = min(found, key=lambda c: (c[1], c[2]))
+            if value > 0:
+                return [StatToken(stat, value, confidence)]
+    return []
+
+
+def read_segment_stats(segments):
+    """Stats of a segment list: per comma separated part, the first stat in STAT_ORDER with a value"""
+    stats = []
+    candidates = []
+    has_magic = False
+    prev_char = ''
+    for index, (kind, text, _) in enumerate(segments):
+        if kind == 'comma':
+            stats += _pick_stat(candidates, has_magic)
+            candidates, has_magic = [], False
+        elif kind in NAME_KINDS:
+            # "Magic Attacks ignore" counts as magic for ATT too (it has "Magic Att" in it)
+            has_magic = has_magic or kind == 'magic' or (kind == 'attacks' and index and segments[index - 1][0] == 'gap'
+                                                         and segments[index - 1][1].rstrip().lower().endswith('magic'))
+            candidate = _read_value(segments, index, prev_char)
+            if candidate:
+                candidates.append(candidate)
+        prev_char = text[-1]
+    return stats + _pick_stat(candidates, has_magic)
+
+
+def _missing_number(segments, index, prev_char):
+    """
+    "Luk +Luk%" / "STR STR%": the number was read as the stat name again.
+
+    Returns:
+        (replacement segments, index after the fixed tokens) or None
+    """
+    kind, text, _ = segments[index]
+    if kind == 'magic':
+        # "Magic ATT +ATT%"
+        if not (text[-3:].lower() == 'att' and text[-4].isspace()):
+            return None
+    elif _is_word_char(prev_char):
+        return None
+    name = text[-3:]
+
+    def skip_space(j):
+        return j + 1 if j < len(segments) and segments[j][0] == 'gap' and segments[j][1].isspace() else j
+
+    j = skip_space(index + 1)
+    if j < len(segments) and segments[j][0] == 'num' and segments[j][1] == '+':
+        j = skip_space(j + 1)
+    if not (j < len(segments) and segments[j][0] in ('stat', 'att') and segments[j][1].lower() == name.lower()):
+        return None
+    j = skip_space(j + 1)
+    if not (j < len(segments) and segments[j][0] == 'num' and segments[j][1].startswith('%')):
+        return None
+    fixed = [[kind, text[:-3] + name.upper(), CONFIDENCE_READ], ['gap', ' ', CONFIDENCE_READ],
+             ['num', '+9%' + segments[j][1][1:], CONFIDENCE_INFERRED]]
+    return fixed, j + 1
+
+
+def _run_start(text):
+    """Index where the trailing run of letters/whitespace of a gap starts"""
+    k = len(text)
+    while k and (text[k - 1] in RUN_LETTERS or text[k - 1].isspace()):
+        k -= 1
+    return k
+
+
+def _missing_plus(out, segments, index):
+    """
+    "LUK 12%" / "B LUK 12%": add the missing '+' and drop noise in front of the name. `out` holds
+    the segments fixed so far (the run of words in front of the name is taken off its end).
+
+    Returns:
+        (replacement segments, index after the fixed tokens) or None
+    """
+    kind, text, _ = segments[index]
+    if kind == 'attacks' or (kind in PLUS_SPELLINGS and not PLUS_SPELLINGS[kind].fullmatch(text)):
+        return None
+    j = index + 1
+    # Whitespace (at most one ':') that ends in whitespace - r'\s*:?\s+'
+    if not (j + 1 < len(segments) and segments[j][0] == 'gap' and _is_value_gap(segments[j][1]) and
+            segments[j][1][-1].isspace() and segments[j + 1][0] == 'num'):
+        return None
+    number, confidence = segments[j + 1][1], segments[j + 1][2]
+    match = UNSIGNED_VALUE.match(number)
+    if not match:
+        return None
+    # The run of words/whitespace in front of the name, back to the last other character
+    k = len(out)
+    run = []
+    prefix = None
+    while k:
+        prev_kind, prev_text, _ = out[k - 1]
+        if prev_kind == 'gap':
+            start = _run_start(prev_text)
+            run.append(prev_text[start:])
+            if start:
+                prefix = prev_text[:start]
+                break
+        elif prev_kind in NAME_KINDS:
+            run.append(prev_text)
+        else:
+            break
+        k -= 1
+    if kind in ('attack', 'att') and any(seg[0] == 'magic' for seg in out[k:]):
+        return None  # "Magic ... ATT 9%" is the magic stat
+    before = ''.join(reversed(run)).strip()
+    keep = before and len(before) > 1 and (before.lower() in PLUS_KEEP_WORDS or
+                                           (kind == 'all' and before.lower() == 'al'))
+    del out[k - 1 if prefix is not None else k:]
+    if prefix is not None:
+        out.append(['gap', prefix, CONFIDENCE_READ])
+    if keep:
+        out.append(['gap', before + ' ', CONFIDENCE_READ])
+    fixed = [[kind, text, CONFIDENCE_READ], ['gap', ' ', CONFIDENCE_READ],
+             ['num', f"+{match.group(1)}%{number[match.end():]}", confidence]]
+    return fixed, j + 2
+
+
+def _fix_names(segments):
+    """Apply the missing number and missing '+' fixes, left to right"""
+    out = []
+    index = 0
+    while index < len(segments):
+        kind = segments[index][0]
+        fixed = None
+        if kind in ('stat', 'att', 'magic'):
+            fixed = _missing_number(segments, index, out[-1][1][-1] if out else '')
+        if fixed is None and kind in NAME_KINDS:
+            fixed = _missing_plus(out, segments, index)
+        if fixed is None:
+            out.append(segments[index])
+            index += 1
+        else:
+            out += fixed[0]
+            index = fixed[1]
+    # Merge the gaps the fixes left next to each other
+    merged = []
+    for segment in out:
+        if merged and segment[0] == 'gap' and merged[-1][0] == 'gap':
+            merged[-1] = ['gap', merged[-1][1] + segment[1], merged[-1][2]]
+        else:
+            merged.append(segment)
+    return merged
+
+
+def read_stats(line):
+    """Stats of a line as it is, without corrections (tuple of StatToken)"""
+    if not line:
+        return ()
+    return tuple(read_segment_stats(tokenize(line)))
+
+
+def lex_line(line):
+    """
+    Scan and correct a raw OCR line.
+
+    Returns:
+        LexedLine(text, stats): the corrected text (leading noise is left to the caller) and a
+        tuple of StatToken(stat, value, confidence), one per comma separated part that has a stat
+    """
+    if not line:
+        return LexedLine(line, ())
+    segments = tokenize(line)
+    # The '%' misread repairs only touch lines that don't already parse into legal values
+    # (e.g. "Boss Damage: +35%" is left alone)
+    raw_stats = read_segment_stats(segments)
+    repair_percent = not raw_stats or any(not is_legal_value(token.stat, token.value) for token in raw_stats)
+    for k, segment in enumerate(segments):
+        if segment[0] == 'num':
+            follow = segments[k + 1][1][0] if k + 1 < len(segments) else ''
+            text, repaired = _repair_number(segment[1], follow, repair_percent)
+            segments[k] = ['num', text, CONFIDENCE_REPAIRED if repaired else segment[2]]
+    segments = _fix_names(segments)
+    return LexedLine(''.join(segment[1] for segment in segments), tuple(read_segment_stats(segments)))
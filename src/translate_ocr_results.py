@@ -1,4 +1,6 @@
 import re
+from src.stat_lexer import lex_line, read_stats, legal_stat_values, is_legal_value
+from src.line_catalog import get_line_catalog, STAT_NAMES, PERCENT_VALUE
 
 # Lazy import to avoid errors during module import
 _potlines_instance = None
@@ -17,10 +19,22 @@ def get_last_ocr_error():
 def clear_potlines_cache():
     """Clear the cached potlines instance - call this when starting a new bot run"""
     global _potlines_instance, _current_window_name
+    if _potlines_instance is not None:
+        try:
+            _potlines_instance.stop_background_capture()
+        except Exception:
+            pass
     _potlines_instance = None
     _current_window_name = None
+    # Cached OCR results belong to the previous run (different window/crop/settings)
+    from src.ocr_engine import clear_ocr_cache
+    clear_ocr_cache()
+
+def get_current_potlines():
+    """Return the cached potlines instance as-is (None if there is none) - never recreates it"""
+    return _potlines_instance
 
-def get_potlines(window_name=None, debug=False, crop_region=None, test_image_path=None, auto_detect_crop=False, cube_type="Glowing"):
+def get_potlines(window_name=None, debug=False, crop_region=None, test_image_path=None, auto_detect_crop=False, cube_type="Glowing", capture_method='auto'):
     """Get or create potlines instance (lazy initialization)"""
     global _potlines_instance, _current_window_name
     
@@ -29,6 +43,7 @@ def get_potlines(window_name=None, debug=False, crop_region=None, test_image_pat
     current_crop_region = getattr(_potlines_instance, 'crop_region', None) if _potlines_instance else None
     current_auto_detect = getattr(_potlines_instance, 'auto_detect_crop', False) if _potlines_instance else False
     current_cube_type = getattr(_potlines_instance, 'cube_type', "Glowing") if _potlines_instance else "Glowing"
+    current_capture_method = getattr(_potlines_instance, 'capture_method', 'auto') if _potlines_instance else 'auto'
     
     # If window name, crop region, test image, auto_detect, or cube_type changed or instance doesn't exist, create new one
     # Important: Check if test_image_path changed (including from None to value or value to None)
@@ -46,7 +61,8 @@ def get_potlines(window_name=None, debug=False, crop_region=None, test_image_pat
                       test_image_changed or
                       crop_region_changed or
                       (auto_detect_crop != current_auto_detect) or
-                      (cube_type != current_cube_type))
+                      (cube_type != current_cube_type) or
+                      (capture_method != current_capture_method))
     
     if should_recreate:
         try:
@@ -56,7 +72,7 @@ def get_potlines(window_name=None, debug=False, crop_region=None, test_image_pat
                 print(f"  Current test_image: {current_test_image}, New test_image: {test_image_path}")
                 print(f"  Current crop_region: {current_crop_region}, New crop_region: {crop_region}")
                 print(f"  Current auto_detect: {current_auto_detect}, New auto_detect: {auto_detect_crop}")
-            _potlines_instance = potlines(window_name, crop_region=crop_region, test_image_path=test_image_path, auto_detect_crop=auto_detect_crop, cube_type=cube_type)
+            _potlines_instance = potlines(window_name, crop_region=crop_region, test_image_path=test_image_path, auto_detect_crop=auto_detect_crop, cube_type=cube_type, capture_method=capture_method)
             _current_window_name = window_name
             if debug:
                 print(f"[DEBUG] Created new potlines instance for window: {window_name}, crop_region: {crop_region}, test_image: {test_image_path}, auto_detect: {auto_detect_crop}")
@@ -75,29 +91,39 @@ def get_potlines(window_name=None, debug=False, crop_region=None, test_image_pat
             print(f"  Using test_image: {current_test_image if current_test_image else 'None (using live window)'}")
     return _potlines_instance
 
-single_lines_dict = {"BD":['Boss Damage: +30%', 'Boss Damage: +35%', 'Boss Damage: +40%', 'Boss Damage: +45%', 'Boss Damage: +50%'],"IA":['tem Acquisition Rate: +12%','tem Acquisition Rate: +10%'],"CD":['Critical Damage: +3%', 'Critical Damage: +6%'],"ATT":['ATT: +3%','ATT: +4%','ATT: +6%','ATT: +7%','ATT: +9%','ATT: +10%', 'Attack Power: +3%', 'Attack Power: +4%', 'Attack Power: +6%', 'Attack Power: +7%', 'Attack Power: +9%', 'Attack Power: +10%', 'Attack Power +3%', 'Attack Power +4%', 'Attack Power +6%', 'Attack Power +7%', 'Attack Power +9%', 'Attack Power +10%'],"MATT":['Magic ATT: +6%','Magic ATT: +9%']}
-double_lines_dict = {"IED":['Attacks ignore 30% Monster', 'Attacks ignore 35% Monster', 'Attacks ignore 40% Monster', 'Attacks ignore 45% Monster', 'Attacks ignore 50% Monster'],'Drop':['Increases Item Drop Rate by a'],}
-single_lines_list = ['Boss Damage: +30%', 'Boss Damage: +35%', 'Boss Damage: +40%', 'Boss Damage: +45%', 'Boss Damage: +50%','tem Acquisition Rate: +12%','tem Acquisition Rate: +10%','Critical Damage: +3%', 'Critical Damage: +6%','ATT: +3%','ATT: +4%','ATT: +6%','ATT: +7%','ATT: +9%','ATT: +10%','Attack Power: +3%', 'Attack Power: +4%', 'Attack Power: +6%', 'Attack Power: +7%', 'Attack Power: +9%', 'Attack Power: +10%', 'Attack Power +3%', 'Attack Power +4%', 'Attack Power +6%', 'Attack Power +7%', 'Attack Power +9%', 'Attack Power +10%','Magic ATT: +6%','Magic ATT: +9%']
-double_lines_list = ['Attacks ignore 30% Monster', 'Attacks ignore 35% Monster', 'Attacks ignore 40% Monster', 'Attacks ignore 45% Monster', 'Attacks ignore 50% Monster','Increases Item Drop Rate by a','Increases tem and Meso Drop']
+# Known lines per kind, generated from the line catalog - bot_logic uses the same dicts.
+# Single lines fit one row; double lines are the first row of a line the game wraps over two.
+_catalog = get_line_catalog()
+single_lines_dict = {kind: _catalog.texts(kind) for kind in ("BD", "IA", "CD", "ATT", "MATT")}
+double_lines_dict = {kind: _catalog.texts(kind, double=True) for kind in ("IED", "Drop", "MnD")}
+single_lines_list = [line for lines in single_lines_dict.values() for line in lines]
+double_lines_list = [line for lines in double_lines_dict.values() for line in lines]
+
+def _name_patterns(stat, name, value):
+    """
+    Value patterns of one name spelling. BD, CD and IED names are tried with "+N%" right after them
+    first, so "xoss Damage:+0%5, Goss Damage +30%" reads 30.
+    """
+    if stat in ("BD", "CD", "IED") and value == PERCENT_VALUE:
+        return [name + r'\s*\+(\d+)%+', name + value]
+    return [name + value]
+
+# Stat patterns - a stat's name spellings from the line catalog, each followed by its value
+# ("STR: +9%", "STR +9%", "STR:+9%", "STR: +9%%"); group 1 is the number
+stat_patterns = {stat: [pattern for name, value in names for pattern in _name_patterns(stat, name, value)]
+                 for stat, names in STAT_NAMES.items()}
+# Stat lines matches_line_pattern accepts with any value: the same names with a '+' and a single '%'
+stat_patterns_to_check = {stat: [name + r'\s*:?\s*\+(\d+)%' for name, value in STAT_NAMES[stat] if value == PERCENT_VALUE]
+                          for stat in ("STR", "DEX", "INT", "LUK", "ALL", "ATT")}
+
+def get_illegal_stats(line):
+    """(stat_type, value) pairs of a line whose value can't exist for that stat"""
+    return [(stat_type, value) for stat_type, value in get_all_stats_from_line(line)
+            if not is_legal_value(stat_type, value)]
 
-# Stat dictionaries - common OCR patterns for stat lines
-# These patterns account for OCR variations like "STR: +9%" or "STR +9%" or "STR:+9%"
-stat_patterns = {
-    "STR": [r'\bSTR\s*:?\s*\+?(\d+)%+', r'\bSTR\s*\+(\d+)%+'],  # Added word boundary and optional + for missing + cases, %+ allows one or more %
-    "DEX": [r'\bDEX\s*:?\s*\+?(\d+)%+', r'\bDEX\s*\+(\d+)%+'],
-    "INT": [r'\bINT\s*:?\s*\+?(\d+)%+', r'\bINT\s*\+(\d+)%+'],
-    "LUK": [r'\bLUK\s*:?\s*\+?(\d+)%+', r'\bLUK\s*\+(\d+)%+'],  # Added word boundary and optional + for missing + cases, %+ allows one or more %
-    "ALL": [r'All\s+Stats\s*:?\s*\+?(\d+)%+', r'All\s+Stats\s*\+(\d+)%+', r'All\s*:?\s*\+?(\d+)%+', r'Allstats\s*:?\s*\+?(\d+)%+', r'Allstats\s*\+(\d+)%+', r'Alistats\s*:?\s*\+?(\d+)%+', r'Alistats\s*\+(\d+)%+', r'Alstats\s*:?\s*\+?(\d+)%+', r'Alstats\s*\+(\d+)%+'],
-    "ATT": [r'(?<!Magic\s)ATT\s*:?\s*\+?(\d+)%+', r'(?<!Magic\s)ATT\s*\+(\d+)%+', r'(?<!Magic\s)A[ti]tack\s+Power\s*:?\s*\+?(\d+)%+', r'(?<!Magic\s)A[ti]tack\s+Power\s*\+(\d+)%+', r'(?<!Magic)A[ti]tackPower\s*:?\s*\+?(\d+)%+', r'(?<!Magic)A[ti]tackPower\s*\+(\d+)%+'],
-    "MATT": [r'Magic\s+ATT\s*:?\s*\+?(\d+)%+', r'Magic\s+ATT\s*\+(\d+)%+', r'MagicATT\s*:?\s*\+?(\d+)%+', r'MagicATT\s*\+(\d+)%+', r'Magic\s+A[ti]tack\s+Power\s*:?\s*\+?(\d+)%+', r'Magic\s+A[ti]tack\s+Power\s*\+(\d+)%+', r'MagicA[ti]tackPower\s*:?\s*\+?(\d+)%+', r'MagicA[ti]tackPower\s*\+(\d+)%+'],
-    "BD": [r'BossDamage\s*\+(\d+)%+', r'BossDamage\s*:?\s*\+?(\d+)%+', r'Boss\s+Damage\s*\+(\d+)%+', r'Boss\s+Damage\s*:?\s*\+?(\d+)%+', r'[BGx]ossDamage\s*\+(\d+)%+', r'[BGx]ossDamage\s*:?\s*\+?(\d+)%+', r'[BGx]oss\s+Damage\s*\+(\d+)%+', r'[BGx]oss\s+Damage\s*:?\s*\+?(\d+)%+', r'B[Gx]ossDamage\s*\+(\d+)%+', r'B[Gx]ossDamage\s*:?\s*\+?(\d+)%+', r'B[Gx]oss\s+Damage\s*\+(\d+)%+', r'B[Gx]oss\s+Damage\s*:?\s*\+?(\d+)%+'],
-    "CD": [r'CriticalDamage\s*\+(\d+)%+', r'CriticalDamage\s*:?\s*\+?(\d+)%+', r'Critical\s+Damage\s*\+(\d+)%+', r'Critical\s+Damage\s*:?\s*\+?(\d+)%+'],
-    "IED": [r'Ign[aoe]r[ae]Defense\s*\+(\d+)%+', r'Ign[aoe]r[ae]Defense\s*:?\s*\+?(\d+)%+', r'Ign[aoe]r[ae]\s+Defense\s*\+(\d+)%+', r'Ign[aoe]r[ae]\s+Defense\s*:?\s*\+?(\d+)%+', r'Attacks\s+ignore\s+(\d+)%\s+Monster(?:\s+Defense)?'],
-    "SC": [r'Skill\s+[Cc]ooldowns?\s*:?\s*-(\d+)\s*sec', r'Skill\s+[Cc]ooldowns?\s*-(\d+)\s*sec', r'Skill[Cc]ooldowns?\s*:?\s*-(\d+)\s*sec', r'Skill[Cc]ooldowns?\s*-(\d+)\s*sec']
-}
-def get_lines(window_name=None, debug=False, crop_region=None, test_image_path=None, auto_detect_crop=False, cube_type="Glowing"):
+def get_lines(window_name=None, debug=False, crop_region=None, test_image_path=None, auto_detect_crop=False, cube_type="Glowing", capture_method='auto'):
     try:
-        raw_lines = get_potlines(window_name, debug=debug, crop_region=crop_region, test_image_path=test_image_path, auto_detect_crop=auto_detect_crop, cube_type=cube_type)
+        raw_lines = get_potlines(window_name, debug=debug, crop_region=crop_region, test_image_path=test_image_path, auto_detect_crop=auto_detect_crop, cube_type=cube_type, capture_method=capture_method)
         if raw_lines is None:
             if debug:
                 print("[DEBUG] get_potlines returned None")
@@ -113,6 +139,12 @@ def get_lines(window_name=None, debug=False, crop_region=None, test_image_path=N
             return ""
         if debug:
             print(f"[DEBUG] Raw OCR text: {repr(lines)}")
+            print(f"[DEBUG] Read from frame: {raw_lines.last_frame}")
+            if raw_lines.last_trace:
+                trace = raw_lines.last_trace
+                print(f"[DEBUG] OCR trace: {trace['path']}, {trace['candidates_tried']} candidates, "
+                      f"{trace['valid_lines']} valid lines, {trace['total_time'] * 1000:.1f} ms: "
+                      f"{[(cid[:30], lines, round(t * 1000, 1)) for cid, lines, t in trace['attempts']]}")
         return lines
     except Exception as e:
         set_last_ocr_error(f"Error getting OCR lines: {e}")
@@ -135,279 +167,17 @@ def split_lines(lines):
     #print(splitlines)
     return splitlines
 
-def fix_ocr_percent_errors(line):
-    """
-    Fix common OCR errors where '%' is misread as '5'.
-    Example: 'Attack Power +95' -> 'Attack Power +9%'
-    Valid stat values: 3, 4, 6, 7, 9, 10, 12, 13, 15, 18, 21, 30, 35, 40, 45, 50
-    Since there's no possible line with +95, +85, +75, etc., we fix +XX5 patterns.
-    """
-    if not line:
-        return line
-    
-    import re
-    
-    # Fix pattern: +XX5 where XX is a digit, at end or followed by whitespace/comma
-    # Replace trailing 5 with % for numbers that don't make sense
-    # Valid stats ending in 5: +15, +35, +45 (but user said no +95 possible)
-    # We'll fix: +25, +55, +65, +75, +85, +95 (definitely wrong)
-    # And also +35, +45 if they appear (could be valid but likely misreads)
-    
-    def replace_percent_error(match):
-        """Replace trailing 5 with % if it's likely a misread"""
-        full_match = match.group(0)
-        # Extract the number before the 5 (e.g., "9" from "+95")
-        number_match = re.search(r'\+(\d+)5', full_match)
-        if number_match:
-            prefix = number_match.group(1)
-            if prefix:
-                prefix_num = int(prefix)
-                # Fix all +XX5 where XX >= 2 (since user said no +95 is possible)
-                # This covers: +25, +35, +45, +55, +65, +75, +85, +95
-                # +15 is valid, so we skip it (prefix_num == 1)
-                if prefix_num >= 2:
-                    return full_match.replace('5', '%')
-        return full_match
-    
-    # Match: + followed by digits, then 5, at word boundary or end of line/comma
-    # This will match patterns like: +95, +85, +75, +65, +55, +45, +35, +25
-    fixed = re.sub(r'\+\d+5(?=\s|$|,|%)', replace_percent_error, line)
-    
-    return fixed
+# Start of every single line pattern ("boss damage:", "attack power", ...) - a leading noise
+# character is only dropped when the rest of the line starts like a known line
+single_line_starts = tuple(pattern.split('+')[0].strip().lower()
+                           for pattern_list in single_lines_dict.values() for pattern in pattern_list)
+boss_damage_line_starts = tuple(pattern.split('+')[0].strip().lower() for pattern in single_lines_dict["BD"])
 
-def fix_ocr_percent_as_nine_errors(line):
-    """
-    Fix OCR errors where '%' is misread as '9', creating invalid two-digit numbers.
-    Example: 'AllStats +49%' -> 'AllStats +4%' (the '%' was read as '9')
-    Valid stat values: 3%, 4%, 6%, 7%, 9%, 10%, 12%, 13%
-    Invalid patterns that should be fixed: +39%, +49%, +69%, +79%, +99%, +109%, +129%, +139%
-    These become: +3%, +4%, +6%, +7%, +9%, +10%, +12%, +13%
+def strip_leading_noise(line):
     """
-    if not line:
-        return line
-    
-    import re
-    
-    # Valid stat values (single and double digit)
-    valid_stats = [3, 4, 6, 7, 9, 10, 12, 13]
-    
-    def replace_nine_error(match):
-        """Replace trailing 9 with % if it's likely a misread of %"""
-        full_match = match.group(0)  # e.g., "+49%"
-        # Extract the number before the 9 (e.g., "4" from "+49%")
-        number_match = re.search(r'\+(\d+)9%', full_match)
-        if number_match:
-            prefix_str = number_match.group(1)  # e.g., "4" from "+49%"
-            if prefix_str:
-                prefix_num = int(prefix_str)
-                # If the prefix (without the 9) is a valid stat, fix it
-                # e.g., "49%" -> "4%", "109%" -> "10%"
-                if prefix_num in valid_stats:
-                    # Replace the entire match with + prefix + %
-                    return '+' + str(prefix_num) + '%'
-        
-        return full_match
-    
-    # Match: + followed by digits ending in 9, followed by %
-    # This will match patterns like: +39%, +49%, +69%, +79%, +99%, +109%, +129%, +139%
-    # But we only fix if removing the 9 gives a valid stat value
-    fixed = re.sub(r'\+\d+9%', replace_nine_error, line)
-    
-    return fixed
-
-def fix_ocr_percent_as_ninety_six_errors(line):
-    """
-    Fix OCR errors where '%' is misread as '96', creating invalid three-digit numbers.
-    Example: 'INT +796' -> 'INT +7%' (the '%' was read as '96')
-    Valid stat values: 3%, 4%, 6%, 7%, 9%, 10%, 12%, 13%
-    Invalid patterns that should be fixed: +396, +496, +696, +796, +996, +1096, +1296, +1396
-    These become: +3%, +4%, +6%, +7%, +9%, +10%, +12%, +13%
-    """
-    if not line:
-        return line
-    
-    import re
-    
-    # Valid stat values (single and double digit)
-    valid_stats = [3, 4, 6, 7, 9, 10, 12, 13]
-    
-    def replace_ninety_six_error(match):
-        """Replace trailing 96 with % if it's likely a misread of %"""
-        full_match = match.group(0)  # e.g., "+796" or "+796%"
-        # Extract the number before the 96 (e.g., "7" from "+796" or "+796%")
-        number_match = re.search(r'\+(\d+)96%?', full_match)
-        if number_match:
-            prefix_str = number_match.group(1)  # e.g., "7" from "+796" or "+796%"
-            if prefix_str:
-                prefix_num = int(prefix_str)
-                # If the prefix (without the 96) is a valid stat, fix it
-                # e.g., "796" -> "7%", "796%" -> "7%", "1096" -> "10%"
-                if prefix_num in valid_stats:
-                    # Replace the entire match with + prefix + %
-                    return '+' + str(prefix_num) + '%'
-        
-        return full_match
-    
-    # Match: + followed by digits ending in 96, optionally followed by %, at word boundary or end of line/comma
-    # This will match patterns like: +396, +496, +696, +796, +996, +1096, +1296, +1396
-    # And also: +396%, +496%, +696%, +796%, +996%, +1096%, +1296%, +1396%
-    # But we only fix if removing the 96 gives a valid stat value
-    fixed = re.sub(r'\+\d+96%?(?=\s|$|,|%)', replace_ninety_six_error, line)
-    
-    return fixed
-
-def fix_missing_plus_sign(line):
-    """
-    Fix OCR errors where '+' sign is missing before percentages.
-    Example: 'LUK 12%' -> 'LUK +12%', 'B LUK 12%' -> 'LUK +12%'
-    Handles stat names: STR, DEX, INT, LUK, ALL/All Stats, ATT/Attack Power, etc.
-    """
-    if not line:
-        return line
-    
-    import re
-    
-    # Pattern to match stat names followed by optional colon/space, then digits and %
-    # This will match: "LUK 12%", "LUK: 12%", "STR 9%", "All Stats 6%", etc.
-    # Also handles noise before stat name: "B LUK 12%" -> "LUK +12%"
-    
-    # Stat name patterns (case-insensitive) - order matters (longer patterns first)
-    stat_patterns = [
-        (r'(All\s+Stats?|Allstats?|Alistats?|Alstats?)', 'ALL'),  # All stats variations
-        (r'(Magic\s+ATT|MagicATT|Magic\s+A[ti]tack\s+Power|MagicA[ti]tackPower)', 'MATT'),  # Magic ATT (handles OCR error "Aitack", with or without space)
-        (r'(A[ti]tack\s+Power|A[ti]tackPower)', 'ATT'),  # Attack Power (handles OCR error "Aitack", with or without space)
-        (r'([BGx]oss\s+Damage|[BGx]ossDamage|B[Gx]oss\s+Damage|B[Gx]ossDamage)', 'BD'),  # Boss Damage (with or without space, handles OCR errors where B is misread as G/x)
-        (r'(Ign[aoe]r[ae]\s+Defense|Ign[aoe]r[ae]Defense)', 'IED'),  # Ignore Defense (handles OCR errors where 'o'→'a'/'e' and 'e'→'a'/'e', with or without space)
-        (r'(Critical\s+Damage|CriticalDamage)', 'CD'),  # Critical Damage (with or without space)
-        (r'(STR|DEX|INT|LUK)', 'STAT'),  # Single stat
-        (r'(ATT)', 'ATT'),  # ATT (short) - but check for Magic first
-    ]
-    
-    # Try to find and fix missing + signs
-    for stat_pattern, stat_type in stat_patterns:
-        # Pattern: optional text before, stat name, optional colon, optional space, digits, %
-        # But NOT if there's already a + sign before the digits
-        # This matches: "LUK 12%", "B LUK 12%", "LUK: 12%", etc.
-        pattern = rf'([A-Za-z\s]*?)({stat_pattern})\s*:?\s+(?!\+)(\d+)%'
-        
-        def add_plus(match):
-            # match.group(1) = text before stat (might be noise like "B " or "Alstats ")
-            # match.group(2) = stat name
-            # match.group(3) = number
-            before = match.group(1).strip()
-            stat = match.group(2)
-            number = match.group(3)
-            
-            # Special handling: exclude Magic before AttackPower/ATT for ATT stat type
-            if stat_type == 'ATT':
-                # Check if "Magic" appears before the stat (with or without space)
-                # Handle OCR error "Aitack" (t→i)
-                full_match = match.group(0)
-                if re.search(r'Magic\s*A[ti]tack\s*Power|MagicA[ti]tackPower|Magic\s*ATT|MagicATT', full_match, re.IGNORECASE):
-                    return full_match  # Don't fix, this is Magic ATT
-            
-            # Check if text before is likely noise
-            # Noise indicators:
-            # 1. Single character that's not a known stat prefix
-            # 2. Text that doesn't match known stat patterns
-            is_noise = False
-            if before:
-                before_clean = before.strip()
-                # Single character before stat is likely noise (e.g., "B" before "LUK")
-                if len(before_clean) == 1:
-                    is_noise = True
-                # Check if before text is part of a known stat pattern (like "Al" from "Alstats")
-                elif stat_type == 'ALL' and before_clean.lower() in ['al', 'all']:
-                    # This is part of "Allstats" or similar, keep it
-                    is_noise = False
-                elif before_clean.lower() in ['str', 'dex', 'int', 'luk', 'att', 'all']:
-                    # This is a stat name, not noise
-                    is_noise = False
-                else:
-                    # Unknown text, likely noise
-                    is_noise = True
-            
-            if is_noise:
-                # Remove noise and add +
-                return f"{stat} +{number}%"
-            else:
-                # Keep the text before, but add + before number
-                return f"{before} {stat} +{number}%" if before else f"{stat} +{number}%"
-        
-        line = re.sub(pattern, add_plus, line, flags=re.IGNORECASE)
-    
-    return line
-
-def fix_missing_numbers(line):
-    """
-    Fix OCR errors where numbers are missing in stat lines.
-    Example: 'Luk +Luk%' -> 'LUK +9%', 'STR +STR%' -> 'STR +9%'
-    This handles cases where OCR reads the stat name instead of the number.
-    """
-    if not line:
-        return line
-    
-    import re
-    
-    # Pattern to match stat name followed by + and then the stat name again (missing number)
-    # Examples: "Luk +Luk%", "STR +STR%", "LUK +LUK%", "Luk+Luk%"
-    # Match case-insensitively and handle both stat names being the same
-    stat_pattern = r'\b(STR|DEX|INT|LUK|ATT|Luk|Str|Dex|Int|Att)\s*\+?\s*\1\s*%'
-    
-    def replace_missing_number(match):
-        stat_name = match.group(1).upper()
-        # Try to infer the number - use most common value (9)
-        # Common stat values: 3, 4, 6, 7, 9, 10, 12, 15, 18, 21, 30, 35, 40, 45, 50
-        # 9 is the most common for single-line stats
-        inferred_value = 9  # Default to most common
-        
-        return f"{stat_name} +{inferred_value}%"
-    
-    # Apply the fix (case-insensitive)
-    line = re.sub(stat_pattern, replace_missing_number, line, flags=re.IGNORECASE)
-    
-    # Also handle cases where stat name is repeated with % but no number and no +
-    # Pattern: "LUK LUK%" or "STR STR%" (without +)
-    repeated_stat_pattern = r'\b(STR|DEX|INT|LUK|ATT|Luk|Str|Dex|Int|Att)\s+\1\s*%'
-    def fix_repeated_stat(match):
-        stat_name = match.group(1).upper()
-        return f"{stat_name} +9%"  # Use default value
-    
-    line = re.sub(repeated_stat_pattern, fix_repeated_stat, line, flags=re.IGNORECASE)
-    
-    return line
-
-def normalize_line(line):
-    """
-    Normalize OCR line by removing leading noise characters and extra whitespace.
+    Remove leading noise characters and extra whitespace.
     Handles cases like '@ Attack Power +9%' -> 'Attack Power +9%'
-    Also fixes OCR errors where '%' is misread as '5'.
     """
-    if not line:
-        return line
-    
-    import re
-    
-    # First fix OCR percent errors (e.g., +95 -> +9%)
-    line = fix_ocr_percent_errors(line)
-    
-    # Fix OCR errors where % is misread as 96 (e.g., +796 -> +7%)
-    line = fix_ocr_percent_as_ninety_six_errors(line)
-    
-    # Fix OCR errors where % is misread as 9 (e.g., +49% -> +4%)
-    line = fix_ocr_percent_as_nine_errors(line)
-    
-    # Fix double %% (e.g., +3%% -> +3%)
-    line = re.sub(r'(\d+)%%+', r'\1%', line)
-    
-    # Fix missing numbers in stat lines (e.g., "Luk +Luk%" -> "LUK +9%")
-    line = fix_missing_numbers(line)
-    
-    # Fix missing + signs before percentages (e.g., "LUK 12%" -> "LUK +12%")
-    line = fix_missing_plus_sign(line)
-    
-    # Remove leading single non-alphanumeric characters that are likely OCR noise
-    # Common OCR noise: @, ©, G, and other symbols
     normalized = line.strip()
     
     # Remove leading noise: any non-alphanumeric character at start, followed by space
@@ -416,16 +186,11 @@ def normalize_line(line):
     normalized = re.sub(r'^[^A-Za-z0-9\s]\s+', '', normalized)
     
     # Also handle single noise character directly before a letter (no space)
-    # Check if first char is not alphanumeric and removing it would help
+    # Check if removing first char would make it start with a known pattern
     if len(normalized) > 1 and not normalized[0].isalnum() and normalized[0] != ' ':
-        # Check if removing first char would make it start with a known pattern
         test_line = normalized[1:].strip()
-        for pattern_list in single_lines_dict.values():
-            for pattern in pattern_list:
-                pattern_start = pattern.split('+')[0].strip().lower()
-                if test_line.lower().startswith(pattern_start):
-                    normalized = test_line
-                    break
+        if test_line.lower().startswith(single_line_starts):
+            normalized = test_line
     
     # Also try removing just the first character if it's a common noise character
     # and it's not part of a valid pattern
@@ -434,24 +199,25 @@ def normalize_line(line):
         # Common OCR noise characters (expanded list including ©)
         noise_chars = '@©©G¢€£¥§¶•‡†‡°±²³´µ¶·¸¹º»¼½¾¿'
         if first_char in noise_chars and len(normalized) > 1:
-            # Try removing the first character
+            # Check if the line without it starts with a known pattern (case-insensitive) - only
+            # Boss Damage if the line was already changed above
             test_line = normalized[1:].strip()
-            # Check if test_line starts with a known pattern (case-insensitive)
-            for pattern_list in single_lines_dict.values():
-                for pattern in pattern_list:
-                    # Get the start of the pattern (before the +)
-                    pattern_parts = pattern.split('+')
-                    if len(pattern_parts) > 0:
-                        pattern_start = pattern_parts[0].strip().lower()
-                        test_start = test_line[:min(len(pattern_start), len(test_line))].strip().lower()
-                        if test_start == pattern_start or test_line.lower().startswith(pattern_start):
-                            normalized = test_line
-                            break
-                if normalized != line.strip():  # If we already normalized, break outer loop
-                    break
+            starts = boss_damage_line_starts if normalized != line.strip() else single_line_starts
+            if test_line.lower().startswith(starts):
+                normalized = test_line
     
     return normalized.strip()
 
+def normalize_line(line):
+    """
+    Normalize OCR line: correct OCR errors in the stats (see stat_lexer.lex_line() - e.g. '+95' ->
+    '+9%', 'LUK 12%' -> 'LUK +12%') and remove leading noise characters.
+    Handles cases like '@ Attack Power +9%' -> 'Attack Power +9%'
+    """
+    if not line:
+        return line
+    return strip_leading_noise(lex_line(line).text)
+
 def matches_line_pattern(line, pattern_list):
     """
     Check if a line matches any pattern in the list, accounting for OCR noise.
@@ -470,15 +236,6 @@ def matches_line_pattern(line, pattern_list):
     
     # For stat lines (STR, DEX, INT, LUK, ALL, ATT), use regex matching since they can have noise
     # Check if this looks like a stat line using regex (accept any numeric value)
-    stat_patterns_to_check = {
-        "STR": [r'\bSTR\s*:?\s*\+(\d+)%', r'\bSTR\s*\+(\d+)%'],
-        "DEX": [r'\bDEX\s*:?\s*\+(\d+)%', r'\bDEX\s*\+(\d+)%'],
-        "INT": [r'\bINT\s*:?\s*\+(\d+)%', r'\bINT\s*\+(\d+)%'],
-        "LUK": [r'\bLUK\s*:?\s*\+(\d+)%', r'\bLUK\s*\+(\d+)%'],
-        "ALL": [r'All\s+Stats\s*:?\s*\+(\d+)%', r'All\s+Stats\s*\+(\d+)%', r'All\s*:?\s*\+(\d+)%', r'Allstats\s*:?\s*\+(\d+)%', r'Allstats\s*\+(\d+)%', r'Alistats\s*:?\s*\+(\d+)%', r'Alistats\s*\+(\d+)%', r'Alstats\s*:?\s*\+(\d+)%', r'Alstats\s*\+(\d+)%'],
-        "ATT": [r'(?<!Magic\s)ATT\s*:?\s*\+(\d+)%', r'(?<!Magic\s)ATT\s*\+(\d+)%', r'(?<!Magic\s)A[ti]tack\s+Power\s*:?\s*\+(\d+)%', r'(?<!Magic\s)A[ti]tack\s+Power\s*\+(\d+)%', r'(?<!Magic)A[ti]tackPower\s*:?\s*\+(\d+)%', r'(?<!Magic)A[ti]tackPower\s*\+(\d+)%']
-    }
-    
     for stat_type, patterns in stat_patterns_to_check.items():
         for pattern in patterns:
             match = re.search(pattern, line, re.IGNORECASE)
@@ -498,8 +255,9 @@ def matches_line_pattern(line, pattern_list):
         normalized_clean = normalized.strip()
         line_clean = line.strip()
         
-        # Check if normalized line contains the pattern (or vice versa)
-        if pattern_clean in normalized_clean or normalized_clean in pattern_clean:
+        # Check if normalized line contains the pattern (or vice versa - a read cut short, long enough
+        # not to be a stray letter that happens to be in some pattern)
+        if pattern_clean in normalized_clean or (len(normalized_clean) >= 8 and normalized_clean in pattern_clean):
             return True
         
         # Check if original line contains pattern (for cases where normalization didn't help)
@@ -520,20 +278,18 @@ def set_lines(splitlines):
         return "Trash", "Trash", "Trash"
     
     import re
-    # Normalize all lines first
+    # Normalize all lines once - the branches below pick from these
     normalized_lines = [normalize_line(line) for line in splitlines]
     
     if len(splitlines) == 1:
         # Only one line found, use it as line1 and set line2, line3 as Trash
-        # Normalize the line before returning
-        normalized = normalize_line(splitlines[0])
-        return normalized, "Trash", "Trash"
+        return normalized_lines[0], "Trash", "Trash"
     
     if len(splitlines) == 2:
         # Normalize both lines before returning, line3 is Trash
         # Check if lines look like potential lines (even if not exact matches)
-        line1 = normalize_line(splitlines[0]) if splitlines[0] and splitlines[0].strip() else "Trash"
-        line2 = normalize_line(splitlines[1]) if splitlines[1] and splitlines[1].strip() else "Trash"
+        line1 = normalized_lines[0] if splitlines[0] and splitlines[0].strip() else "Trash"
+        line2 = normalized_lines[1] if splitlines[1] and splitlines[1].strip() else "Trash"
         # Only return Trash if both are actually empty
         if line1 == "Trash" and line2 == "Trash":
             return "Trash", "Trash", "Trash"
@@ -542,14 +298,14 @@ def set_lines(splitlines):
     if len(splitlines) == 3:
         # Check for double lines first
         if matches_line_pattern(splitlines[0], double_lines_list):
-            line1 = normalize_line(splitlines[0])
-            line2 = normalize_line(splitlines[2])
-            line3 = normalize_line(splitlines[1])  # Use the remaining line
+            line1 = normalized_lines[0]
+            line2 = normalized_lines[2]
+            line3 = normalized_lines[1]  # Use the remaining line
             return line1, line2, line3
         elif matches_line_pattern(splitlines[1], double_lines_list):
-            line1 = normalize_line(splitlines[0])
-            line2 = normalize_line(splitlines[1])
-            line3 = normalize_line(splitlines[2])  # Use the remaining line
+            line1 = normalized_lines[0]
+            line2 = normalized_lines[1]
+            line3 = normalized_lines[2]  # Use the remaining line
             return line1, line2, line3
         
         # Check if any line matches single_lines patterns OR looks like a potential line
@@ -565,7 +321,6 @@ def set_lines(splitlines):
         for j in range(len(splitlines)):
             if j not in matched_indices:
                 line = splitlines[j]
-                normalized = normalize_line(line)
                 # Check if it looks like "All Stats" FIRST (before STR) to avoid false matches
                 # Use %+ to allow one or more % signs (handles OCR errors like "3%%" from "35%")
                 if re.search(r'(All\s+Stats?|Allstats?|Alistats?|Alstats?)\s*:?\s*\+?\d+%+', line, re.IGNORECASE):
@@ -600,7 +355,7 @@ def set_lines(splitlines):
         if len(matched_indices) >= 1:
             # Use first match as line1
             line1_idx = matched_indices[0]
-            line1 = normalize_line(splitlines[line1_idx])
+            line1 = normalized_lines[line1_idx]
             
             # For line2, prefer another matched line, otherwise use the next line
             if len(matched_indices) >= 2:
@@ -608,7 +363,7 @@ def set_lines(splitlines):
             else:
                 # Use the line after line1, or before if line1 is last
                 line2_idx = (line1_idx + 1) % len(splitlines)
-            line2 = normalize_line(splitlines[line2_idx])
+            line2 = normalized_lines[line2_idx]
             
             # For line3, prefer another matched line, otherwise use the next available line
             if len(matched_indices) >= 3:
@@ -620,14 +375,14 @@ def set_lines(splitlines):
             else:
                 line3_idx = (line2_idx + 1) % len(splitlines) if len(splitlines) > 2 else line2_idx
             
-            line3 = normalize_line(splitlines[line3_idx]) if line3_idx < len(splitlines) else "Trash"
+            line3 = normalized_lines[line3_idx] if line3_idx < len(splitlines) else "Trash"
             return line1, line2, line3
         else:
             # If no patterns matched, still return the lines (they might be valid but OCR variations)
             # Only return Trash if lines are clearly empty or invalid
-            line1 = normalize_line(splitlines[0]) if splitlines[0] and splitlines[0].strip() else "Trash"
-            line2 = normalize_line(splitlines[1]) if len(splitlines) > 1 and splitlines[1] and splitlines[1].strip() else "Trash"
-            line3 = normalize_line(splitlines[2]) if len(splitlines) > 2 and splitlines[2] and splitlines[2].strip() else "Trash"
+            line1 = normalized_lines[0] if splitlines[0] and splitlines[0].strip() else "Trash"
+            line2 = normalized_lines[1] if len(splitlines) > 1 and splitlines[1] and splitlines[1].strip() else "Trash"
+            line3 = normalized_lines[2] if len(splitlines) > 2 and splitlines[2] and splitlines[2].strip() else "Trash"
             # Only return all Trash if all lines are actually empty/invalid
             if line1 == "Trash" and line2 == "Trash" and line3 == "Trash":
                 return "Trash", "Trash", "Trash"
@@ -635,9 +390,9 @@ def set_lines(splitlines):
 
     if len(splitlines) > 3:
         if matches_line_pattern(splitlines[0], double_lines_dict['IED']) and len(splitlines) > 3 and matches_line_pattern(splitlines[3], double_lines_dict['IED']):
-            line1 = normalize_line(splitlines[0])
-            line2 = normalize_line(splitlines[3])
-            line3 = normalize_line(splitlines[4]) if len(splitlines) > 4 else "Trash"
+            line1 = normalized_lines[0]
+            line2 = normalized_lines[3]
+            line3 = normalized_lines[4] if len(splitlines) > 4 else "Trash"
             return line1, line2, line3
         else:
             # Try to find up to 3 matching single lines or potential lines
@@ -667,16 +422,16 @@ def set_lines(splitlines):
                             break
             
             if len(matched_indices) >= 1:
-                line1 = normalize_line(splitlines[matched_indices[0]])
-                line2 = normalize_line(splitlines[matched_indices[1]]) if len(matched_indices) >= 2 else normalize_line(splitlines[matched_indices[0] + 1] if matched_indices[0] + 1 < len(splitlines) else splitlines[0])
-                line3 = normalize_line(splitlines[matched_indices[2]]) if len(matched_indices) >= 3 else "Trash"
+                line1 = normalized_lines[matched_indices[0]]
+                line2 = normalized_lines[matched_indices[1]] if len(matched_indices) >= 2 else normalized_lines[matched_indices[0] + 1 if matched_indices[0] + 1 < len(splitlines) else 0]
+                line3 = normalized_lines[matched_indices[2]] if len(matched_indices) >= 3 else "Trash"
                 return line1, line2, line3
             else:
                 # If no patterns matched, try to use first 3 lines if they look valid
                 valid_lines = []
                 for i in range(min(3, len(splitlines))):
                     if splitlines[i] and splitlines[i].strip():
-                        valid_lines.append(normalize_line(splitlines[i]))
+                        valid_lines.append(normalized_lines[i])
                 if len(valid_lines) >= 2:
                     while len(valid_lines) < 3:
                         valid_lines.append("Trash")
@@ -731,29 +486,77 @@ def get_all_stats_from_line(line):
     """
     if not line or line == "Trash":
         return []
-    
-    stats = []
-    # Split by comma to handle multiple stats in one line
-    parts = [part.strip() for part in line.split(',')]
-    
-    # Check each part for stats
-    for part in parts:
-        # Check MATT first to avoid matching it as ATT
-        for stat_type in ["STR", "DEX", "INT", "LUK", "ALL", "MATT", "ATT", "BD", "CD", "IED"]:
-            value = extract_stat_value(part, stat_type)
-            if value > 0:
-                stats.append((stat_type, value))
-                break  # Only count each part once (first matching stat)
-    
-    return stats
+    # One scan of the line (see stat_lexer.read_stats()); each comma separated part counts once,
+    # as the first stat found in the order STR, DEX, INT, LUK, ALL, MATT, ATT, BD, CD, IED
+    return [(token.stat, token.value) for token in read_stats(line)]
+
+# Generic shape of a potential line: a name followed by a number with % or sec
+# (covers % lines that aren't in the line catalog)
+potential_line_regex = re.compile(r'[A-Za-z]{2,}.*?[+-]?\d+\s*(%|sec)', re.IGNORECASE)
+
+def is_potential_line(line):
+    """
+    Check if a raw OCR line reads like a potential line: a known stat, a line of the line catalog
+    (also flat ones like "DEX: +12" and ones without a number like "Enables the Decent Haste skill"),
+    the first half of a known double line, or at least "name ... number%/sec".
+    """
+    if not line or not line.strip():
+        return False
+    lexed = lex_line(line)
+    if lexed.stats:
+        return True
+    normalized = strip_leading_noise(lexed.text)
+    if _catalog.decode(normalized) is not None or potential_line_regex.search(normalized):
+        return True
+    # Double lines ("Attacks ignore 30% Monster" / "Defense") - ignore short fragments, which
+    # matches_line_pattern would accept as substrings of a pattern
+    return len(normalized) >= 8 and matches_line_pattern(line, double_lines_list)
+
+def count_valid_lines(text):
+    """Number of lines in raw OCR text that read like potential lines (see is_potential_line())"""
+    return sum(1 for line in split_lines(text) if is_potential_line(line))
+
+def set_lines_from_slots(slots):
+    """
+    Lines from line segmentation or line_assembler are already in slot order (double lines joined
+    by layout), so they only need normalizing - no guessing which text row belongs to which line.
+    """
+    lines = [normalize_line(line) if line and line.strip() else "Trash" for line in slots[:3]]
+    lines += ["Trash"] * (3 - len(lines))
+    return tuple(lines)
+
+def snap_lines(lines):
+    """
+    Each line as its line catalog template, with the value as read (see line_catalog.py).
 
-def process_lines(window_name=None, debug=False, crop_region=None, test_image_path=None, auto_detect_crop=False, cube_type="Glowing"):
+    A line is left as read when nothing is near enough, or when it already reads a legal value of
+    another stat than the nearest template ("Magic str: +10%" could be either line).
+    """
+    catalog = get_line_catalog()
+    snapped = []
+    for line in lines:
+        match = catalog.decode(line) if line != "Trash" else None
+        if match is not None and not any(stat != match.line_kind.stat and is_legal_value(stat, value)
+                                         for stat, value in get_all_stats_from_line(line)):
+            line = match.text
+        snapped.append(line)
+    return tuple(snapped)
+
+def process_lines(window_name=None, debug=False, crop_region=None, test_image_path=None, auto_detect_crop=False, cube_type="Glowing", capture_method='auto'):
     try:
-        lines = get_lines(window_name, debug=debug, crop_region=crop_region, test_image_path=test_image_path, auto_detect_crop=auto_detect_crop, cube_type=cube_type)
+        lines = get_lines(window_name, debug=debug, crop_region=crop_region, test_image_path=test_image_path, auto_detect_crop=auto_detect_crop, cube_type=cube_type, capture_method=capture_method)
         splitlines = split_lines(lines)
         if debug:
             print(f"[DEBUG] Split lines: {splitlines}")
-        potential_lines = set_lines(splitlines)
+        # Accepted reads come with their lines already in slot order (line segmentation or the
+        # box-level line assembler); the set_lines text heuristics are only needed for partial reads
+        pot = get_current_potlines()
+        if pot is not None and pot.last_line_slots:
+            potential_lines = set_lines_from_slots(pot.last_line_slots)
+        else:
+            potential_lines = set_lines(splitlines)
+        if pot is not None and pot.snap_to_catalog and isinstance(potential_lines, tuple):
+            potential_lines = snap_lines(potential_lines)
         if debug:
             print(f"[DEBUG] Processed lines: {potential_lines}")
             print(f"[DEBUG] Normalized lines: {[normalize_line(line) for line in splitlines] if splitlines else []}")
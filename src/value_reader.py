@@ -0,0 +1,126 @@
+"""
+Numbers-only second look at the value of a potential line.
+
+Most misreads of a roll are in the number, not the stat name: the '%' is read as 5, 9 or 96
+("+9%" -> "+95"), or a digit is dropped. When a line parses into a value that can't exist for its
+stat (see translate_ocr_results.legal_stat_values), the value column ("+35%") is located - from the
+word boxes of the read when there are any, otherwise from the gaps between the glyph clusters of
+the line strip - and only that small region is read again: by the glyph atlas if it is sure about
+every character, otherwise by Tesseract with a digits/sign/percent whitelist. The new value
+replaces the old one only if it is legal.
+"""
+import re
+import cv2 as cv
+import numpy as np
+from src.line_segmentation import text_mask
+from src.glyph_matcher import SPACE_GAP, SPACE_GAP_FACTOR
+from src.line_assembler import group_word_rows
+
+VALUE_OCR_CONFIG = '--psm 7 -c tessedit_char_whitelist=0123456789+-%'
+VALUE_PADDING = 3  # Pixels of the line kept around the value box
+VALUE_SCALE = 2  # The value crop is upscaled so the digits are tall enough for Tesseract
+VALUE_BORDER = 8  # Background added around the upscaled crop
+
+VALUE_TOKEN = re.compile(r'([+-]?)(\d(?:[\d%]*\d)?)(%*)')  # Sign, digits (with a '%' misread inside: "+6%5"), '%'s
+VALUE_UNIT = re.compile(r'\s*(?:%|sec)')  # Unit read apart from the number ("+30 %", "-2 sec")
+
+
+def value_box_from_words(words):
+    """
+    Box of the value column from image_to_data words (see ocr_engine.data_to_words()).
+
+    The value is the last word with a digit; a read without spaces ("BossDamage:+35%") has it at
+    the end of a longer word, so the box starts where the sign/first digit sits in that word.
+
+    Returns:
+        (x0, y0, x1, y1) or None if no word has a digit; y0/y1 span the word's whole text row
+    """
+    digit_words = [w for w in words if any(c.isdigit() for c in w["text"])]
+    if not digit_words:
+        return None
+    word = digit_words[-1]
+    text = word["text"]
+    start = next((k for k, c in enumerate(text) if c in '+-' or c.isdigit()), 0)
+    x0 = word["left"] + word["width"] * start / float(len(text))
+    # Vertical extent of the row (capitals and descenders of the other words), not just the digits
+    row = [w for w in group_word_rows(words) if word in w["words"]][0]
+    return int(x0), int(row["top"]), int(round(word["left"] + word["width"])), int(round(row["bottom"]))
+
+
+def value_box_from_pixels(gray, row):
+    """
+    Box of the value column of one text row from its glyph clusters: the value is the last run of
+    glyphs after a word gap.
+
+    Returns:
+        (x0, y0, x1, y1) or None if the row has no text
+    """
+    y0, y1 = row
+    mask = text_mask(gray)[y0:y1]
+    ink = mask.any(axis=0)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], ink.view(np.int8), [0]))))
+    if len(edges) == 0:
+        return None
+    starts, ends = edges[0::2], edges[1::2]
+    gaps = starts[1:] - ends[:-1]
+    space_gap = max(SPACE_GAP * (y1 - y0), SPACE_GAP_FACTOR * np.median(gaps)) if len(gaps) else 0
+    word_starts = np.flatnonzero(gaps > space_gap)
+    first = word_starts[-1] + 1 if len(word_starts) else 0
+    return int(starts[first]), y0, int(ends[-1]), y1
+
+
+def value_crop(gray, box, padding=VALUE_PADDING):
+    """
+    Crop the value box (plus padding) out of the grayscale line image.
+
+    Returns:
+        Tuple (crop, line_extent) - line_extent is the (top, bottom) of the text row in the crop,
+        for the glyph matcher - or (None, None) if the box is empty
+    """
+    x0, y0, x1, y1 = (int(v) for v in box)
+    height, width = gray.shape[:2]
+    cx0, cy0 = max(0, x0 - padding), max(0, y0 - padding)
+    cx1, cy1 = min(width, x1 + padding), min(height, y1 + padding)
+    if cx1 <= cx0 or cy1 <= cy0:
+        return None, None
+    return gray[cy0:cy1, cx0:cx1], (y0 - cy0, y1 - cy0)
+
+
+def prepare_for_ocr(crop):
+    """Upscale the value crop and surround it with background for Tesseract"""
+    image = cv.resize(crop, None, fx=VALUE_SCALE, fy=VALUE_SCALE, interpolation=cv.INTER_CUBIC)
+    background = int(np.median(crop))
+    return cv.copyMakeBorder(image, VALUE_BORDER, VALUE_BORDER, VALUE_BORDER, VALUE_BORDER,
+                             cv.BORDER_CONSTANT, value=background)
+
+
+def value_candidates(text):
+    """
+    Values a numbers-only read can stand for, most likely first: the digits as read, then - if no
+    '%' was seen - the digits without a trailing 96/9/5 that may have been the '%'.
+    """
+    match = re.search(r'\d+', text or '')
+    if not match:
+        return []
+    digits = match.group(0)
+    candidates = [int(digits)]
+    if '%' not in text[match.end():]:
+        for suffix in ('96', '9', '5'):
+            if digits.endswith(suffix) and len(digits) > len(suffix):
+                candidates.append(int(digits[:-len(suffix)]))
+    return candidates
+
+
+def replace_value(line, value):
+    """
+    Line text with the digits of its last value token replaced by value. The sign stays as read
+    ("Attacks ignore 36% Monster" keeps having none, "Skill Cooldowns: -3 sec" keeps its '-'); the
+    '%' is put back if the read had none - it was misread as a digit - unless a unit follows.
+    """
+    matches = list(VALUE_TOKEN.finditer(line))
+    if not matches:
+        return line
+    last = matches[-1]
+    rest = line[last.end():]
+    percent = '' if VALUE_UNIT.match(rest) and not last.group(3) else '%'
+    return f"{line[:last.start()]}{last.group(1)}{value}{percent}{rest}"
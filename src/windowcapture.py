@@ -3,9 +3,16 @@ import cv2 as cv
 import numpy as np
 import os
 import sys
-from time import time
-import win32gui, win32ui, win32con
-import pyautogui
+import threading
+from time import time, monotonic
+
+# pywin32 is only available on Windows. Keep the module importable elsewhere so the
+# fake window backend (and the replay frame sources) can be used on Linux.
+try:
+    import win32gui, win32ui, win32con
+    WIN32_AVAILABLE = True
+except ImportError:
+    WIN32_AVAILABLE = False
 
 # Try to import mss for better capture on Windows 10+
 try:
@@ -24,6 +31,93 @@ if not getattr(sys, "frozen", False):
     except Exception:
         pass
 
+# Minimum time (seconds) between two GetWindowRect geometry checks in get_screenshot()
+GEOMETRY_CHECK_INTERVAL = 0.5
+
+# Supported capture backends ('auto' tries them in this order)
+CAPTURE_METHODS = ('auto', 'mss', 'printwindow', 'bitblt')
+
+
+class Win32WindowBackend:
+    """Window lookups through the Win32 API (the real backend)"""
+    
+    def find_window(self, window_name):
+        return win32gui.FindWindow(None, window_name)
+    
+    def is_window(self, hwnd):
+        return win32gui.IsWindow(hwnd)
+    
+    def get_window_rect(self, hwnd):
+        return win32gui.GetWindowRect(hwnd)
+
+
+class FakeWindowBackend:
+    """
+    In-memory window used to exercise WindowCapture without Windows.
+    
+    The window shows `frame` (a BGR image the size of the window); move(), resize() and close()
+    simulate the user dragging, resizing or closing the game client. `calls` counts every
+    backend call so tests can check how often the capture session talks to the "OS".
+    """
+    
+    def __init__(self, window_name="Maplestory", rect=(0, 0, 800, 600), frame=None, hwnd=1):
+        self.window_name = window_name
+        self.rect = tuple(rect)
+        self.hwnd = hwnd
+        self.open = True
+        self.fail_next_grabs = 0  # Number of upcoming grab() calls that should raise
+        self.calls = {"find_window": 0, "is_window": 0, "get_window_rect": 0, "grab": 0}
+        if frame is None:
+            frame = np.zeros((self.rect[3] - self.rect[1], self.rect[2] - self.rect[0], 3), dtype=np.uint8)
+        self.frame = frame
+    
+    def find_window(self, window_name):
+        self.calls["find_window"] += 1
+        if self.open and window_name == self.window_name:
+            return self.hwnd
+        return 0
+    
+    def is_window(self, hwnd):
+        self.calls["is_window"] += 1
+        return self.open and hwnd == self.hwnd
+    
+    def get_window_rect(self, hwnd):
+        self.calls["get_window_rect"] += 1
+        if not self.is_window(hwnd):
+            raise Exception(f"Invalid window handle: {hwnd}")
+        return self.rect
+    
+    def move(self, left, top):
+        w = self.rect[2] - self.rect[0]
+        h = self.rect[3] - self.rect[1]
+        self.rect = (left, top, left + w, top + h)
+    
+    def resize(self, width, height, frame=None):
+        self.rect = (self.rect[0], self.rect[1], self.rect[0] + width, self.rect[1] + height)
+        self.frame = frame if frame is not None else np.zeros((height, width, 3), dtype=np.uint8)
+    
+    def close(self):
+        self.open = False
+    
+    def reopen(self, hwnd=None):
+        """Simulate the client being restarted (new handle, same title)"""
+        self.open = True
+        if hwnd is not None:
+            self.hwnd = hwnd
+    
+    def grab(self, hwnd, region, grayscale=False):
+        """Return the (x, y, width, height) window-coordinate region of the current frame"""
+        self.calls["grab"] += 1
+        if self.fail_next_grabs > 0:
+            self.fail_next_grabs -= 1
+            raise Exception("Simulated capture failure")
+        if not self.is_window(hwnd):
+            raise Exception(f"Invalid window handle: {hwnd}")
+        x, y, region_w, region_h = region
+        img = np.ascontiguousarray(self.frame[y:y+region_h, x:x+region_w])
+        if grayscale:
+            return cv.cvtColor(img, cv.COLOR_BGR2GRAY)
+        return img
 
 
 class WindowCapture:
@@ -32,11 +126,33 @@ class WindowCapture:
     h = 0 
     hwnd = None
     window_name = None
-    sct = None  # mss screenshot object
+    use_mss = False  # Capture with mss when available (one handle per capturing thread, see _thread_sct())
+    window_rect = None  # Cached (left, top, right, bottom) of the window
     
-    def __init__(self,window_name):
+    def __init__(self, window_name, backend=None, geometry_check_interval=GEOMETRY_CHECK_INTERVAL, capture_method='auto'):
+        """
+        Args:
+            window_name: Exact title of the window to capture
+            backend: Window backend (Win32WindowBackend by default, FakeWindowBackend for tests)
+            geometry_check_interval: Minimum seconds between two cheap GetWindowRect checks
+            capture_method: 'auto' (mss -> PrintWindow -> BitBlt), or force one of 'mss', 'printwindow', 'bitblt'
+        """
+        if capture_method not in CAPTURE_METHODS:
+            raise Exception(f"ERROR: Unknown capture method '{capture_method}'. Expected one of: {', '.join(CAPTURE_METHODS)}")
         self.window_name = window_name
-        self.hwnd = win32gui.FindWindow(None, window_name)
+        self.capture_method = capture_method
+        if backend is None:
+            if not WIN32_AVAILABLE:
+                raise Exception("ERROR: Window capture requires pywin32 (Windows only). Use a test image or replay source instead.")
+            backend = Win32WindowBackend()
+        self.backend = backend
+        self.geometry_check_interval = geometry_check_interval
+        self._last_geometry_check = 0.0
+        # Capture session counters (see get_capture_stats())
+        self.stats = {"re_resolves": 0, "geometry_checks": 0, "geometry_changes": 0, "capture_failures": 0}
+        self._thread_handles = threading.local()  # Per-thread mss handle
+        
+        self.hwnd = self.backend.find_window(window_name)
 
         if not self.hwnd: 
             error_msg = (
@@ -51,7 +167,7 @@ class WindowCapture:
 
         # Get the full window dimensions
         try:
-            window_rect = win32gui.GetWindowRect(self.hwnd)
+            window_rect = self.backend.get_window_rect(self.hwnd)
         except Exception as e:
             raise Exception(f"ERROR: Failed to get window rectangle for '{window_name}'. Error: {str(e)}")
         
@@ -70,110 +186,242 @@ class WindowCapture:
         if self.w <= 0 or self.h <= 0:
             raise Exception(f"ERROR: Invalid window dimensions ({self.w}x{self.h}) for '{window_name}'. Window may be minimized or invalid.")
         
-        # Initialize mss if available (better for Windows 10+)
-        if MSS_AVAILABLE:
+        self.window_rect = tuple(window_rect[:4])
+        self._last_geometry_check = monotonic()
+        
+        # Use mss if available (better for Windows 10+). mss handles are thread-local, so each thread
+        # that captures (the roll loop, the background capture thread) opens its own on first use
+        self.use_mss = MSS_AVAILABLE and isinstance(self.backend, Win32WindowBackend) and capture_method in ('auto', 'mss')
+
+    def _thread_sct(self):
+        """mss handle of the calling thread (opened on first use; None if mss is off or can't be opened)"""
+        try:
+            return self._thread_handles.sct
+        except AttributeError:
+            sct = None
+            if self.use_mss:
+                try:
+                    sct = mss.mss()
+                except Exception:
+                    sct = None
+            self._thread_handles.sct = sct
+            return sct
+
+    def close_thread_handles(self):
+        """Close the calling thread's mss handle (capture threads call this before they exit)"""
+        sct = getattr(self._thread_handles, 'sct', None)
+        if sct is not None:
             try:
-                self.sct = mss.mss()
+                sct.close()
             except Exception:
-                self.sct = None
+                pass
+        self._thread_handles.__dict__.pop('sct', None)
 
-        
-    def get_screenshot(self):
-        # Re-find the window handle on each call to ensure we're capturing the current window
-        # This prevents issues with stale handles or window state caching
-        current_hwnd = win32gui.FindWindow(None, self.window_name)
+    def resolve_window(self):
+        """
+        (Re-)resolve the window handle and geometry: FindWindow + IsWindow + GetWindowRect.
+        Only called when a capture fails or the geometry check saw the window move/resize.
+        """
+        self.stats["re_resolves"] += 1
+        current_hwnd = self.backend.find_window(self.window_name)
         if not current_hwnd:
             raise Exception(f"ERROR: Window '{self.window_name}' not found. Window may have been closed.")
         
-        # Use the current handle instead of the cached one
-        self.hwnd = current_hwnd
-        
         # Verify window is still valid
-        if not win32gui.IsWindow(self.hwnd):
+        if not self.backend.is_window(current_hwnd):
             raise Exception(f"ERROR: Window '{self.window_name}' no longer exists. Please restart the application.")
         
-        # Re-verify window dimensions in case window was resized
-        window_rect = win32gui.GetWindowRect(self.hwnd)
+        window_rect = self.backend.get_window_rect(current_hwnd)
         if not window_rect or len(window_rect) < 4:
             raise Exception(f"ERROR: Failed to get window dimensions for '{self.window_name}'. Window may be invalid.")
         
+        self.hwnd = current_hwnd
+        self._set_geometry(window_rect)
+        self._last_geometry_check = monotonic()
+    
+    def _set_geometry(self, window_rect):
         current_w = window_rect[2] - window_rect[0]
         current_h = window_rect[3] - window_rect[1]
         
         if current_w <= 0 or current_h <= 0:
             raise Exception(f"ERROR: Invalid window dimensions ({current_w}x{current_h}) for '{self.window_name}'. Window may be minimized.")
         
-        # Update dimensions if window was resized
-        if current_w != self.w or current_h != self.h:
-            self.w = current_w
-            self.h = current_h
+        self.window_rect = tuple(window_rect[:4])
+        self.w = current_w
+        self.h = current_h
+    
+    def check_geometry(self, force=False):
+        """
+        Cheap, rate-limited check (a single GetWindowRect on the cached handle) that re-resolves
+        the window when it moved, was resized, or the handle went stale.
+        """
+        now = monotonic()
+        if not force and now - self._last_geometry_check < self.geometry_check_interval:
+            return
+        self._last_geometry_check = now
+        self.stats["geometry_checks"] += 1
+        try:
+            window_rect = self.backend.get_window_rect(self.hwnd)
+        except Exception:
+            window_rect = None
+        if not window_rect or tuple(window_rect[:4]) != self.window_rect:
+            self.stats["geometry_changes"] += 1
+            self.resolve_window()
+    
+    def get_capture_stats(self):
+        """Return a copy of the capture session counters"""
+        return dict(self.stats)
+        
+    def get_screenshot(self, region=None, grayscale=False):
+        """
+        Capture the window, or only a sub-rectangle of it.
+        
+        The window handle and rectangle are resolved once and cached. They are re-resolved only when
+        a capture fails, or when the rate-limited geometry check sees the window move or resize.
+        
+        Args:
+            region: Optional (x, y, width, height) in window pixel coordinates. When given, only
+                    that rectangle is grabbed (clamped to the window bounds) instead of the full window.
+            grayscale: If True, return a single-channel grayscale image instead of BGR.
+        
+        Returns:
+            numpy array (BGR, or grayscale if requested)
+        """
+        self.check_geometry()
+        try:
+            return self._capture(region, grayscale)
+        except Exception as e:
+            # Stale handle / window moved between checks: re-resolve once and retry
+            self.stats["capture_failures"] += 1
+            self.resolve_window()
+            return self._capture(region, grayscale)
+    
+    def _capture(self, region, grayscale):
+        """Capture with the forced capture method, or the first one that works: mss -> PrintWindow -> BitBlt"""
+        region = self.clamp_region(region)
+        
+        if not isinstance(self.backend, Win32WindowBackend):
+            return self.backend.grab(self.hwnd, region, grayscale)
+        
+        sct = self._thread_sct()
+        if self.capture_method == 'mss':
+            if sct is None:
+                raise Exception("ERROR: mss capture requested but mss is not available.")
+            return self._grab_mss(sct, self.window_rect, region, grayscale)
+        if self.capture_method == 'printwindow':
+            img = self._grab_printwindow(region, grayscale)
+            if img is None:
+                raise Exception(f"ERROR: PrintWindow failed for window '{self.window_name}'.")
+            return img
+        if self.capture_method == 'bitblt':
+            return self._grab_bitblt(region, grayscale)
         
         # Try mss first (Desktop Duplication API - best for Windows 10+, works like komari's "Windows 10 mode")
         # This is more reliable than BitBlt for game windows (DirectX/Direct3D)
-        if MSS_AVAILABLE and self.sct is not None:
+        if sct is not None:
             try:
-                # Use the window_rect we already got above
-                left = window_rect[0]
-                top = window_rect[1]
-                
-                # Capture using mss (Desktop Duplication API)
-                monitor = {
-                    "left": left,
-                    "top": top,
-                    "width": self.w,
-                    "height": self.h
-                }
-                
-                # Grab the screenshot
-                sct_img = self.sct.grab(monitor)
-                
-                # Convert to numpy array (BGRA format)
-                img = np.array(sct_img)
-                
-                # Convert BGRA to BGR for OpenCV
-                img_bgr = cv.cvtColor(img, cv.COLOR_BGRA2BGR)
-                
-                return img_bgr
+                return self._grab_mss(sct, self.window_rect, region, grayscale)
             except Exception as e:
                 # If mss fails, fall back to other methods
                 pass
         
         # Try PrintWindow (better for DirectX/Direct3D windows, forces fresh rendering)
-        # PW_RENDERFULLCONTENT = 0x00000002 - renders even if window is offscreen
         try:
-            # Create a memory DC for PrintWindow
-            hdcScreen = win32gui.GetDC(0)
-            hdcMem = win32ui.CreateCompatibleDC(hdcScreen)
-            hbmp = win32ui.CreateBitmap()
-            hbmp.CreateCompatibleBitmap(hdcScreen, self.w, self.h)
-            hdcMem.SelectObject(hbmp)
-            
-            # Use PrintWindow to capture (this can capture DirectX content better)
-            # PW_RENDERFULLCONTENT forces full content rendering even if window is offscreen
-            PW_RENDERFULLCONTENT = 0x00000002
-            result = win32gui.PrintWindow(self.hwnd, hdcMem.GetSafeHdc(), PW_RENDERFULLCONTENT)
-            
-            if result:
-                # Get bitmap bits
-                signedIntsArray = hbmp.GetBitmapBits(True)
-                win32gui.ReleaseDC(0, hdcScreen)
-                hdcMem.DeleteDC()
-                win32gui.DeleteObject(hbmp.GetHandle())
-                
-                if signedIntsArray:
-                    img = np.fromstring(signedIntsArray, dtype='uint8')
-                    if img is not None and img.size > 0:
-                        expected_size = self.h * self.w * 4
-                        if img.size == expected_size:
-                            img.shape = (self.h, self.w, 4)
-                            img = np.ascontiguousarray(img)
-                            img_bgr = cv.cvtColor(img, cv.COLOR_BGRA2BGR)
-                            return img_bgr
+            img = self._grab_printwindow(region, grayscale)
+            if img is not None:
+                return img
         except Exception as e:
             # If PrintWindow fails, fall back to BitBlt
             pass
         
         # Fallback to BitBlt method
+        return self._grab_bitblt(region, grayscale)
+    
+    def clamp_region(self, region):
+        """
+        Clamp a (x, y, width, height) window-coordinate region to the current window size.
+        Returns the full window rectangle when region is None.
+        """
+        if region is None:
+            return (0, 0, self.w, self.h)
+        x, y, region_w, region_h = [int(v) for v in region]
+        x = max(0, min(x, self.w - 1))
+        y = max(0, min(y, self.h - 1))
+        region_w = max(1, min(region_w, self.w - x))
+        region_h = max(1, min(region_h, self.h - y))
+        return (x, y, region_w, region_h)
+    
+    @staticmethod
+    def _convert_bgra(img, grayscale):
+        """Convert a BGRA capture to BGR (or grayscale) for OpenCV"""
+        if grayscale:
+            return cv.cvtColor(img, cv.COLOR_BGRA2GRAY)
+        # Convert BGRA to BGR (remove alpha channel) for OpenCV compatibility
+        # OpenCV expects BGR format, not BGRA
+        return cv.cvtColor(img, cv.COLOR_BGRA2BGR)
+    
+    def _grab_mss(self, sct, window_rect, region, grayscale):
+        """Capture only the requested region with mss (Desktop Duplication API), using the calling thread's handle"""
+        x, y, region_w, region_h = region
+        
+        # Capture using mss (Desktop Duplication API) - screen coordinates of the region
+        monitor = {
+            "left": window_rect[0] + x,
+            "top": window_rect[1] + y,
+            "width": region_w,
+            "height": region_h
+        }
+        
+        # Grab the screenshot
+        sct_img = sct.grab(monitor)
+        
+        # Convert to numpy array (BGRA format) without an intermediate copy
+        img = np.frombuffer(sct_img.bgra, dtype=np.uint8).reshape(region_h, region_w, 4)
+        
+        return self._convert_bgra(img, grayscale)
+    
+    def _grab_printwindow(self, region, grayscale):
+        """
+        Capture with PrintWindow. PrintWindow always renders the whole window, so the
+        region is cropped out of the rendered bitmap before color conversion.
+        Returns None if PrintWindow produced no usable bitmap.
+        """
+        # PW_RENDERFULLCONTENT = 0x00000002 - renders even if window is offscreen
+        # Create a memory DC for PrintWindow
+        hdcScreen = win32gui.GetDC(0)
+        hdcMem = win32ui.CreateCompatibleDC(hdcScreen)
+        hbmp = win32ui.CreateBitmap()
+        hbmp.CreateCompatibleBitmap(hdcScreen, self.w, self.h)
+        hdcMem.SelectObject(hbmp)
+        
+        # Use PrintWindow to capture (this can capture DirectX content better)
+        # PW_RENDERFULLCONTENT forces full content rendering even if window is offscreen
+        PW_RENDERFULLCONTENT = 0x00000002
+        result = win32gui.PrintWindow(self.hwnd, hdcMem.GetSafeHdc(), PW_RENDERFULLCONTENT)
+        
+        if not result:
+            return None
+        
+        # Get bitmap bits
+        signedIntsArray = hbmp.GetBitmapBits(True)
+        win32gui.ReleaseDC(0, hdcScreen)
+        hdcMem.DeleteDC()
+        win32gui.DeleteObject(hbmp.GetHandle())
+        
+        if not signedIntsArray:
+            return None
+        img = np.frombuffer(signedIntsArray, dtype='uint8')
+        expected_size = self.h * self.w * 4
+        if img.size != expected_size:
+            return None
+        img = img.reshape(self.h, self.w, 4)
+        x, y, region_w, region_h = region
+        img = np.ascontiguousarray(img[y:y+region_h, x:x+region_w])
+        return self._convert_bgra(img, grayscale)
+    
+    def _grab_bitblt(self, region, grayscale):
+        """Capture with BitBlt, copying only the requested region out of the window DC"""
+        x, y, region_w, region_h = region
         wDC = win32gui.GetWindowDC(self.hwnd)
         if not wDC:
             raise Exception(f"ERROR: Failed to get device context for window '{self.window_name}'.")
@@ -181,10 +429,10 @@ class WindowCapture:
         dcObj=win32ui.CreateDCFromHandle(wDC)
         cDC=dcObj.CreateCompatibleDC()
         dataBitMap = win32ui.CreateBitmap()
-        dataBitMap.CreateCompatibleBitmap(dcObj, self.w, self.h)
+        dataBitMap.CreateCompatibleBitmap(dcObj, region_w, region_h)
         cDC.SelectObject(dataBitMap)
-        # Capture the entire window (no cropping)
-        cDC.BitBlt((0,0),(self.w, self.h) , dcObj, (0,0), win32con.SRCCOPY)
+        # Copy only the region (source offset = region origin in window coordinates)
+        cDC.BitBlt((0,0),(region_w, region_h) , dcObj, (x,y), win32con.SRCCOPY)
 
         #save the screenshot for debugging
         #dataBitMap.SaveBitmapFile(cDC, 'debug.bmp')
@@ -192,15 +440,15 @@ class WindowCapture:
         if not signedIntsArray:
             raise Exception(f"ERROR: Failed to get bitmap bits for window '{self.window_name}'. Bitmap may be empty.")
         
-        img = np.fromstring(signedIntsArray, dtype='uint8')
+        img = np.frombuffer(signedIntsArray, dtype='uint8')
         if img is None or img.size == 0:
             raise Exception(f"ERROR: Failed to create image array for window '{self.window_name}'. Array is empty.")
         
-        expected_size = self.h * self.w * 4
+        expected_size = region_h * region_w * 4
         if img.size != expected_size:
             raise Exception(f"ERROR: Image size mismatch for window '{self.window_name}'. Expected {expected_size}, got {img.size}.")
         
-        img.shape = (self.h,self.w,4 )
+        img = img.reshape(region_h, region_w, 4)
 
         # Free Resources
         dcObj.DeleteDC()
@@ -209,8 +457,4 @@ class WindowCapture:
         win32gui.DeleteObject(dataBitMap.GetHandle())
         img = np.ascontiguousarray(img)
         
-        # Convert BGRA to BGR (remove alpha channel) for OpenCV compatibility
-        # OpenCV expects BGR format, not BGRA
-        img_bgr = cv.cvtColor(img, cv.COLOR_BGRA2BGR)
-        
-        return img_bgr
+        return self._convert_bgra(img, grayscale)
@@ -0,0 +1,149 @@
+"""
+Compare per-call OCR latency of the available OCR engines (tesserocr, piped tesseract.exe, pytesseract).
+
+Runs the same configs the bot uses on a potential screenshot (or a folder of them) through every
+engine and prints mean/p50/p95 latency per call, plus whether the engines agree on the text with
+pytesseract (the reference path). --data benchmarks image_to_data (the word boxes the line reader
+uses) instead of image_to_string.
+"""
+import sys
+import os
+import time
+
+# Allow running as "python tools/benchmark_ocr_engines.py" from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2 as cv
+from src.ocr_engine import PytesseractEngine, PipeEngine, TesserocrEngine, TESSEROCR_AVAILABLE, data_to_words
+from src.frame_source import IMAGE_EXTENSIONS
+
+# The configs get_ocr_result() tries, in order
+BENCHMARK_CONFIGS = [
+    '--psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz+%: ',
+    '--psm 6',
+    '--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz+%: ',
+    '--psm 11',
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def load_images(path):
+    """Load one image or every image in a directory as grayscale"""
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(IMAGE_EXTENSIONS))
+    else:
+        files = [path]
+    images = []
+    for f in files:
+        img = cv.imread(f, cv.IMREAD_GRAYSCALE)
+        if img is None:
+            print(f"Warning: could not load {f}")
+            continue
+        images.append(img)
+    return images
+
+
+def benchmark_engine(engine, images, configs, repeat=5, data=False):
+    """
+    Time image_to_string (or image_to_data) for every image x config, `repeat` times each.
+
+    Returns:
+        (list of per-call seconds, dict of (image index, config) -> text from the last run)
+    """
+    def read(img, config):
+        if data:
+            return ' '.join(w["text"] for w in data_to_words(engine.image_to_data(img, config)))
+        return engine.image_to_string(img, config).strip()
+
+    times = []
+    texts = {}
+    # Warm-up call: the first tesserocr call per thread loads the traineddata
+    read(images[0], configs[0])
+    for _ in range(repeat):
+        for i, img in enumerate(images):
+            for config in configs:
+                t0 = time.perf_counter()
+                text = read(img, config)
+                times.append(time.perf_counter() - t0)
+                texts[(i, config)] = text
+    return times, texts
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python tools/benchmark_ocr_engines.py <cropped_image|directory> [--repeat N] [--data]")
+        print("\nExample:")
+        print("  python tools/benchmark_ocr_engines.py debug_current_cropped.png --repeat 10")
+        return
+
+    # Absolute path: importing the capture modules changes the working directory in dev runs
+    path = os.path.abspath(sys.argv[1])
+    repeat = 5
+    if '--repeat' in sys.argv:
+        index = sys.argv.index('--repeat')
+        if index + 1 < len(sys.argv):
+            repeat = int(sys.argv[index + 1])
+    data = '--data' in sys.argv
+
+    if not os.path.exists(path):
+        print(f"Error: Image not found: {path}")
+        return
+    images = load_images(path)
+    if not images:
+        print(f"Error: No images loaded from {path}")
+        return
+
+    engines = [PipeEngine(), PytesseractEngine()]
+    if TESSEROCR_AVAILABLE:
+        try:
+            engines.insert(0, TesserocrEngine())
+        except Exception as e:
+            print(f"tesserocr could not be started: {e}")
+    else:
+        print("tesserocr is not installed - only benchmarking pytesseract (pip install tesserocr)")
+
+    results = {}
+    for engine in engines:
+        print(f"Benchmarking {engine.name} ({len(images)} images x {len(BENCHMARK_CONFIGS)} configs x {repeat})...")
+        try:
+            results[engine.name] = benchmark_engine(engine, images, BENCHMARK_CONFIGS, repeat=repeat, data=data)
+        except Exception as e:
+            print(f"  {engine.name} failed: {e}")
+        engine.close()
+    if not results:
+        return
+
+    print(f"\n{'='*60}")
+    print(f"OCR engine benchmark ({'image_to_data' if data else 'image_to_string'}): {path}")
+    print(f"{'='*60}")
+    for name, (times, _) in results.items():
+        mean = sum(times) / len(times)
+        print(f"{name:12s} mean {mean * 1000:7.1f} ms   p50 {percentile(times, 50) * 1000:7.1f} ms   "
+              f"p95 {percentile(times, 95) * 1000:7.1f} ms   ({len(times)} calls)")
+
+    # Everything is compared against pytesseract, the path the bot used originally
+    reference = PytesseractEngine.name
+    if reference in results and len(results) > 1:
+        base_times, base_texts = results[reference]
+        base_mean = sum(base_times) / len(base_times)
+        for name, (times, texts) in results.items():
+            if name == reference:
+                continue
+            mismatches = [key for key in base_texts if base_texts[key] != texts.get(key)]
+            print(f"\n{name}: {len(base_texts) - len(mismatches)}/{len(base_texts)} image/config pairs identical to {reference}, "
+                  f"{base_mean / (sum(times) / len(times)):.1f}x faster per call")
+            for i, config in mismatches[:5]:
+                print(f"  image {i}, '{config[:20]}...': {name}={repr(texts.get((i, config), '')[:40])} "
+                      f"{reference}={repr(base_texts[(i, config)][:40])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Microbenchmark of the per-roll parse work of the bot, with and without the parse cache (src/line_parse.py).
+
+Rolls are drawn from the lines of the stat lexer corpus (stat_lexer_corpus.jsonl, normalized
+text as the bot sees it): a fixed set of distinct lines, three per roll, so lines repeat like they
+do in a session. Every roll runs the decision step of startbot() - roll record for the
+cubes-used-up check, comparison text, the compiled targets (stat threshold, flexible check over
+every stat type), totals string - once parsing every time (cache size 0) and once through the cache.
+"""
+import sys
+import os
+import json
+import random
+import time
+
+# Allow running as "python tools/benchmark_parse.py" from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.bot_logic as bot_logic
+from src.line_parse import get_parse_cache, PARSE_CACHE_SIZE
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stat_lexer_corpus.jsonl")
+FLEX_STAT_TYPES = ["BD", "ATT", "MATT", "IED", "CD", "IA", "MESO", "SC"]
+
+
+def make_rolls(rolls, distinct, seed=0):
+    """`rolls` (line1, line2, line3) tuples over `distinct` different lines"""
+    rng = random.Random(seed)
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        lines = sorted({json.loads(line)["normalized"] for line in f if line.strip()})
+    pool = rng.sample(lines, min(distinct, len(lines)))
+    return [tuple(rng.choice(pool) for _ in range(3)) for _ in range(rolls)]
+
+
+def run_rolls(rolls, cache_size):
+    """
+    Run the decision step over every roll.
+
+    Returns:
+        (seconds per roll, decisions) - decisions to check both runs agree
+    """
+    cache = get_parse_cache()
+    cache.max_entries = cache_size
+    cache.clear()
+    pot = bot_logic.potential()
+    pot.compile_roll_rules()
+    decisions = []
+    elapsed = 0.0
+    for line1, line2, line3 in rolls:
+        pot.line1, pot.line2, pot.line3 = line1, line2, line3
+        pot.stop_bot = False
+        start = time.perf_counter()
+        stats = pot.get_roll().stats_dict()
+        normalized = pot._normalize_lines_for_comparison()
+        pot.check_roll_rules()
+        total = pot.get_total_stats_string()
+        elapsed += time.perf_counter() - start
+        decisions.append((stats, normalized, pot.stop_bot, total))
+    return elapsed / len(rolls), decisions
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Per-roll parse time with and without the parse cache")
+    parser.add_argument("--rolls", type=int, default=2000, help="Rolls to run")
+    parser.add_argument("--distinct", type=int, default=150, help="Different lines the rolls are drawn from")
+    args = parser.parse_args()
+
+    bot_logic.config = dict(bot_logic.default_config, stopAtStatThreshold=True, statThreshold=1000,
+                            STRcheck=True, DEXcheck=True, INTcheck=True, LUKcheck=True, ALLcheck=True,
+                            ATTcheck=True, MATTcheck=True,
+                            flexible_roll_check={"enabled": True, "stat_types": FLEX_STAT_TYPES, "required_count": 3})
+    rolls = make_rolls(args.rolls, args.distinct)
+    uncached, uncached_decisions = run_rolls(rolls, 0)
+    cached, cached_decisions = run_rolls(rolls, PARSE_CACHE_SIZE)
+    stats = get_parse_cache().get_stats()
+
+    print(f"{len(rolls)} rolls over {args.distinct} distinct lines")
+    print(f"Parse every time: {uncached * 1e6:8.1f} us per roll")
+    print(f"Parse cache:      {cached * 1e6:8.1f} us per roll ({uncached / cached:.1f}x faster)")
+    print(f"Cache:            {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate'] * 100:.0f}% hit rate), "
+          f"{stats['entries']} lines, {stats['evictions']} evicted")
+    if uncached_decisions != cached_decisions:
+        print("Decisions differ between the two runs!")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Benchmark the OCR + decision pipeline against a recorded session.
+
+Plays back a screenshot, a directory of screenshots or a video through the same code path the
+bot uses every roll (potential.get_lines -> stats -> roll checks), without touching the game
+window or sending any input. Works on Linux as well as Windows.
+"""
+import sys
+import os
+import time
+
+# Allow running as "python tools/benchmark_replay.py" from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.bot_logic as bot_logic
+from src.frame_source import FrameSourceExhausted
+from src.ocr_engine import get_ocr_cache
+from src.glyph_matcher import get_glyph_matcher
+from src.line_dictionary import get_line_dictionary
+from src.line_parse import get_parse_cache
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def benchmark_replay(path, rolls=100, crop_region=None, cube_type="Glowing", flex_stat_types=None, required_count=2, debug=False):
+    """
+    Run `rolls` iterations of the roll pipeline over the replay at `path`.
+
+    Args:
+        path: Image file, directory of images or video file
+        rolls: Number of rolls to run (replays loop if shorter)
+        crop_region: Optional (x, y, w, h) crop region; auto-detected from the first frame if None
+        cube_type: "Glowing" or "Bright"
+        flex_stat_types: Stat types for the flexible roll check (e.g. ["BD", "ATT"]); disabled if None
+        required_count: Lines required by the flexible roll check
+        debug: Print every roll's lines
+
+    Returns:
+        Dict with timing results (seconds)
+    """
+    run_config = bot_logic.default_config.copy()
+    run_config.update({
+        "test_image_path": path,
+        "crop_region": crop_region,
+        "auto_detect_crop": crop_region is None,
+        "cube_type": cube_type,
+        "flexible_roll_check": {
+            "enabled": bool(flex_stat_types),
+            "stat_types": flex_stat_types or [],
+            "required_count": required_count,
+        },
+    })
+    bot_logic.config = run_config
+
+    from src.translate_ocr_results import clear_potlines_cache, get_current_potlines
+    clear_potlines_cache()
+    get_parse_cache().clear()
+
+    pot = bot_logic.potential()
+    pot.compile_roll_rules()
+    ocr_times = []
+    decision_times = []
+    traces = []
+    passes = 0
+    unknown = 0
+
+    start = time.perf_counter()
+    for i in range(rolls):
+        t0 = time.perf_counter()
+        try:
+            pot.get_lines()
+        except FrameSourceExhausted:
+            break
+        t1 = time.perf_counter()
+
+        # Decision step - same checks startbot() runs every roll
+        pot.stop_bot = False
+        pot.get_roll()
+        pot.check_roll_rules()
+        t2 = time.perf_counter()
+
+        if pot.stop_bot:
+            passes += 1
+        elif pot.roll_unknown:
+            unknown += 1
+        ocr_times.append(t1 - t0)
+        decision_times.append(t2 - t1)
+        pot_lines = get_current_potlines()
+        if pot_lines is not None and pot_lines.last_trace:
+            traces.append(pot_lines.last_trace)
+        if debug:
+            print(f"[{i + 1}] {pot.line1} | {pot.line2} | {pot.line3}  ({(t1 - t0) * 1000:.1f} ms)")
+    total = time.perf_counter() - start
+
+    return {
+        "rolls": len(ocr_times),
+        "passes": passes,
+        "unknown": unknown,
+        "total": total,
+        "ocr_mean": sum(ocr_times) / len(ocr_times) if ocr_times else 0.0,
+        "ocr_p50": percentile(ocr_times, 50),
+        "ocr_p95": percentile(ocr_times, 95),
+        "decision_mean": sum(decision_times) / len(decision_times) if decision_times else 0.0,
+        "traces": traces,
+        "ocr_cache": get_ocr_cache().get_stats(),
+        "line_dictionary": get_line_dictionary().get_stats(),
+        "parse_cache": get_parse_cache().get_stats(),
+        "glyphs": dict(get_glyph_matcher().stats, characters=len(get_glyph_matcher().characters)),
+    }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python tools/benchmark_replay.py <image|directory|video> [--rolls N] [--crop x,y,w,h] [--cube Glowing|Bright] [--flex BD,ATT] [--count N] [--debug]")
+        print("\nExample:")
+        print("  python tools/benchmark_replay.py recordings/session1 --rolls 200 --flex BD,ATT --count 2")
+        return
+
+    # Absolute path: importing the capture modules changes the working directory in dev runs
+    path = os.path.abspath(sys.argv[1])
+    args = sys.argv[2:]
+
+    def option(name, default=None):
+        if name in args:
+            index = args.index(name)
+            if index + 1 < len(args):
+                return args[index + 1]
+        return default
+
+    rolls = int(option('--rolls', 100))
+    crop = option('--crop')
+    crop_region = tuple(int(v) for v in crop.split(',')) if crop else None
+    cube_type = option('--cube', "Glowing")
+    flex = option('--flex')
+    flex_stat_types = [s.strip().upper() for s in flex.split(',')] if flex else None
+    required_count = int(option('--count', 2))
+    debug = '--debug' in args
+
+    if not os.path.exists(path):
+        print(f"Error: Replay not found: {path}")
+        return
+
+    results = benchmark_replay(path, rolls=rolls, crop_region=crop_region, cube_type=cube_type,
+                               flex_stat_types=flex_stat_types, required_count=required_count, debug=debug)
+
+    print(f"\n{'='*60}")
+    print(f"Replay benchmark: {path}")
+    print(f"{'='*60}")
+    print(f"Rolls:            {results['rolls']} ({results['passes']} would have stopped the bot, "
+          f"{results['unknown']} unknown from low OCR confidence)")
+    print(f"Total time:       {results['total']:.2f} s")
+    if results['total'] > 0:
+        print(f"Rolls per minute: {results['rolls'] / results['total'] * 60:.0f} (no input/animation delays)")
+    print(f"OCR per roll:     mean {results['ocr_mean'] * 1000:.1f} ms, p50 {results['ocr_p50'] * 1000:.1f} ms, p95 {results['ocr_p95'] * 1000:.1f} ms")
+    print(f"Decision per roll: mean {results['decision_mean'] * 1000:.2f} ms")
+    traces = results['traces']
+    if traces:
+        segmented = sum(1 for t in traces if t['path'] == 'segmented')
+        unparsed = sum(1 for t in traces if t['accepted'] is None)
+        tried = [t['candidates_tried'] for t in traces if t['path'] == 'cascade']
+        print(f"OCR path:         {segmented} line by line, {len(traces) - segmented} full cascade "
+              f"({sum(tried) / len(tried) if tried else 0:.1f} candidates per roll), {unparsed} never parsed")
+    cache = results['ocr_cache']
+    print(f"OCR cache:        {cache['hits']} hits / {cache['misses']} misses ({cache['hit_rate'] * 100:.0f}% hit rate)")
+    lines = results['line_dictionary']
+    print(f"Line dictionary:  {lines['hits']} hits / {lines['misses']} misses ({lines['hit_rate'] * 100:.0f}% hit rate), "
+          f"{lines['entries']} lines known")
+    parsed = results['parse_cache']
+    print(f"Parse cache:      {parsed['hits']} hits / {parsed['misses']} misses ({parsed['hit_rate'] * 100:.0f}% hit rate)")
+    glyphs = results['glyphs']
+    print(f"Glyph atlas:      {glyphs['characters']} characters, {glyphs['templates_added']} templates learned this run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Check the potential line catalog (src/line_catalog.py): its size, how the recorded OCR lines decode
+against it, and that decoding never changes a value.
+
+Every normalized line of the stat lexer corpus (stat_lexer_corpus.jsonl) is decoded against the
+catalog; lines that decode are counted as exact (the template key is in the dict) or corrected
+(nearest template by edit distance), the rest as rejected (nothing near enough, equally near
+different lines, or a value the nearest line can't have). A decoded line must keep the value as read.
+"""
+import sys
+import os
+import json
+import time
+
+# Allow running as "python tools/check_line_catalog.py" from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.line_catalog import LineCatalog, KEY_VALUE
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stat_lexer_corpus.jsonl")
+
+
+def load_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return sorted({json.loads(line)["normalized"] for line in f if line.strip()})
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Decode the recorded OCR lines against the potential line catalog")
+    parser.add_argument("--show", type=int, default=15, help="Corrected lines to print")
+    args = parser.parse_args()
+
+    catalog = LineCatalog()  # Fresh catalog: nothing decoded yet, so the timings below include the searches
+    print(f"{len(catalog.kinds)} line kinds, {len(catalog.spellings)} templates, {len(catalog.by_key)} template keys")
+
+    lines = [line for line in load_lines(CORPUS_PATH) if line]
+    exact = corrected = rejected = changed = 0
+    exact_time = search_time = 0.0
+    shown = 0
+    for line in lines:
+        start = time.perf_counter()
+        match = catalog.decode(line)
+        elapsed = time.perf_counter() - start
+        if match is None:
+            rejected += 1
+            search_time += elapsed
+            continue
+        if match.value is not None and match.value not in {int(digits) for digits in KEY_VALUE.findall(line)}:
+            changed += 1
+            print(f"  Value changed: {line!r} -> {match.text!r}")
+        if match.distance == 0:
+            exact += 1
+            exact_time += elapsed
+        else:
+            corrected += 1
+            search_time += elapsed
+            if shown < args.show:
+                shown += 1
+                print(f"  {line!r} -> {match.text!r} ({match.distance} edits)")
+
+    print(f"{len(lines)} corpus lines: {exact} exact, {corrected} corrected, {rejected} rejected")
+    print(f"Dict lookup:     {exact_time / max(exact, 1) * 1e6:8.1f} us per line")
+    print(f"Nearest search:  {search_time / max(corrected + rejected, 1) * 1e6:8.1f} us per line")
+    if changed:
+        print(f"{changed} lines decoded with a different value!")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
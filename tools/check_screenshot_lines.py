@@ -0,0 +1,89 @@
+"""
+Check that a screenshot reads as the expected potential lines, in slot order, through the roll
+pipeline of the bot (potential.get_lines()).
+
+Defaults to the bundled auto_detected_crop_region.png (DEX +6% / DEX +12 / DEX +3%): a flat line
+between two % lines, which must be accepted line by line instead of falling through to the
+full-block cascade. The read starts cold - no line dictionary, glyph atlas or learned cascade
+order - so it shows what a first roll costs. The same crop is then read through the cascade alone
+(line segmentation off): it must give the same lines, and neither roll may be unknown (low OCR
+confidence).
+"""
+import sys
+import os
+import time
+
+# Allow running as "python tools/check_screenshot_lines.py" from the project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+START_DIR = os.getcwd()  # Importing the capture modules changes the working directory in dev runs
+
+from src import bot_logic
+from src.image_finder import potlines
+from src.translate_ocr_results import get_current_potlines
+
+DEFAULT_IMAGE = os.path.join(ROOT, "auto_detected_crop_region.png")
+DEFAULT_CROP = "210,374,325,86"
+DEFAULT_LINES = "DEX: +6%|DEX: +12|DEX: +3%"
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Check the potential lines read from a screenshot")
+    parser.add_argument("image", nargs='?', default=DEFAULT_IMAGE, help="Screenshot to read")
+    parser.add_argument("--crop", default=DEFAULT_CROP, help="Crop region x,y,w,h in pixels")
+    parser.add_argument("--expect", default=DEFAULT_LINES, help="Expected lines, separated by '|'")
+    parser.add_argument("--path", default='segmented', help="Expected OCR path ('segmented', 'cascade' or 'any')")
+    args = parser.parse_args()
+
+    expected = tuple(args.expect.split('|'))
+    run_config = bot_logic.default_config.copy()
+    run_config.update({
+        "test_image_path": os.path.join(START_DIR, args.image),
+        "crop_region": tuple(int(v) for v in args.crop.split(',')),
+        "auto_detect_crop": False,
+    })
+    bot_logic.config = run_config
+    # Cold read: nothing learned from earlier runs
+    potlines.use_line_dictionary = False
+    potlines.glyph_matching = False
+    potlines.adaptive_ocr = False
+
+    print(f"Expected: {expected}")
+    failed = check_read(expected, args.path)
+    # Cascade only: whitelist reads must not count as low confidence
+    potlines.line_segmentation = False
+    current = get_current_potlines()
+    if current is not None:
+        current.line_segmentation = False
+    failed = check_read(expected, 'cascade') or failed
+    return 1 if failed else 0
+
+
+def check_read(expected, expected_path):
+    """Read the lines once; True if the lines, the OCR path or the roll's confidence are off"""
+    pot = bot_logic.potential()
+    start = time.perf_counter()
+    pot.get_lines()
+    elapsed = time.perf_counter() - start
+    lines = (pot.line1, pot.line2, pot.line3)
+    trace = get_current_potlines().last_trace or {}
+    path = trace.get("path")
+    confidence = pot.last_read and pot.last_read["confidence"]
+
+    print(f"Read:     {lines} ({elapsed * 1000:.0f} ms, {path} path, confidence {confidence})")
+    failed = False
+    if lines != expected:
+        print("Lines differ!")
+        failed = True
+    if expected_path != 'any' and path != expected_path:
+        print(f"Read through the {path} path, expected {expected_path}!")
+        failed = True
+    if pot.roll_unknown:
+        print(f"Roll is unknown (low confidence on lines {pot.last_read['low_confidence_lines']})!")
+        failed = True
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(main())
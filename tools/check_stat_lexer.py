@@ -0,0 +1,130 @@
+"""
+Check the stat lexer (src/stat_lexer.py) against the recorded line corpus, and that it stays linear.
+
+stat_lexer_corpus.jsonl holds OCR lines (clean and misread potential lines, comma joined stats,
+noise, full-window garbage) with the normalized text and the stats the corrections gave for them:
+"stats" for the normalized line, "raw_stats" for the line as read. Every line is run through
+normalize_line(), lex_line() and get_all_stats_from_line() and compared with the recording; then
+lex_line() is timed on garbage lines of growing length. The value recheck cases check that a
+re-read value written back into its line (value_reader.replace_value()) still lexes as its stat.
+
+--record rewrites the expected outputs from the current code (after deliberately changing a
+correction - check the diff of the corpus file).
+"""
+import sys
+import os
+import json
+import random
+import time
+
+# Allow running as "python tools/check_stat_lexer.py" from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.stat_lexer import lex_line
+from src.translate_ocr_results import normalize_line, get_all_stats_from_line
+from src.value_reader import replace_value
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stat_lexer_corpus.jsonl")
+GARBAGE_WORDS = ["STR", "+9%", "Boss", "Damage", "Equip", "Potential", "Cube", "Legendary", "ATT", "Req", "Lev:", "200",
+                 "|", "@", "Magic", ":", "35", "Monster", "Defense", "Alstats", "Luk", "e", "Slots", "13", "Constraint", "        ", "1111111111", "%%"]
+# (line as read, re-read value, line written back, stats lex_line() must give for it)
+VALUE_RECHECK_CASES = [
+    ("Attacks ignore 305%% Monster", 30, "Attacks ignore 30% Monster", [["IED", 30]]),
+    ("Attacks ignore 36% Monster Defense", 30, "Attacks ignore 30% Monster Defense", [["IED", 30]]),
+    ("Boss Damage: +95", 9, "Boss Damage: +9%", [["BD", 9]]),
+    ("CriticalDamage +6%5", 6, "CriticalDamage +6%", [["CD", 6]]),
+    ("STR: +35%", 3, "STR: +3%", [["STR", 3]]),
+    ("Skill Cooldowns: -3 sec", 2, "Skill Cooldowns: -2 sec", []),
+]
+
+
+def load_corpus(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def expected_for(line):
+    """What the current code gives for a line, in the corpus format"""
+    normalized = normalize_line(line)
+    return {"line": line, "normalized": normalized,
+            "stats": [list(stat) for stat in get_all_stats_from_line(normalized)],
+            "raw_stats": [list(stat) for stat in get_all_stats_from_line(line)]}
+
+
+def check_corpus(entries, show=20):
+    """Compare every corpus line; returns the number of lines that differ"""
+    failures = 0
+    for entry in entries:
+        line = entry["line"]
+        got = expected_for(line)
+        lexed = [[token.stat, token.value] for token in lex_line(line).stats]
+        problems = [f"{key}: {got[key]!r} != {entry[key]!r}" for key in ("normalized", "stats", "raw_stats")
+                    if got[key] != entry[key]]
+        if lexed != entry["stats"]:
+            problems.append(f"lex_line: {lexed!r} != {entry['stats']!r}")
+        if problems:
+            failures += 1
+            if failures <= show:
+                print(f"  {line!r}: " + "; ".join(problems))
+    return failures
+
+
+def check_value_recheck(cases=VALUE_RECHECK_CASES):
+    """Write the re-read values back into their lines; returns the number of cases that differ"""
+    failures = 0
+    for line, value, expected, stats in cases:
+        replaced = replace_value(line, value)
+        lexed = [[token.stat, token.value] for token in lex_line(replaced).stats]
+        if replaced != expected or lexed != stats:
+            failures += 1
+            print(f"  {line!r} + {value}: {replaced!r} {lexed!r} != {expected!r} {stats!r}")
+    return failures
+
+
+def check_linear(lengths=(1000, 2000, 4000, 8000, 16000), seed=0):
+    """Time lex_line() (best of 3) on garbage lines; the time per character should stay flat"""
+    rng = random.Random(seed)
+    per_char = []
+    for length in lengths:
+        words = []
+        while sum(len(w) + 1 for w in words) < length:
+            words.append(rng.choice(GARBAGE_WORDS))
+        line = " ".join(words)
+        elapsed = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            lex_line(line)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        per_char.append(elapsed / len(line))
+        print(f"  {len(line):6d} chars: {elapsed * 1000:7.2f} ms ({elapsed / len(line) * 1e6:.2f} us/char)")
+    return per_char[-1] / per_char[0]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Check the stat lexer against the recorded line corpus")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="Corpus file (JSON lines)")
+    parser.add_argument("--record", action="store_true", help="Rewrite the expected outputs from the current code")
+    args = parser.parse_args()
+
+    entries = load_corpus(args.corpus)
+    if args.record:
+        with open(args.corpus, 'w', encoding='utf-8', newline='\n') as f:
+            for entry in entries:
+                f.write(json.dumps(expected_for(entry["line"]), ensure_ascii=False) + "\n")
+        print(f"Recorded {len(entries)} lines to {args.corpus}")
+        return 0
+
+    print(f"Corpus: {len(entries)} lines")
+    failures = check_corpus(entries)
+    print(f"{len(entries) - failures}/{len(entries)} lines match the recording")
+    recheck_failures = check_value_recheck()
+    print(f"{len(VALUE_RECHECK_CASES) - recheck_failures}/{len(VALUE_RECHECK_CASES)} value recheck cases match")
+    print("Garbage lines:")
+    growth = check_linear()
+    print(f"Time per character, longest vs shortest line: {growth:.1f}x (about 1x when linear)")
+    return 1 if failures or recheck_failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,8 @@ Interactive GUI tool to tune crop region offsets in real-time
 """
 import cv2 as cv
 import numpy as np
-import pytesseract
+from src.ocr_engine import get_ocr_engine, set_ocr_backend
+from src.ocr_server import PRIORITY_TOOL
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
@@ -161,22 +162,28 @@ class CropRegionTuner:
                 
                 all_matches = []
                 
-                for img_ocr, img_name in images_to_try:
-                    for psm_config, psm_desc in ocr_configs:
-                        try:
-                            ocr_data = pytesseract.image_to_data(img_ocr, output_type=pytesseract.Output.DICT, config=psm_config)
-                            for i, text in enumerate(ocr_data['text']):
-                                text_lower = text.lower().strip()
-                                if len(text_lower) > 0 and 'reset' in text_lower:
-                                    x = ocr_data['left'][i]
-                                    y = ocr_data['top'][i]
-                                    width = ocr_data['width'][i]
-                                    height = ocr_data['height'][i]
-                                    conf = ocr_data['conf'][i]
-                                    if conf >= -1:
-                                        all_matches.append((x, y, width, height, conf, text, psm_config, img_name))
-                        except:
-                            pass
+                # Every image/config pair in one batch (a single request to the OCR server)
+                jobs = [(img_ocr, img_name, psm_config) for img_ocr, img_name in images_to_try
+                        for psm_config, psm_desc in ocr_configs]
+                try:
+                    batch = get_ocr_engine().image_to_data_batch([(img_ocr, psm_config) for img_ocr, _, psm_config in jobs])
+                except Exception:
+                    batch = []
+                
+                for (img_ocr, img_name, psm_config), ocr_data in zip(jobs, batch):
+                    try:
+                        for i, text in enumerate(ocr_data['text']):
+                            text_lower = text.lower().strip()
+                            if len(text_lower) > 0 and 'reset' in text_lower:
+                                x = ocr_data['left'][i]
+                                y = ocr_data['top'][i]
+                                width = ocr_data['width'][i]
+                                height = ocr_data['height'][i]
+                                conf = ocr_data['conf'][i]
+                                if conf >= -1:
+                                    all_matches.append((x, y, width, height, conf, text, psm_config, img_name))
+                    except:
+                        pass
                 
                 if all_matches:
                     unique_matches = []
@@ -328,8 +335,17 @@ STAT_HEIGHT = {self.stat_height.get()}
             messagebox.showerror("Error", f"Could not save config: {str(e)}")
 
 
+def warm_ocr():
+    try:
+        set_ocr_backend('auto', server=True, priority=PRIORITY_TOOL)
+    except Exception as e:
+        print(f"Could not start the OCR engine: {e}")
+
+
 def main():
     root = tk.Tk()
+    # Connect to (or start) the OCR server off the Tk thread
+    threading.Thread(target=warm_ocr, daemon=True).start()
     app = CropRegionTuner(root)
     root.mainloop()
 
@@ -3,7 +3,8 @@ Tool to find the optimal crop region for the Potential lines section
 """
 import cv2 as cv
 import numpy as np
-import pytesseract
+from src.ocr_engine import get_ocr_engine, set_ocr_backend
+from src.ocr_server import PRIORITY_TOOL
 from src.crop_config import OFFSET_X, OFFSET_ABOVE, STAT_WIDTH, STAT_HEIGHT
 from PIL import Image
 from src.auto_detect_crop import detect_potential_region as auto_detect
@@ -48,7 +49,7 @@ def find_potential_region(image_path, debug=True):
         gray = cv.cvtColor(img, cv.COLOR_BGR2GRAY)
         enhanced_gray = cv.createCLAHE(clipLimit=2.0, tileGridSize=(8,8)).apply(gray)
         try:
-            ocr_data = pytesseract.image_to_data(enhanced_gray, output_type=pytesseract.Output.DICT, config='--psm 6')
+            ocr_data = get_ocr_engine().image_to_data(enhanced_gray, config='--psm 6')
             for i, text in enumerate(ocr_data['text']):
                 text_lower = text.lower().strip()
                 if 'reset' in text_lower:
@@ -116,7 +117,7 @@ def find_potential_region(image_path, debug=True):
             for psm_config, psm_desc in ocr_configs:
                 try:
                     # Get OCR data with bounding boxes
-                    ocr_data = pytesseract.image_to_data(img_ocr, output_type=pytesseract.Output.DICT, config=psm_config)
+                    ocr_data = get_ocr_engine().image_to_data(img_ocr, config=psm_config)
                     
                     # Search for "Reset" button text
                     for i, text in enumerate(ocr_data['text']):
@@ -166,7 +167,7 @@ def find_potential_region(image_path, debug=True):
             print("\nCould not find 'Reset' text. Showing what OCR found:")
             # Show all OCR results for debugging
             try:
-                ocr_data = pytesseract.image_to_data(gray, output_type=pytesseract.Output.DICT, config='--psm 6')
+                ocr_data = get_ocr_engine().image_to_data(gray, config='--psm 6')
                 all_texts = [(ocr_data['text'][i], ocr_data['left'][i], ocr_data['top'][i], ocr_data['conf'][i]) 
                             for i in range(len(ocr_data['text'])) if len(ocr_data['text'][i].strip()) > 0]
                 print("OCR found these texts (first 20):")
@@ -326,6 +327,8 @@ if __name__ == "__main__":
         sys.exit(1)
     
     image_path = sys.argv[1]
+    # Warm engine from the shared OCR server (the GUI's, if it is running)
+    set_ocr_backend('auto', server=True, priority=PRIORITY_TOOL)
     result = find_potential_region(image_path, debug=True)
     
     if result:
@@ -7,7 +7,8 @@ import os
 from src.auto_detect_crop import detect_potential_region
 from src.translate_ocr_results import get_lines, split_lines, process_lines
 from src.crop_config import OFFSET_X, OFFSET_ABOVE
-import pytesseract
+from src.ocr_engine import get_ocr_engine, set_ocr_backend
+from src.ocr_server import PRIORITY_TOOL
 
 def test_crop_ocr(image_path, debug=True):
     """
@@ -200,7 +201,7 @@ def test_crop_ocr(image_path, debug=True):
     
     for psm_config, psm_desc in ocr_configs:
         try:
-            result = pytesseract.image_to_string(gray, config=psm_config)
+            result = get_ocr_engine().image_to_string(gray, config=psm_config)
             if result and result.strip():
                 print(f"\nPSM {psm_config} ({psm_desc}):")
                 print(f"  {repr(result[:200])}")
@@ -227,6 +228,8 @@ def main():
         print(f"Error: Image file not found: {image_path}")
         return
     
+    # Warm engine from the shared OCR server (the GUI's, if it is running)
+    set_ocr_backend('auto', server=True, priority=PRIORITY_TOOL)
     test_crop_ocr(image_path, debug=debug)
 
 